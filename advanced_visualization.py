@@ -10,18 +10,134 @@ Moduł do zaawansowanej wizualizacji:
 
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
 import os
+import time
+
+# ReportLab (opcjonalnie) – eksport raportów PDF
+try:
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
+    from reportlab.lib.enums import TA_CENTER
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
+
+def _create_figure(figsize, headless=False):
+    """
+    Nowa figura: w trybie headless niezależna od pyplot (Figure + FigureCanvasAgg),
+    więc nie wymaga backendu GUI i nie trafia do globalnego rejestru figur.
+    """
+    if headless:
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        return fig
+    return plt.figure(figsize=figsize)
+
+
+def _finish_figure(fig, save_path, message):
+    """Ułóż figurę i zapisz ją, jeśli podano ścieżkę."""
+    fig.tight_layout()
+    if save_path:
+        fig.savefig(save_path, dpi=150, bbox_inches='tight')
+        print(f"{message}: {save_path}")
+
+
+def close_figure(fig):
+    """Zwolnij figurę: usuń ją z rejestru pyplot (jeśli tam jest) i wyczyść artystów."""
+    plt.close(fig)
+    fig.clear()
+
+
+def _minmax_indices(y, n_buckets):
+    """Indeksy minimum i maksimum w każdym z n_buckets kubełków (NaN pomijane)."""
+    n = len(y)
+    size = int(np.ceil(n / n_buckets))
+    n_buckets = int(np.ceil(n / size))
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    blocks = padded.reshape(n_buckets, size)
+    nan = np.isnan(blocks)
+    offsets = np.arange(n_buckets) * size
+    lo = np.argmin(np.where(nan, np.inf, blocks), axis=1) + offsets
+    hi = np.argmax(np.where(nan, -np.inf, blocks), axis=1) + offsets
+    return np.concatenate([lo, hi])
+
+
+def _lttb_indices(y, n_out):
+    """Largest-Triangle-Three-Buckets: n_out punktów najlepiej oddających kształt linii."""
+    n = len(y)
+    y = np.where(np.isnan(y), np.nanmean(y) if np.isfinite(y).any() else 0.0, y)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    idx = np.empty(n_out, dtype=int)
+    idx[0], idx[-1] = 0, n - 1
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        nxt_start, nxt_end = edges[i + 1], (edges[i + 2] if i + 2 < len(edges) else n)
+        avg_x = (nxt_start + max(nxt_end, nxt_start + 1) - 1) / 2.0
+        avg_y = y[nxt_start:max(nxt_end, nxt_start + 1)].mean()
+        xs = np.arange(start, max(end, start + 1))
+        area = np.abs((prev - avg_x) * (y[xs] - y[prev]) - (prev - xs) * (avg_y - y[prev]))
+        prev = xs[np.argmax(area)]
+        idx[i + 1] = prev
+    return idx
+
+
+def downsample_indices(series, max_points, method='minmax'):
+    """
+    Wspólne indeksy punktów do narysowania dla kilku serii o tej samej osi x.
+    
+    Args:
+        series: lista tablic y (równej długości)
+        max_points: docelowa liczba punktów na linię (np. 2 × szerokość w pikselach)
+        method: 'minmax' (min i max w każdym kubełku – zachowuje ekstrema)
+                albo 'lttb' (Largest-Triangle-Three-Buckets)
+    
+    Returns:
+        posortowane indeksy (wszystkie, jeśli seria jest krótsza niż max_points)
+    """
+    n = len(series[0])
+    if not max_points or n <= max_points:
+        return np.arange(n)
+    
+    per_series = max(2, max_points // len(series))
+    parts = [np.array([0, n - 1])]
+    for y in series:
+        y = np.asarray(y, dtype=float)
+        if method == 'lttb':
+            parts.append(_lttb_indices(y, max(3, per_series)))
+        else:
+            parts.append(_minmax_indices(y, max(1, per_series // 2)))
+    return np.unique(np.concatenate(parts))
+
+
+def _auto_max_points(figsize, dpi=150):
+    """Domyślny limit punktów: 2 na kolumnę pikseli szerokości wykresu."""
+    return int(figsize[0] * dpi * 2)
 
 
 class AdvancedVisualizer:
-    """Klasa do zaawansowanej wizualizacji danych."""
+    """
+    Klasa do zaawansowanej wizualizacji danych.
+    
+    Każda metoda przyjmuje headless=True: rysuje wtedy na osobnej figurze Agg
+    (bez pyplot) i zwraca obiekt Figure. render_batch rysuje serię takich
+    wykresów do plików, zwalniając każdą figurę zaraz po zapisie.
+    """
 
     @staticmethod
     def plot_forecast_with_intervals(dates, actual, forecast, lower, upper, ticker, 
-                                     title=None, figsize=(14, 7), save_path=None):
+                                     title=None, figsize=(14, 7), save_path=None, headless=False):
         """
         Narysuj prognozę z przedziałami ufności.
         
@@ -35,39 +151,38 @@ class AdvancedVisualizer:
             title: tytuł wykresu
             figsize: rozmiar figury
             save_path: ścieżka do zapisania
+            headless: rysuj bez pyplot (backend Agg) i zwróć Figure
         """
-        plt.figure(figsize=figsize)
+        fig = _create_figure(figsize, headless)
+        ax = fig.add_subplot(1, 1, 1)
         
         # Historia
-        plt.plot(dates[:len(actual)], actual, 'b-', linewidth=2, label='Historia (Close)', alpha=0.8)
+        ax.plot(dates[:len(actual)], actual, 'b-', linewidth=2, label='Historia (Close)', alpha=0.8)
         
         # Prognoza
         forecast_dates = dates[len(actual):]
-        plt.plot(forecast_dates, forecast, 'r-o', linewidth=2, label='Prognoza', markersize=6)
+        ax.plot(forecast_dates, forecast, 'r-o', linewidth=2, label='Prognoza', markersize=6)
         
         # Przedziały ufności
-        plt.fill_between(forecast_dates, lower, upper, alpha=0.2, color='red', 
-                         label='95% przedział ufności')
+        ax.fill_between(forecast_dates, lower, upper, alpha=0.2, color='red', 
+                        label='95% przedział ufności')
         
         if title is None:
             title = f"Prognoza kursu {ticker.upper()}"
         
-        plt.title(title, fontsize=14, fontweight='bold')
-        plt.xlabel('Data', fontsize=12)
-        plt.ylabel('Cena', fontsize=12)
-        plt.legend(loc='best', fontsize=10)
-        plt.grid(True, alpha=0.3)
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        
-        if save_path:
-            plt.savefig(save_path, dpi=150, bbox_inches='tight')
-            print(f"📊 Wykres zapisany: {save_path}")
+        ax.set_title(title, fontsize=14, fontweight='bold')
+        ax.set_xlabel('Data', fontsize=12)
+        ax.set_ylabel('Cena', fontsize=12)
+        ax.legend(loc='best', fontsize=10)
+        ax.grid(True, alpha=0.3)
+        ax.tick_params(axis='x', labelrotation=45)
+        _finish_figure(fig, save_path, "📊 Wykres zapisany")
         
-        return plt
+        return fig if headless else plt
 
     @staticmethod
-    def plot_multiple_tickers(ticker_data, figsize=(15, 8), save_path=None):
+    def plot_multiple_tickers(ticker_data, figsize=(15, 8), save_path=None, headless=False,
+                              max_points=None, lod_method='minmax'):
         """
         Porównaj wiele tickerów na jednym wykresie.
         
@@ -75,29 +190,34 @@ class AdvancedVisualizer:
             ticker_data: dict {ticker: prices}
             figsize: rozmiar figury
             save_path: ścieżka do zapisania
+            headless: rysuj bez pyplot (backend Agg) i zwróć Figure
+            max_points: limit punktów na linię (None = wg szerokości wykresu, 0 = bez limitu)
+            lod_method: 'minmax' lub 'lttb' – sposób zmniejszania liczby punktów
         """
-        plt.figure(figsize=figsize)
+        if max_points is None:
+            max_points = _auto_max_points(figsize)
+        fig = _create_figure(figsize, headless)
+        ax = fig.add_subplot(1, 1, 1)
         
         for ticker, prices in ticker_data.items():
             # Normalizuj ceny do zakresu 0-100 dla porównania
             normalized = (prices - np.min(prices)) / (np.max(prices) - np.min(prices)) * 100
-            plt.plot(range(len(normalized)), normalized, marker='o', label=ticker, linewidth=2, alpha=0.8)
-        
-        plt.title('Porównanie tickerów (znormalizowane 0-100)', fontsize=14, fontweight='bold')
-        plt.xlabel('Dni', fontsize=12)
-        plt.ylabel('Znormalizowana cena', fontsize=12)
-        plt.legend(loc='best', fontsize=10)
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-        
-        if save_path:
-            plt.savefig(save_path, dpi=150, bbox_inches='tight')
-            print(f"📊 Wykres porównawczy zapisany: {save_path}")
-        
-        return plt
+            idx = downsample_indices([normalized], max_points, lod_method)
+            marker = 'o' if len(idx) == len(normalized) else None
+            ax.plot(idx, np.asarray(normalized)[idx], marker=marker, label=ticker, linewidth=2, alpha=0.8)
+        
+        ax.set_title('Porównanie tickerów (znormalizowane 0-100)', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Dni', fontsize=12)
+        ax.set_ylabel('Znormalizowana cena', fontsize=12)
+        ax.legend(loc='best', fontsize=10)
+        ax.grid(True, alpha=0.3)
+        _finish_figure(fig, save_path, "📊 Wykres porównawczy zapisany")
+        
+        return fig if headless else plt
 
     @staticmethod
-    def plot_indicators(dates, close, rsi, macd, sma20, sma50, figsize=(14, 10), save_path=None):
+    def plot_indicators(dates, close, rsi, macd, sma20, sma50, figsize=(14, 10), save_path=None,
+                        headless=False, max_points=None, lod_method='minmax'):
         """
         Narysuj cenę z wskaźnikami technicznymi.
         
@@ -110,8 +230,20 @@ class AdvancedVisualizer:
             sma50: SMA(50)
             figsize: rozmiar figury
             save_path: ścieżka do zapisania
+            headless: rysuj bez pyplot (backend Agg)
+            max_points: limit punktów na linię (None = wg szerokości wykresu, 0 = bez limitu)
+            lod_method: 'minmax' lub 'lttb' – sposób zmniejszania liczby punktów
         """
-        fig, axes = plt.subplots(3, 1, figsize=figsize, sharex=True)
+        if max_points is None:
+            max_points = _auto_max_points(figsize)
+        # Wspólne indeksy dla wszystkich serii – panele zachowują tę samą oś x
+        idx = downsample_indices([close, rsi, macd], max_points, lod_method)
+        if len(idx) < len(close):
+            dates = np.asarray(dates)[idx]
+            close, rsi, macd, sma20, sma50 = (np.asarray(s)[idx] for s in (close, rsi, macd, sma20, sma50))
+        
+        fig = _create_figure(figsize, headless)
+        axes = fig.subplots(3, 1, sharex=True)
         
         # Panelom 1: Cena z SMA
         axes[0].plot(dates, close, 'b-', linewidth=2, label='Close', alpha=0.8)
@@ -143,18 +275,14 @@ class AdvancedVisualizer:
         axes[2].set_title('MACD (Moving Average Convergence Divergence)', fontsize=12, fontweight='bold')
         axes[2].legend(loc='best', fontsize=9)
         axes[2].grid(True, alpha=0.3)
+        axes[2].tick_params(axis='x', labelrotation=45)
         
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        
-        if save_path:
-            plt.savefig(save_path, dpi=150, bbox_inches='tight')
-            print(f"📊 Wskaźniki zapisane: {save_path}")
+        _finish_figure(fig, save_path, "📊 Wskaźniki zapisane")
         
         return fig
 
     @staticmethod
-    def plot_backtest_results(dates, actual, forecast, figsize=(14, 7), save_path=None):
+    def plot_backtest_results(dates, actual, forecast, figsize=(14, 7), save_path=None, headless=False):
         """
         Narysuj wyniki backtestu.
         
@@ -164,33 +292,31 @@ class AdvancedVisualizer:
             forecast: wartości prognozowane
             figsize: rozmiar figury
             save_path: ścieżka do zapisania
+            headless: rysuj bez pyplot (backend Agg) i zwróć Figure
         """
-        plt.figure(figsize=figsize)
+        fig = _create_figure(figsize, headless)
+        ax = fig.add_subplot(1, 1, 1)
         
-        plt.plot(dates, actual, 'b-o', linewidth=2, label='Rzeczywiste', markersize=4, alpha=0.8)
-        plt.plot(dates, forecast, 'r--s', linewidth=2, label='Prognoza', markersize=4, alpha=0.8)
+        ax.plot(dates, actual, 'b-o', linewidth=2, label='Rzeczywiste', markersize=4, alpha=0.8)
+        ax.plot(dates, forecast, 'r--s', linewidth=2, label='Prognoza', markersize=4, alpha=0.8)
         
         # Zaznacz błędy
-        errors = actual - forecast
-        colors = ['green' if e > 0 else 'red' for e in errors]
-        plt.scatter(dates, actual, c=colors, s=50, alpha=0.5)
-        
-        plt.title('Backtest: Prognoza vs Rzeczywistość', fontsize=14, fontweight='bold')
-        plt.xlabel('Data', fontsize=12)
-        plt.ylabel('Cena', fontsize=12)
-        plt.legend(loc='best', fontsize=10)
-        plt.grid(True, alpha=0.3)
-        plt.xticks(rotation=45)
-        plt.tight_layout()
-        
-        if save_path:
-            plt.savefig(save_path, dpi=150, bbox_inches='tight')
-            print(f"📊 Backtest zapisany: {save_path}")
-        
-        return plt
+        errors = np.asarray(actual) - np.asarray(forecast)
+        colors = np.where(errors > 0, 'green', 'red')
+        ax.scatter(dates, actual, c=colors, s=50, alpha=0.5)
+        
+        ax.set_title('Backtest: Prognoza vs Rzeczywistość', fontsize=14, fontweight='bold')
+        ax.set_xlabel('Data', fontsize=12)
+        ax.set_ylabel('Cena', fontsize=12)
+        ax.legend(loc='best', fontsize=10)
+        ax.grid(True, alpha=0.3)
+        ax.tick_params(axis='x', labelrotation=45)
+        _finish_figure(fig, save_path, "📊 Backtest zapisany")
+        
+        return fig if headless else plt
 
     @staticmethod
-    def plot_error_distribution(errors, figsize=(12, 5), save_path=None):
+    def plot_error_distribution(errors, figsize=(12, 5), save_path=None, headless=False):
         """
         Narysuj rozkład błędów.
         
@@ -198,8 +324,10 @@ class AdvancedVisualizer:
             errors: błędy (actual - forecast)
             figsize: rozmiar figury
             save_path: ścieżka do zapisania
+            headless: rysuj bez pyplot (backend Agg)
         """
-        fig, axes = plt.subplots(1, 2, figsize=figsize)
+        fig = _create_figure(figsize, headless)
+        axes = fig.subplots(1, 2)
         
         # Histogram
         axes[0].hist(errors, bins=30, color='skyblue', edgecolor='black', alpha=0.7)
@@ -214,92 +342,482 @@ class AdvancedVisualizer:
         axes[1].set_title('Q-Q Plot (normalność błędów)', fontsize=12, fontweight='bold')
         axes[1].grid(True, alpha=0.3)
         
-        plt.tight_layout()
-        
-        if save_path:
-            plt.savefig(save_path, dpi=150, bbox_inches='tight')
-            print(f"📊 Rozkład błędów zapisany: {save_path}")
+        _finish_figure(fig, save_path, "📊 Rozkład błędów zapisany")
         
         return fig
 
+    # Rodzaje wykresów dostępne w render_batch
+    CHART_KINDS = {
+        'forecast': 'plot_forecast_with_intervals',
+        'multiple': 'plot_multiple_tickers',
+        'indicators': 'plot_indicators',
+        'backtest': 'plot_backtest_results',
+        'errors': 'plot_error_distribution',
+    }
+
+    # Rodzaje wykresów rysowane na szablonie ChartTemplateCache (metoda cache)
+    TEMPLATE_KINDS = {
+        'forecast': 'render_forecast',
+        'backtest': 'render_backtest',
+    }
+
+    @classmethod
+    def render_chart(cls, kind, save_path, dpi=150, templates=None, **kwargs):
+        """
+        Narysuj jeden wykres headless do pliku i od razu zwolnij figurę.
+        
+        Args:
+            kind: klucz z CHART_KINDS ('forecast', 'indicators', 'backtest', 'errors', 'multiple')
+            save_path: plik wyjściowy (format z rozszerzenia, np. .png)
+            dpi: rozdzielczość (przy templates – rozdzielczość cache)
+            templates: opcjonalny ChartTemplateCache – rodzaje z TEMPLATE_KINDS rysowane
+                       na współdzielonej figurze zamiast nowej
+            **kwargs: argumenty odpowiedniej metody plot_*
+        
+        Returns:
+            save_path
+        """
+        if templates is not None and kind in cls.TEMPLATE_KINDS:
+            return getattr(templates, cls.TEMPLATE_KINDS[kind])(save_path=save_path, **kwargs)
+        method = getattr(cls, cls.CHART_KINDS[kind])
+        fig = method(headless=True, **kwargs)
+        try:
+            fig.savefig(save_path, dpi=dpi, bbox_inches='tight')
+        finally:
+            close_figure(fig)
+        return save_path
+
+    @classmethod
+    def render_batch(cls, jobs, dpi=150):
+        """
+        Narysuj serię wykresów bez GUI (np. paczka wykresów dla całej listy tickerów).
+        Prognozy i backtesty rysowane są na szablonach (ChartTemplateCache) wspólnych dla partii,
+        pozostałe figury są zwalniane po zapisie, więc zużycie pamięci nie rośnie z liczbą wykresów.
+        
+        Args:
+            jobs: lista dict {'kind': ..., 'save_path': ..., 'kwargs': {...}}
+            dpi: rozdzielczość
+        
+        Returns:
+            lista zapisanych ścieżek (None dla wykresów zakończonych błędem)
+        """
+        paths = []
+        with ChartTemplateCache(dpi=dpi) as templates:
+            for job in jobs:
+                try:
+                    paths.append(cls.render_chart(job['kind'], job['save_path'], dpi=dpi, templates=templates,
+                                                  **job.get('kwargs', {})))
+                except Exception as e:
+                    print(f"⚠️ Nie udało się narysować {job.get('save_path')}: {e}")
+                    paths.append(None)
+        print(f"📊 Zapisano {sum(p is not None for p in paths)}/{len(jobs)} wykresów")
+        return paths
+
+    @staticmethod
+    def render_batch_parallel(jobs, max_workers=None, dpi=150, chunksize=4):
+        """
+        Narysuj serię wykresów w puli procesów (matplotlib i szablony wykresów
+        inicjalizowane raz na proces).
+        
+        Args:
+            jobs: lista dict {'kind': ..., 'save_path': ..., 'kwargs': {...}} jak w render_batch
+                  (dane w kwargs muszą dać się zserializować – np. tablice NumPy, listy)
+            max_workers: liczba procesów (domyślnie liczba rdzeni)
+            dpi: rozdzielczość
+            chunksize: liczba wykresów wysyłanych do procesu naraz
+        
+        Returns:
+            lista dict {'kind', 'save_path', 'seconds', 'error'} w kolejności jobs
+        """
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_render_worker,
+                                 initargs=(dpi,)) as executor:
+            results = list(executor.map(_render_job, jobs, [dpi] * len(jobs), chunksize=chunksize))
+        
+        ok = sum(r['error'] is None for r in results)
+        print(f"📊 Zapisano {ok}/{len(jobs)} wykresów w {time.perf_counter() - start:.1f} s")
+        return results
+
+
+_WORKER_TEMPLATES = None  # ChartTemplateCache procesu rysującego
+
+
+def _init_render_worker(dpi=150):
+    """Inicjalizacja procesu rysującego: backend Agg, rozgrzanie cache fontów, szablony wykresów."""
+    global _WORKER_TEMPLATES
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+    fig = _create_figure((2, 2), headless=True)
+    fig.add_subplot(1, 1, 1).set_title("warmup")
+    fig.canvas.draw()
+    close_figure(fig)
+    _WORKER_TEMPLATES = ChartTemplateCache(dpi=dpi)
+
+
+def _render_job(job, dpi):
+    """Wykonaj jedno zadanie render_batch_parallel w procesie roboczym."""
+    start = time.perf_counter()
+    error = None
+    try:
+        AdvancedVisualizer.render_chart(job['kind'], job['save_path'], dpi=dpi, templates=_WORKER_TEMPLATES,
+                                        **job.get('kwargs', {}))
+    except Exception as e:
+        error = str(e)
+    return {
+        'kind': job['kind'],
+        'save_path': job['save_path'],
+        'seconds': time.perf_counter() - start,
+        'error': error,
+    }
+
+
+class ChartTemplateCache:
+    """
+    Cache szablonów wykresów do wielokrotnego rysowania tego samego typu wykresu.
+    
+    Figura, osie, linie, legenda i układ tworzone są raz; dla kolejnego tickera
+    podmieniane są tylko dane (set_data / set_offsets), a obszar przedziału
+    ufności (fill_between) generowany jest od nowa. Bez tight_layout przy każdym wykresie.
+    """
+
+    def __init__(self, dpi=150):
+        self.dpi = dpi
+        self._templates = {}
+
+    # ========= PROGNOZA =========
+    def _forecast_template(self, figsize, dates):
+        key = ('forecast', tuple(figsize))
+        tpl = self._templates.get(key)
+        if tpl is None:
+            fig = _create_figure(figsize, headless=True)
+            ax = fig.add_subplot(1, 1, 1)
+            ax.xaxis.update_units(np.asarray(dates))  # konwerter/formatter dat jak przy ax.plot
+            hist_line, = ax.plot([], [], 'b-', linewidth=2, label='Historia (Close)', alpha=0.8)
+            fc_line, = ax.plot([], [], 'r-o', linewidth=2, label='Prognoza', markersize=6)
+            band = ax.fill_between([0, 1], [0, 0], [0, 0], alpha=0.2, color='red',
+                                   label='95% przedział ufności')
+            title = ax.set_title('Prognoza kursu', fontsize=14, fontweight='bold')
+            ax.set_xlabel('Data', fontsize=12)
+            ax.set_ylabel('Cena', fontsize=12)
+            ax.legend(loc='upper left', fontsize=10)
+            ax.grid(True, alpha=0.3)
+            ax.tick_params(axis='x', labelrotation=45)
+            fig.tight_layout()
+            fig.set_layout_engine('none')  # układ zamrożony – bez dodatkowego rysowania przy savefig
+            tpl = {'fig': fig, 'ax': ax, 'hist': hist_line, 'forecast': fc_line, 'band': band, 'title': title}
+            self._templates[key] = tpl
+        return tpl
+
+    def render_forecast(self, dates, actual, forecast, lower, upper, ticker, save_path,
+                        title=None, figsize=(14, 7)):
+        """
+        Jak AdvancedVisualizer.plot_forecast_with_intervals, ale na współdzielonym szablonie
+        (lower / upper = None – bez przedziału ufności).
+        """
+        tpl = self._forecast_template(figsize, dates)
+        ax = tpl['ax']
+        
+        forecast_dates = dates[len(actual):]
+        tpl['hist'].set_data(dates[:len(actual)], actual)
+        tpl['forecast'].set_data(forecast_dates, forecast)
+        
+        # Stary obszar usuwany przed relim – inaczej zakres poprzedniego tickera zostaje w osiach;
+        # zakres nowego obszaru dokładany jawnie (relim nie zawsze liczy kolekcje)
+        if tpl['band'] is not None:
+            tpl['band'].remove()
+            tpl['band'] = None
+        ax.relim()
+        if lower is not None and upper is not None:
+            tpl['band'] = ax.fill_between(forecast_dates, lower, upper, alpha=0.2, color='red')
+            ax.update_datalim(tpl['band'].get_datalim(ax.transData).get_points())
+        
+        tpl['title'].set_text(title or f"Prognoza kursu {ticker.upper()}")
+        ax.autoscale_view()
+        
+        tpl['fig'].savefig(save_path, dpi=self.dpi)
+        return save_path
+
+    # ========= BACKTEST =========
+    def _backtest_template(self, figsize, dates):
+        key = ('backtest', tuple(figsize))
+        tpl = self._templates.get(key)
+        if tpl is None:
+            fig = _create_figure(figsize, headless=True)
+            ax = fig.add_subplot(1, 1, 1)
+            ax.xaxis.update_units(np.asarray(dates))  # konwerter/formatter dat jak przy ax.plot
+            actual_line, = ax.plot([], [], 'b-o', linewidth=2, label='Rzeczywiste', markersize=4, alpha=0.8)
+            fc_line, = ax.plot([], [], 'r--s', linewidth=2, label='Prognoza', markersize=4, alpha=0.8)
+            scatter = ax.scatter([], [], s=50, alpha=0.5)
+            ax.set_title('Backtest: Prognoza vs Rzeczywistość', fontsize=14, fontweight='bold')
+            ax.set_xlabel('Data', fontsize=12)
+            ax.set_ylabel('Cena', fontsize=12)
+            ax.legend(loc='upper left', fontsize=10)
+            ax.grid(True, alpha=0.3)
+            ax.tick_params(axis='x', labelrotation=45)
+            fig.tight_layout()
+            fig.set_layout_engine('none')  # układ zamrożony – bez dodatkowego rysowania przy savefig
+            tpl = {'fig': fig, 'ax': ax, 'actual': actual_line, 'forecast': fc_line, 'scatter': scatter}
+            self._templates[key] = tpl
+        return tpl
+
+    def render_backtest(self, dates, actual, forecast, save_path, figsize=(14, 7)):
+        """Jak AdvancedVisualizer.plot_backtest_results, ale na współdzielonym szablonie."""
+        tpl = self._backtest_template(figsize, dates)
+        ax = tpl['ax']
+        actual = np.asarray(actual, dtype=float)
+        forecast = np.asarray(forecast, dtype=float)
+        
+        tpl['actual'].set_data(dates, actual)
+        tpl['forecast'].set_data(dates, forecast)
+        
+        x = ax.convert_xunits(np.asarray(dates))
+        offsets = np.column_stack([x, actual])
+        tpl['scatter'].set_offsets(offsets)
+        tpl['scatter'].set_facecolors(np.where((actual - forecast) > 0, 'green', 'red'))
+        
+        # Zakres z nowych danych (linie + punkty), bez punktów poprzedniego wykresu
+        ax.relim()
+        ax.update_datalim(offsets)
+        ax.autoscale_view()
+        
+        tpl['fig'].savefig(save_path, dpi=self.dpi)
+        return save_path
+
+    def close(self):
+        """Zwolnij wszystkie szablony."""
+        for tpl in self._templates.values():
+            close_figure(tpl['fig'])
+        self._templates.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
 
 class PDFExporter:
-    """Eksport raportów do PDF (wymaga reportlab)."""
+    """
+    Eksport raportów do PDF (wymaga reportlab).
+    
+    Style akapitów i tabel budowane są raz na proces i współdzielone przez wszystkie raporty.
+    Wykresy trafiają do PDF jako pliki z dysku – czytane leniwie dopiero przy składaniu strony.
+    """
+    
+    CHART_WIDTH = 7.0   # cale
+    CHART_HEIGHT = 3.8  # cale
+    _styles = None
+    
+    @classmethod
+    def _get_styles(cls):
+        """Style raportu (tworzone przy pierwszym użyciu w danym procesie)."""
+        if cls._styles is None:
+            base = getSampleStyleSheet()
+            cls._styles = {
+                'title': ParagraphStyle(
+                    'CustomTitle',
+                    parent=base['Heading1'],
+                    fontSize=24,
+                    textColor=colors.HexColor('#1f77b4'),
+                    spaceAfter=30,
+                    alignment=TA_CENTER
+                ),
+                'info_table': TableStyle([
+                    ('BACKGROUND', (0, 0), (-1, -1), colors.beige),
+                    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+                    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+                    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+                    ('FONTSIZE', (0, 0), (-1, -1), 10),
+                    ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
+                ]),
+                'forecast_table': TableStyle([
+                    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                    ('FONTSIZE', (0, 0), (-1, 0), 11),
+                    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+                ]),
+            }
+        return cls._styles
+    
+    @classmethod
+    def _ticker_story(cls, ticker, forecast_data, chart_paths=(), generated_at=None):
+        """Elementy (flowables) raportu jednego tickera."""
+        styles = cls._get_styles()
+        generated_at = generated_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        story = [
+            Paragraph(f"Raport prognozy kursu {ticker.upper()}", styles['title']),
+            Spacer(1, 0.2*inch),
+        ]
+        
+        # Dane
+        data = [
+            ['Data wygenerowania', generated_at],
+            ['Symbol', ticker.upper()],
+            ['Liczba dni prognozy', str(len(forecast_data))],
+        ]
+        table = Table(data, colWidths=[2.5*inch, 2.5*inch])
+        table.setStyle(styles['info_table'])
+        story.append(table)
+        story.append(Spacer(1, 0.3*inch))
+        
+        # Dane prognozy
+        forecast_data_table = [['Dzień', 'Cena', 'Dolny przedział', 'Górny przedział']]
+        for i, row in enumerate(forecast_data, start=1):
+            forecast_data_table.append([
+                f"D+{i}",
+                f"{row.get('price', 0):.2f}",
+                f"{row.get('lower', 0):.2f}",
+                f"{row.get('upper', 0):.2f}",
+            ])
+        forecast_table = Table(forecast_data_table, colWidths=[1.5*inch, 1.5*inch, 1.5*inch, 1.5*inch])
+        forecast_table.setStyle(styles['forecast_table'])
+        story.append(forecast_table)
+        
+        # Wykresy (lazy=2: plik otwierany dopiero przy rysowaniu i zamykany zaraz potem)
+        for path in chart_paths:
+            if path and os.path.exists(path):
+                story.append(Spacer(1, 0.3*inch))
+                story.append(Image(path, width=cls.CHART_WIDTH*inch, height=cls.CHART_HEIGHT*inch,
+                                   kind='proportional', lazy=2))
+        return story
     
     @staticmethod
-    def export_forecast_report(ticker, forecast_data, output_path):
+    def export_forecast_report(ticker, forecast_data, output_path, chart_paths=None):
         """
         Eksportuj raport prognozy do PDF.
         Wymaga: pip install reportlab
+        
+        Args:
+            ticker: symbol akcji
+            forecast_data: lista dict {'price', 'lower', 'upper'}
+            output_path: plik PDF
+            chart_paths: opcjonalna lista gotowych wykresów (PNG) dołączanych pod tabelą
         """
-        try:
-            from reportlab.lib.pagesizes import letter, A4
-            from reportlab.lib import colors
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import inch
-            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
-            from reportlab.lib.enums import TA_CENTER, TA_LEFT
-            
-            doc = SimpleDocTemplate(output_path, pagesize=letter)
-            story = []
-            styles = getSampleStyleSheet()
-            
-            # Tytuł
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=24,
-                textColor=colors.HexColor('#1f77b4'),
-                spaceAfter=30,
-                alignment=TA_CENTER
-            )
-            story.append(Paragraph(f"Raport prognozy kursu {ticker.upper()}", title_style))
-            story.append(Spacer(1, 0.2*inch))
-            
-            # Dane
-            data = [
-                ['Data wygenerowania', datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
-                ['Symbol', ticker.upper()],
-                ['Liczba dni prognozy', str(len(forecast_data))],
-            ]
-            
-            table = Table(data, colWidths=[2.5*inch, 2.5*inch])
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, -1), colors.beige),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 12),
-            ]))
-            story.append(table)
-            story.append(Spacer(1, 0.3*inch))
-            
-            # Dane prognozy
-            forecast_data_table = [['Dzień', 'Cena', 'Dolny przedział', 'Górny przedział']]
-            for i, row in enumerate(forecast_data, start=1):
-                forecast_data_table.append([
-                    f"D+{i}",
-                    f"{row.get('price', 0):.2f}",
-                    f"{row.get('lower', 0):.2f}",
-                    f"{row.get('upper', 0):.2f}",
-                ])
-            
-            forecast_table = Table(forecast_data_table, colWidths=[1.5*inch, 1.5*inch, 1.5*inch, 1.5*inch])
-            forecast_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 11),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)
-            ]))
-            story.append(forecast_table)
-            
-            doc.build(story)
-            print(f"📄 Raport PDF zapisany: {output_path}")
-            
-        except ImportError:
+        if not REPORTLAB_AVAILABLE:
             print("⚠️ ReportLab nie jest zainstalowany. Aby eksportować PDF, uruchom: pip install reportlab")
+            return None
+        
+        doc = SimpleDocTemplate(output_path, pagesize=letter)
+        doc.build(PDFExporter._ticker_story(ticker, forecast_data, chart_paths or ()))
+        print(f"📄 Raport PDF zapisany: {output_path}")
+        return output_path
+    
+    @staticmethod
+    def export_batch_report(reports, output_path=None, output_dir=None, chart_dir=None,
+                            max_workers=None, dpi=150):
+        """
+        Raport PDF dla całej listy tickerów z wykresami.
+        
+        Tryb zbiorczy (output_path): wykresy rysowane w puli procesów, potem jeden PDF
+        z tickerami na kolejnych stronach. Tryb per-ticker (output_dir): każdy proces
+        rysuje wykresy i składa PDF jednego tickera.
+        
+        Args:
+            reports: lista dict {'ticker', 'forecast_data',
+                                 'charts': [gotowe pliki PNG] (opcjonalnie),
+                                 'chart_jobs': [zadania jak w render_batch] (opcjonalnie)}
+                     – w chart_jobs można pominąć save_path, plik trafi wtedy do chart_dir
+            output_path: jeden zbiorczy PDF
+            output_dir: katalog na osobne pliki {TICKER}_raport.pdf
+            chart_dir: katalog na wykresy (domyślnie katalog raportu)
+            max_workers: liczba procesów (1 = bez puli procesów)
+            dpi: rozdzielczość wykresów
+        
+        Returns:
+            tryb zbiorczy: output_path; tryb per-ticker: lista dict {'ticker', 'path', 'seconds', 'error'}
+        """
+        if not REPORTLAB_AVAILABLE:
+            print("⚠️ ReportLab nie jest zainstalowany. Aby eksportować PDF, uruchom: pip install reportlab")
+            return None
+        if (output_path is None) == (output_dir is None):
+            raise ValueError("Podaj dokładnie jedno z: output_path (zbiorczy PDF) albo output_dir (PDF na ticker)")
+        
+        start = time.perf_counter()
+        chart_dir = chart_dir or output_dir or os.path.dirname(os.path.abspath(output_path))
+        os.makedirs(chart_dir, exist_ok=True)
+        reports = [_with_chart_paths(report, chart_dir) for report in reports]
+        use_pool = max_workers != 1 and len(reports) > 1
+        
+        if output_dir is not None:
+            os.makedirs(output_dir, exist_ok=True)
+            paths = [os.path.join(output_dir, f"{r['ticker'].upper()}_raport.pdf") for r in reports]
+            if use_pool:
+                with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_render_worker,
+                                         initargs=(dpi,)) as executor:
+                    results = list(executor.map(_export_report_job, reports, paths, [dpi] * len(reports)))
+            else:
+                results = [_export_report_job(r, p, dpi) for r, p in zip(reports, paths)]
+            ok = sum(r['error'] is None for r in results)
+            print(f"📄 Zapisano {ok}/{len(reports)} raportów PDF w {time.perf_counter() - start:.1f} s")
+            return results
+        
+        # Tryb zbiorczy: najpierw wszystkie wykresy, potem jeden dokument
+        jobs = [job for r in reports for job in r['chart_jobs']]
+        written = []
+        if jobs:
+            if use_pool:
+                results = AdvancedVisualizer.render_batch_parallel(jobs, max_workers=max_workers, dpi=dpi)
+                written = [res['save_path'] if res['error'] is None else None for res in results]
+            else:
+                written = AdvancedVisualizer.render_batch(jobs, dpi=dpi)
+        # Do raportu tylko wykresy narysowane w tym uruchomieniu
+        offset = 0
+        for r in reports:
+            count = len(r['chart_jobs'])
+            r['chart_paths'] += [path for path in written[offset:offset + count] if path]
+            offset += count
+        
+        generated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        story = []
+        for i, r in enumerate(reports):
+            if i:
+                story.append(PageBreak())
+            story.extend(PDFExporter._ticker_story(r['ticker'], r['forecast_data'],
+                                                   r['chart_paths'], generated_at))
+        SimpleDocTemplate(output_path, pagesize=letter).build(story)
+        print(f"📄 Raport PDF ({len(reports)} tickerów) zapisany: {output_path} "
+              f"w {time.perf_counter() - start:.1f} s")
+        return output_path
+
+
+def _with_chart_paths(report, chart_dir):
+    """
+    Uzupełnij brakujące save_path w chart_jobs. chart_paths zawiera na razie gotowe
+    pliki z 'charts' – wykresy z chart_jobs dopisywane są dopiero po udanym narysowaniu,
+    żeby do raportu nie trafił plik z wcześniejszego uruchomienia.
+    """
+    ticker = report['ticker'].upper()
+    jobs = []
+    for i, job in enumerate(report.get('chart_jobs', [])):
+        if not job.get('save_path'):
+            job = dict(job, save_path=os.path.join(chart_dir, f"{ticker}_{job['kind']}_{i}.png"))
+        jobs.append(job)
+    return dict(report, chart_jobs=jobs, chart_paths=list(report.get('charts', [])))
+
+
+def _export_report_job(report, output_path, dpi):
+    """Narysuj wykresy i złóż PDF jednego tickera (w procesie roboczym lub lokalnie)."""
+    start = time.perf_counter()
+    error = None
+    try:
+        chart_paths = list(report['chart_paths'])
+        for job in report['chart_jobs']:
+            try:
+                chart_paths.append(AdvancedVisualizer.render_chart(
+                    job['kind'], job['save_path'], dpi=dpi, templates=_WORKER_TEMPLATES, **job.get('kwargs', {})))
+            except Exception as e:
+                print(f"⚠️ Nie udało się narysować {job['save_path']}: {e}")
+        PDFExporter.export_forecast_report(report['ticker'], report['forecast_data'], output_path,
+                                           chart_paths=chart_paths)
+    except Exception as e:
+        error = str(e)
+    return {
+        'ticker': report['ticker'],
+        'path': output_path,
+        'seconds': time.perf_counter() - start,
+        'error': error,
+    }
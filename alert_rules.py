@@ -0,0 +1,211 @@
+# alert_rules.py
+
+"""
+Moduł z wektorowym silnikiem reguł alertów:
+- Progi trzymane w tablicach NumPy, ocena wszystkich reguł w jednym przebiegu
+- Reguły: przebicie w górę / w dół, ruch procentowy, prognoza vs cena
+- Histereza (ponowne uzbrojenie dopiero po powrocie za próg) i cooldown
+"""
+
+import time
+
+import numpy as np
+
+
+class AlertRuleEngine:
+    """Silnik reguł alertów oceniający wszystkie reguły wektorowo."""
+
+    # Typy reguł
+    CROSS_ABOVE = 0       # cena > próg
+    CROSS_BELOW = 1       # cena < próg
+    PCT_MOVE = 2          # |zmiana od ceny odniesienia| > próg (%)
+    FORECAST_ABOVE = 3    # prognoza powyżej ceny o > próg (%)
+    FORECAST_BELOW = 4    # prognoza poniżej ceny o > próg (%)
+
+    RULE_NAMES = {
+        CROSS_ABOVE: "cross_above",
+        CROSS_BELOW: "cross_below",
+        PCT_MOVE: "pct_move",
+        FORECAST_ABOVE: "forecast_above",
+        FORECAST_BELOW: "forecast_below",
+    }
+
+    def __init__(self, hysteresis_pct=0.5, cooldown_seconds=0.0, capacity=1024):
+        """
+        Args:
+            hysteresis_pct: szerokość pasma histerezy w % (reguła uzbraja się ponownie
+                            dopiero, gdy wartość wróci za próg o tyle procent)
+            cooldown_seconds: minimalny odstęp między kolejnymi wyzwoleniami jednej reguły
+            capacity: początkowa pojemność tablic reguł
+        """
+        self.hysteresis_pct = hysteresis_pct
+        self.cooldown_seconds = cooldown_seconds
+
+        self.tickers = []           # indeks -> ticker
+        self._ticker_index = {}     # ticker -> indeks
+        self._forecasts = np.full(16, np.nan)
+
+        self._size = 0
+        self._alloc(capacity)
+
+    # ========= PAMIĘĆ =========
+    def _alloc(self, capacity):
+        self._ticker_idx = np.zeros(capacity, dtype=np.int32)
+        self._type = np.zeros(capacity, dtype=np.int8)
+        self._threshold = np.zeros(capacity, dtype=np.float64)
+        self._reference = np.full(capacity, np.nan)
+        self._band = np.zeros(capacity, dtype=np.float64)
+        self._armed = np.ones(capacity, dtype=bool)
+        self._active = np.zeros(capacity, dtype=bool)
+        self._last_fired = np.full(capacity, -np.inf)
+
+    def _grow(self):
+        old = (self._ticker_idx, self._type, self._threshold, self._reference,
+               self._band, self._armed, self._active, self._last_fired)
+        self._alloc(len(self._ticker_idx) * 2)
+        new = (self._ticker_idx, self._type, self._threshold, self._reference,
+               self._band, self._armed, self._active, self._last_fired)
+        for src, dst in zip(old, new):
+            dst[:len(src)] = src
+
+    def _ticker_id(self, ticker):
+        idx = self._ticker_index.get(ticker)
+        if idx is None:
+            idx = len(self.tickers)
+            self.tickers.append(ticker)
+            self._ticker_index[ticker] = idx
+            if idx >= len(self._forecasts):
+                self._forecasts = np.concatenate([self._forecasts, np.full(len(self._forecasts), np.nan)])
+        return idx
+
+    # ========= REGUŁY =========
+    def add_rule(self, ticker, rule_type, threshold, reference=None):
+        """
+        Dodaj regułę.
+
+        Args:
+            ticker: symbol akcji
+            rule_type: jeden z CROSS_ABOVE, CROSS_BELOW, PCT_MOVE, FORECAST_ABOVE, FORECAST_BELOW
+            threshold: próg (cena dla CROSS_*, procent dla pozostałych)
+            reference: cena odniesienia dla PCT_MOVE (None = pierwsza zaobserwowana cena)
+
+        Returns:
+            ID reguły
+        """
+        if rule_type not in self.RULE_NAMES:
+            raise ValueError(f"Nieznany typ reguły: {rule_type}")
+        if self._size == len(self._ticker_idx):
+            self._grow()
+
+        rule_id = self._size
+        self._ticker_idx[rule_id] = self._ticker_id(ticker)
+        self._type[rule_id] = rule_type
+        self._reference[rule_id] = np.nan if reference is None else reference
+        self._armed[rule_id] = True
+        self._active[rule_id] = True
+        self._last_fired[rule_id] = -np.inf
+        self.set_threshold(rule_id, threshold)
+        self._size += 1
+        return rule_id
+
+    def set_threshold(self, rule_id, threshold):
+        """Zmień próg reguły (i przelicz pasmo histerezy)."""
+        self._threshold[rule_id] = threshold
+        if self._type[rule_id] in (self.CROSS_ABOVE, self.CROSS_BELOW):
+            self._band[rule_id] = abs(threshold) * self.hysteresis_pct / 100.0
+        else:
+            self._band[rule_id] = self.hysteresis_pct
+        self._armed[rule_id] = True
+
+    def remove_rule(self, rule_id):
+        """Wyłącz regułę (ID pozostaje zajęte)."""
+        self._active[rule_id] = False
+
+    def set_forecasts(self, forecasts):
+        """
+        Ustaw prognozowane ceny używane przez reguły FORECAST_*.
+
+        Args:
+            forecasts: dict {ticker: prognozowana cena}
+        """
+        for ticker, value in forecasts.items():
+            self._forecasts[self._ticker_id(ticker)] = value
+
+    def __len__(self):
+        return int(self._active[:self._size].sum())
+
+    # ========= OCENA =========
+    def price_vector(self, prices):
+        """Zamień dict {ticker: cena} na wektor zgodny z self.tickers (NaN = brak ceny)."""
+        vec = np.full(len(self.tickers), np.nan)
+        idx = [self._ticker_index[t] for t in prices if t in self._ticker_index]
+        vec[idx] = [prices[self.tickers[i]] for i in idx]
+        return vec
+
+    def evaluate(self, prices, now=None):
+        """
+        Oceń wszystkie reguły względem wektora cen w jednym przebiegu.
+
+        Args:
+            prices: dict {ticker: cena} albo np.ndarray zgodny z self.tickers
+            now: znacznik czasu (domyślnie time.time())
+
+        Returns:
+            lista wyzwolonych reguł: dict z rule_id, ticker, rule, threshold, price, value
+        """
+        n = self._size
+        if n == 0:
+            return []
+        now = time.time() if now is None else now
+        vec = prices if isinstance(prices, np.ndarray) else self.price_vector(prices)
+
+        tidx = self._ticker_idx[:n]
+        rtype = self._type[:n]
+        threshold = self._threshold[:n]
+        reference = self._reference[:n]
+        price = vec[tidx]
+        forecast = self._forecasts[tidx]
+
+        # Referencja PCT_MOVE: pierwsza zaobserwowana cena
+        init_ref = (rtype == self.PCT_MOVE) & np.isnan(reference) & ~np.isnan(price)
+        reference[init_ref] = price[init_ref]
+
+        # "value" – wartość porównywana z progiem; "excess" > 0 oznacza przekroczenie
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pct_move = np.abs(price / reference - 1.0) * 100.0
+            fc_gap = (forecast / price - 1.0) * 100.0
+        value = np.select(
+            [rtype == self.CROSS_ABOVE, rtype == self.CROSS_BELOW, rtype == self.PCT_MOVE,
+             rtype == self.FORECAST_ABOVE],
+            [price, price, pct_move, fc_gap],
+            default=-fc_gap,
+        )
+        excess = np.where(rtype == self.CROSS_BELOW, threshold - value, value - threshold)
+
+        valid = self._active[:n] & ~np.isnan(excess)
+        armed = self._armed[:n]
+
+        # Histereza: ponowne uzbrojenie po powrocie za próg o szerokość pasma
+        armed[valid & ~armed & (excess < -self._band[:n])] = True
+
+        fire = valid & armed & (excess > 0) & (now - self._last_fired[:n] >= self.cooldown_seconds)
+        fired_ids = np.flatnonzero(fire)
+        if fired_ids.size == 0:
+            return []
+
+        armed[fired_ids] = False
+        self._last_fired[fired_ids] = now
+        pct_fired = fired_ids[rtype[fired_ids] == self.PCT_MOVE]
+        reference[pct_fired] = price[pct_fired]
+
+        return [
+            {
+                "rule_id": int(i),
+                "ticker": self.tickers[tidx[i]],
+                "rule": self.RULE_NAMES[int(rtype[i])],
+                "threshold": float(threshold[i]),
+                "price": float(price[i]),
+                "value": float(value[i]),
+            }
+            for i in fired_ids
+        ]
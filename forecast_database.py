@@ -6,10 +6,23 @@ Przechowuje historię wszystkich prognoz w SQLite.
 """
 
 import sqlite3
+import csv
+import json
+import uuid
 import pandas as pd
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 import os
 
+# Parquet (opcjonalnie) – archiwum starych prognoz
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.dataset as pds
+    PARQUET_AVAILABLE = True
+except ImportError:
+    pa = pq = pds = None
+    PARQUET_AVAILABLE = False
+
 
 class ForecastDatabase:
     """Zarządzanie bazą danych prognoz SQLite."""
@@ -25,6 +38,9 @@ class ForecastDatabase:
         self.conn = sqlite3.connect(self.db_path)
         cursor = self.conn.cursor()
         
+        # Nowe bazy od razu w trybie INCREMENTAL (istniejące konwertuje compact())
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        
         # Tabela prognoz
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS forecasts (
@@ -80,6 +96,22 @@ class ForecastDatabase:
             )
         ''')
         
+        # Tabela progów alertów dla prognoz (per ticker)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS alert_thresholds (
+                ticker TEXT PRIMARY KEY,
+                above_price REAL,
+                below_price REAL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        # Indeksy dla zbiorczego sprawdzania alertów
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_forecasts_created_at ON forecasts(created_at)")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_forecast_details_forecast ON forecast_details(forecast_id, day_offset)"
+        )
+        
         self.conn.commit()
     
     def add_forecast(self, ticker, days_ahead, forecast_prices, lower_bounds=None, upper_bounds=None,
@@ -227,12 +259,274 @@ class ForecastDatabase:
         df = pd.read_sql_query(query, self.conn, params=(ticker, ticker, days))
         return df
     
-    def export_to_csv(self, ticker, output_path):
-        """Eksportuj historię prognoz do CSV."""
-        df = self.get_forecast_history(ticker, limit=1000)
-        df.to_csv(output_path, index=False)
-        print(f"📄 Historia prognoz eksportowana do: {output_path}")
+    def set_alert_threshold(self, ticker, above_price=None, below_price=None):
+        """
+        Ustaw progi alertu dla prognoz tickera (nadpisuje poprzednie).
+        
+        Args:
+            ticker: symbol akcji
+            above_price: alert gdy prognoza ostatniego dnia będzie powyżej
+            below_price: alert gdy prognoza ostatniego dnia będzie poniżej
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            INSERT INTO alert_thresholds (ticker, above_price, below_price, updated_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(ticker) DO UPDATE SET
+                above_price = excluded.above_price,
+                below_price = excluded.below_price,
+                updated_at = excluded.updated_at
+        ''', (ticker, above_price, below_price))
+        self.conn.commit()
     
+    def remove_alert_threshold(self, ticker):
+        """Usuń progi alertu tickera."""
+        self.conn.execute("DELETE FROM alert_thresholds WHERE ticker = ?", (ticker,))
+        self.conn.commit()
+    
+    def get_alert_thresholds(self):
+        """Pobierz wszystkie progi alertów."""
+        return pd.read_sql_query(
+            "SELECT ticker, above_price, below_price, updated_at FROM alert_thresholds ORDER BY ticker",
+            self.conn
+        )
+    
+    def get_last_forecast_id(self):
+        """ID najnowszej prognozy (0 gdy baza jest pusta)."""
+        return self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM forecasts").fetchone()[0]
+    
+    def get_triggered_forecast_alerts(self, since_id=0, since=None, until_id=None):
+        """
+        Jednym zapytaniem znajdź świeże prognozy, których ostatni dzień
+        przekracza progi z tabeli alert_thresholds.
+        
+        Args:
+            since_id: tylko prognozy o ID większym niż since_id
+            until_id: tylko prognozy o ID nie większym niż until_id (None = bez górnej granicy)
+            since: tylko prognozy utworzone od tej chwili (datetime lub "YYYY-MM-DD HH:MM:SS", UTC)
+        
+        Returns:
+            DataFrame: forecast_id, ticker, created_at, day_offset, predicted_price, direction, threshold
+        """
+        query = '''
+            SELECT
+                f.id AS forecast_id,
+                f.ticker,
+                f.created_at,
+                d.day_offset,
+                d.predicted_price,
+                CASE WHEN t.above_price IS NOT NULL AND d.predicted_price > t.above_price
+                     THEN 'above' ELSE 'below' END AS direction,
+                CASE WHEN t.above_price IS NOT NULL AND d.predicted_price > t.above_price
+                     THEN t.above_price ELSE t.below_price END AS threshold
+            FROM forecasts f
+            JOIN alert_thresholds t ON t.ticker = f.ticker
+            JOIN forecast_details d ON d.forecast_id = f.id
+             AND d.day_offset = (SELECT MAX(day_offset) FROM forecast_details WHERE forecast_id = f.id)
+            WHERE f.id > ?
+              AND (? IS NULL OR f.id <= ?)
+              AND f.created_at >= ?
+              AND ((t.above_price IS NOT NULL AND d.predicted_price > t.above_price)
+                OR (t.below_price IS NOT NULL AND d.predicted_price < t.below_price))
+            ORDER BY f.ticker, f.id
+        '''
+        if since is None:
+            since = ""
+        elif isinstance(since, datetime):
+            since = since.strftime("%Y-%m-%d %H:%M:%S")
+        return pd.read_sql_query(query, self.conn, params=(since_id, until_id, until_id, since))
+    
+    def export_to_csv(self, ticker, output_path):
+        """Eksportuj historię prognoz (nagłówki + szczegóły) do CSV."""
+        self.export_forecasts(output_path, tickers=[ticker], file_format="csv")
+
+    def export_forecasts(self, output_path, tickers=None, start_date=None, end_date=None,
+                         file_format=None, chunk_size=5000):
+        """
+        Strumieniowy eksport prognoz połączonych ze szczegółami.
+
+        Wiersze są czytane kursorem porcjami po chunk_size i od razu dopisywane
+        do pliku, więc zużycie pamięci nie zależy od rozmiaru historii.
+
+        Args:
+            output_path: ścieżka pliku wynikowego
+            tickers: lista tickerów (None = wszystkie)
+            start_date, end_date: zakres forecast_date (YYYY-MM-DD), opcjonalnie
+            file_format: 'csv' albo 'parquet' (domyślnie według rozszerzenia pliku)
+            chunk_size: liczba wierszy w jednej porcji
+
+        Returns:
+            liczba wyeksportowanych wierszy
+        """
+        if file_format is None:
+            file_format = "parquet" if output_path.lower().endswith(".parquet") else "csv"
+        if file_format == "parquet" and not PARQUET_AVAILABLE:
+            print("⚠️ PyArrow nie jest zainstalowany. Aby eksportować do Parquet, uruchom: pip install pyarrow")
+            return 0
+
+        query = '''
+            SELECT f.id AS forecast_id, f.ticker, f.forecast_date, f.days_ahead, f.model_type,
+                   f.lookback, f.horizon, f.created_at,
+                   d.day_offset, d.predicted_price, d.lower_bound, d.upper_bound
+            FROM forecasts f
+            LEFT JOIN forecast_details d ON d.forecast_id = f.id
+            WHERE 1 = 1
+        '''
+        params = []
+        if tickers:
+            query += f" AND f.ticker IN ({','.join('?' * len(tickers))})"
+            params.extend(tickers)
+        if start_date:
+            query += " AND f.forecast_date >= ?"
+            params.append(str(start_date))
+        if end_date:
+            query += " AND f.forecast_date <= ?"
+            params.append(str(end_date))
+        query += " ORDER BY f.id, d.day_offset"
+
+        cursor = self.conn.cursor()
+        cursor.execute(query, params)
+        columns = [c[0] for c in cursor.description]
+        total = 0
+
+        if file_format == "parquet":
+            schema = pa.unify_schemas([pa.schema([("ticker", pa.string())]), _forecast_archive_schema()])
+            schema = pa.schema([schema.field(name) for name in columns])
+            with pq.ParquetWriter(output_path, schema, compression="zstd") as writer:
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    batch = pa.RecordBatch.from_pydict(dict(zip(columns, map(list, zip(*rows)))), schema=schema)
+                    writer.write_batch(batch)
+                    total += len(rows)
+        else:
+            with open(output_path, "w", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    writer.writerows(rows)
+                    total += len(rows)
+
+        cursor.close()
+        print(f"📄 Historia prognoz eksportowana do: {output_path} ({total} wierszy)")
+        return total
+
+    def archive_forecasts(self, older_than_days, archive_dir, compression="zstd", chunk_size=50000):
+        """
+        Przenieś prognozy starsze niż N dni do archiwum Parquet i usuń je z SQLite.
+
+        Partycje: <archive_dir>/forecasts/ticker=XXX/month=YYYY-MM/part-*.parquet
+
+        Args:
+            older_than_days: wiek (w dniach), powyżej którego prognozy są archiwizowane
+            archive_dir: katalog główny archiwum
+            compression: kodek Parquet (zstd, snappy, gzip)
+            chunk_size: liczba wierszy czytanych z bazy naraz
+
+        Returns:
+            liczba zarchiwizowanych prognoz (nagłówków)
+        """
+        if not PARQUET_AVAILABLE:
+            print("⚠️ PyArrow nie jest zainstalowany. Aby archiwizować prognozy, uruchom: pip install pyarrow")
+            return 0
+
+        cutoff = (date.today() - timedelta(days=older_than_days)).isoformat()
+        query = '''
+            SELECT f.id AS forecast_id, f.ticker, f.forecast_date, f.days_ahead, f.model_type,
+                   f.lookback, f.horizon, f.created_at,
+                   d.day_offset, d.predicted_price, d.lower_bound, d.upper_bound
+            FROM forecasts f
+            LEFT JOIN forecast_details d ON d.forecast_id = f.id
+            WHERE f.forecast_date < ?
+            ORDER BY f.id, d.day_offset
+        '''
+        root = os.path.join(archive_dir, "forecasts")
+        archived_ids = set()
+        for chunk in pd.read_sql_query(query, self.conn, params=(cutoff,), chunksize=chunk_size):
+            _write_partitioned_parquet(chunk, root, "forecast_date", _forecast_archive_schema(), compression)
+            archived_ids.update(chunk["forecast_id"].unique().tolist())
+
+        if not archived_ids:
+            return 0
+
+        # Usuwamy dopiero po zapisaniu wszystkich partycji
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            DELETE FROM forecast_details
+            WHERE forecast_id IN (SELECT id FROM forecasts WHERE forecast_date < ?)
+        ''', (cutoff,))
+        cursor.execute('DELETE FROM forecasts WHERE forecast_date < ?', (cutoff,))
+        self.conn.commit()
+
+        print(f"🗄️ Zarchiwizowano {len(archived_ids)} prognoz starszych niż {cutoff} do: {root}")
+        return len(archived_ids)
+
+    def archive_backtest_results(self, older_than_days, archive_dir, compression="zstd", chunk_size=50000):
+        """
+        Przenieś wyniki backtestów starsze niż N dni do archiwum Parquet.
+
+        Partycje: <archive_dir>/backtest_results/ticker=XXX/month=YYYY-MM/part-*.parquet
+
+        Returns:
+            liczba zarchiwizowanych wierszy
+        """
+        if not PARQUET_AVAILABLE:
+            print("⚠️ PyArrow nie jest zainstalowany. Aby archiwizować backtesty, uruchom: pip install pyarrow")
+            return 0
+
+        cutoff = (date.today() - timedelta(days=older_than_days)).isoformat()
+        query = '''
+            SELECT id, ticker, forecast_date, actual_price, predicted_price, error, abs_pct_error, created_at
+            FROM backtest_results
+            WHERE forecast_date < ?
+            ORDER BY id
+        '''
+        root = os.path.join(archive_dir, "backtest_results")
+        archived = 0
+        for chunk in pd.read_sql_query(query, self.conn, params=(cutoff,), chunksize=chunk_size):
+            _write_partitioned_parquet(chunk, root, "forecast_date", _backtest_archive_schema(), compression)
+            archived += len(chunk)
+
+        if archived:
+            self.conn.execute('DELETE FROM backtest_results WHERE forecast_date < ?', (cutoff,))
+            self.conn.commit()
+            print(f"🗄️ Zarchiwizowano {archived} wyników backtestu starszych niż {cutoff} do: {root}")
+        return archived
+
+    def compact(self, max_pages=None):
+        """
+        Zwolnij nieużywane strony pliku bazy (incremental VACUUM).
+
+        Bazy utworzone przed włączeniem auto_vacuum są jednorazowo konwertowane
+        pełnym VACUUM, kolejne wywołania są już przyrostowe.
+
+        Args:
+            max_pages: maksymalna liczba stron do zwolnienia (None = wszystkie wolne)
+
+        Returns:
+            liczba zwolnionych bajtów
+        """
+        cursor = self.conn.cursor()
+        page_size = cursor.execute("PRAGMA page_size").fetchone()[0]
+        pages_before = cursor.execute("PRAGMA page_count").fetchone()[0]
+
+        self.conn.commit()
+        if cursor.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            cursor.execute("VACUUM")
+        elif max_pages:
+            cursor.execute(f"PRAGMA incremental_vacuum({int(max_pages)})").fetchall()
+        else:
+            cursor.execute("PRAGMA incremental_vacuum").fetchall()
+        self.conn.commit()
+
+        pages_after = cursor.execute("PRAGMA page_count").fetchone()[0]
+        return max(0, pages_before - pages_after) * page_size
+
     def close(self):
         """Zamknij połączenie z bazą danych."""
         if self.conn:
@@ -245,14 +539,306 @@ class ForecastDatabase:
         self.close()
 
 
+# =============== ARCHIWUM PARQUET ===============
+def _forecast_archive_schema():
+    """Schemat plików archiwum prognoz (bez kolumn partycji)."""
+    return pa.schema([
+        ("forecast_id", pa.int64()),
+        ("forecast_date", pa.string()),
+        ("days_ahead", pa.int64()),
+        ("model_type", pa.string()),
+        ("lookback", pa.int64()),
+        ("horizon", pa.int64()),
+        ("created_at", pa.string()),
+        ("day_offset", pa.int64()),
+        ("predicted_price", pa.float64()),
+        ("lower_bound", pa.float64()),
+        ("upper_bound", pa.float64()),
+    ])
+
+
+def _backtest_archive_schema():
+    """Schemat plików archiwum backtestów (bez kolumn partycji)."""
+    return pa.schema([
+        ("id", pa.int64()),
+        ("forecast_date", pa.string()),
+        ("actual_price", pa.float64()),
+        ("predicted_price", pa.float64()),
+        ("error", pa.float64()),
+        ("abs_pct_error", pa.float64()),
+        ("created_at", pa.string()),
+    ])
+
+
+def _archive_partitioning():
+    """Partycjonowanie w stylu Hive: ticker=XXX/month=YYYY-MM."""
+    return pds.partitioning(pa.schema([("ticker", pa.string()), ("month", pa.string())]), flavor="hive")
+
+
+def _write_partitioned_parquet(df, root, date_column, schema, compression="zstd"):
+    """Zapisz DataFrame jako osobne pliki Parquet dla każdej pary (ticker, miesiąc)."""
+    if df.empty:
+        return
+    df = df.copy()
+    df[date_column] = df[date_column].astype(str)
+    df["month"] = df[date_column].str.slice(0, 7)
+
+    for (ticker, month), group in df.groupby(["ticker", "month"], sort=False):
+        part_dir = os.path.join(root, f"ticker={ticker}", f"month={month}")
+        os.makedirs(part_dir, exist_ok=True)
+        table = pa.Table.from_pandas(
+            group.drop(columns=["ticker", "month"]), schema=schema, preserve_index=False
+        )
+        pq.write_table(table, os.path.join(part_dir, f"part-{uuid.uuid4().hex}.parquet"),
+                       compression=compression)
+
+
+def _read_partitioned_parquet(root, schema, ticker=None, start_date=None, end_date=None,
+                              date_column="forecast_date", columns=None):
+    """
+    Wczytaj archiwum Parquet z odcięciem partycji po tickerze i filtrem dat.
+
+    Args:
+        ticker: symbol albo lista symboli (None = wszystkie)
+        columns: lista kolumn do wczytania (None = wszystkie)
+    """
+    if not PARQUET_AVAILABLE or not os.path.isdir(root):
+        return pd.DataFrame()
+
+    full_schema = pa.unify_schemas([schema, _archive_partitioning().schema])
+    dataset = pds.dataset(root, format="parquet", partitioning=_archive_partitioning(), schema=full_schema)
+
+    expr = None
+    conditions = []
+    if isinstance(ticker, str):
+        conditions.append(pds.field("ticker") == ticker)
+    elif ticker:
+        conditions.append(pds.field("ticker").isin(list(ticker)))
+    if start_date:
+        conditions.append(pds.field(date_column) >= str(start_date))
+    if end_date:
+        conditions.append(pds.field(date_column) <= str(end_date))
+    for cond in conditions:
+        expr = cond if expr is None else expr & cond
+
+    df = dataset.to_table(columns=columns, filter=expr).to_pandas()
+    return df.drop(columns=["month"], errors="ignore")
+
+
+class ForecastColumnStore:
+    """
+    Kolumnowa kopia bazy prognoz (zbiór Parquet) do szybkich analiz
+    obejmujących wiele tickerów i wiele lat.
+
+    Układ katalogów jest taki sam jak archiwum RetentionPolicy, więc ten sam
+    katalog może pełnić obie role (duplikaty są usuwane przy odczycie).
+    """
+
+    STATE_FILE = "_sync_state.json"
+
+    def __init__(self, store_dir="forecast_store", compression="zstd"):
+        """
+        Args:
+            store_dir: katalog zbioru Parquet
+            compression: kodek Parquet
+        """
+        self.store_dir = store_dir
+        self.compression = compression
+
+    def _load_state(self):
+        path = os.path.join(self.store_dir, self.STATE_FILE)
+        if not os.path.exists(path):
+            return {"forecasts": 0, "backtest_results": 0}
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _save_state(self, state):
+        os.makedirs(self.store_dir, exist_ok=True)
+        path = os.path.join(self.store_dir, self.STATE_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+
+    def sync(self, db, chunk_size=50000):
+        """
+        Dopisz do zbioru wiersze dodane do bazy od ostatniej synchronizacji.
+
+        Args:
+            db: instancja ForecastDatabase
+            chunk_size: liczba wierszy czytanych z bazy naraz
+
+        Returns:
+            dict z liczbą nowych prognoz i wyników backtestu
+        """
+        if not PARQUET_AVAILABLE:
+            print("⚠️ PyArrow nie jest zainstalowany. Aby używać magazynu kolumnowego, uruchom: pip install pyarrow")
+            return {"forecasts": 0, "backtest_results": 0}
+
+        state = self._load_state()
+        synced = {"forecasts": 0, "backtest_results": 0}
+
+        forecast_query = '''
+            SELECT f.id AS forecast_id, f.ticker, f.forecast_date, f.days_ahead, f.model_type,
+                   f.lookback, f.horizon, f.created_at,
+                   d.day_offset, d.predicted_price, d.lower_bound, d.upper_bound
+            FROM forecasts f
+            LEFT JOIN forecast_details d ON d.forecast_id = f.id
+            WHERE f.id > ?
+            ORDER BY f.id, d.day_offset
+        '''
+        for chunk in pd.read_sql_query(forecast_query, db.conn, params=(state["forecasts"],),
+                                       chunksize=chunk_size):
+            if chunk.empty:
+                continue
+            _write_partitioned_parquet(chunk, os.path.join(self.store_dir, "forecasts"), "forecast_date",
+                                       _forecast_archive_schema(), self.compression)
+            synced["forecasts"] += chunk["forecast_id"].nunique()
+            state["forecasts"] = int(chunk["forecast_id"].max())
+
+        backtest_query = '''
+            SELECT id, ticker, forecast_date, actual_price, predicted_price, error, abs_pct_error, created_at
+            FROM backtest_results
+            WHERE id > ?
+            ORDER BY id
+        '''
+        for chunk in pd.read_sql_query(backtest_query, db.conn, params=(state["backtest_results"],),
+                                       chunksize=chunk_size):
+            if chunk.empty:
+                continue
+            _write_partitioned_parquet(chunk, os.path.join(self.store_dir, "backtest_results"), "forecast_date",
+                                       _backtest_archive_schema(), self.compression)
+            synced["backtest_results"] += len(chunk)
+            state["backtest_results"] = int(chunk["id"].max())
+
+        self._save_state(state)
+        return synced
+
+    def forecasts(self, tickers=None, start_date=None, end_date=None, columns=None):
+        """Prognozy (nagłówek + szczegóły) jako DataFrame."""
+        df = _read_partitioned_parquet(os.path.join(self.store_dir, "forecasts"), _forecast_archive_schema(),
+                                       tickers, start_date, end_date, columns=columns)
+        if df.empty or not {"forecast_id", "day_offset"}.issubset(df.columns):
+            return df
+        return df.drop_duplicates(subset=["forecast_id", "day_offset"])
+
+    def backtests(self, tickers=None, start_date=None, end_date=None, columns=None):
+        """Wyniki backtestów jako DataFrame."""
+        df = _read_partitioned_parquet(os.path.join(self.store_dir, "backtest_results"),
+                                       _backtest_archive_schema(), tickers, start_date, end_date,
+                                       columns=columns)
+        if df.empty or "id" not in df.columns:
+            return df
+        return df.drop_duplicates(subset=["id"])
+
+
+class RetentionPolicy:
+    """
+    Polityka retencji bazy prognoz:
+    - archiwizacja starych prognoz i backtestów do Parquet (ticker / miesiąc)
+    - usunięcie ich z SQLite
+    - incremental VACUUM
+    """
+
+    def __init__(self, max_age_days=365, archive_dir="forecast_archive", backtest_max_age_days=None,
+                 compression="zstd", vacuum_pages=None):
+        """
+        Args:
+            max_age_days: wiek prognoz (w dniach), po którym trafiają do archiwum
+            archive_dir: katalog archiwum Parquet
+            backtest_max_age_days: wiek wyników backtestu (domyślnie jak max_age_days)
+            compression: kodek Parquet
+            vacuum_pages: limit stron zwalnianych przez jedno wywołanie VACUUM (None = wszystkie)
+        """
+        self.max_age_days = max_age_days
+        self.archive_dir = archive_dir
+        self.backtest_max_age_days = backtest_max_age_days or max_age_days
+        self.compression = compression
+        self.vacuum_pages = vacuum_pages
+
+    def apply(self, db):
+        """
+        Zastosuj politykę do otwartej bazy.
+
+        Args:
+            db: instancja ForecastDatabase
+
+        Returns:
+            dict z liczbą zarchiwizowanych wierszy i zwolnionych bajtów
+        """
+        forecasts = db.archive_forecasts(self.max_age_days, self.archive_dir, self.compression)
+        backtests = db.archive_backtest_results(self.backtest_max_age_days, self.archive_dir, self.compression)
+        freed = db.compact(self.vacuum_pages) if (forecasts or backtests) else 0
+
+        return {
+            "archived_forecasts": forecasts,
+            "archived_backtest_results": backtests,
+            "freed_bytes": freed,
+        }
+
+
 class ForecastAnalyzer:
     """Analiza prognoz z bazy danych."""
-    
-    def __init__(self, db_path="forecast_history.db"):
+
+    def __init__(self, db_path="forecast_history.db", archive_dir=None, column_store=None):
+        """
+        Args:
+            db_path: ścieżka do bazy SQLite
+            archive_dir: katalog archiwum Parquet (RetentionPolicy), opcjonalnie
+            column_store: ForecastColumnStore – jeśli podany, analizy liczone są na nim
+        """
         self.db = ForecastDatabase(db_path)
-    
+        self.archive_dir = archive_dir
+        self.column_store = column_store
+
+    def get_archived_forecasts(self, ticker=None, start_date=None, end_date=None):
+        """Pobierz zarchiwizowane prognozy (nagłówek + szczegóły) z archiwum Parquet."""
+        if not self.archive_dir:
+            return pd.DataFrame()
+        root = os.path.join(self.archive_dir, "forecasts")
+        df = _read_partitioned_parquet(root, _forecast_archive_schema(), ticker, start_date, end_date)
+        if df.empty:
+            return df
+        return df.drop_duplicates(subset=["forecast_id", "day_offset"]).sort_values(["forecast_id", "day_offset"])
+
+    def get_archived_backtests(self, ticker=None, start_date=None, end_date=None):
+        """Pobierz zarchiwizowane wyniki backtestów z archiwum Parquet."""
+        if not self.archive_dir:
+            return pd.DataFrame()
+        root = os.path.join(self.archive_dir, "backtest_results")
+        df = _read_partitioned_parquet(root, _backtest_archive_schema(), ticker, start_date, end_date)
+        if df.empty:
+            return df
+        return df.drop_duplicates(subset=["id"]).sort_values("id")
+
+    def get_full_forecast_history(self, ticker):
+        """Historia prognoz tickera: baza SQLite + archiwum Parquet."""
+        live = self.db.get_forecast_history(ticker, limit=-1)
+        archived = self.get_archived_forecasts(ticker)
+        if archived.empty:
+            return live
+
+        headers = (archived
+                   .drop_duplicates(subset=["forecast_id"])
+                   .rename(columns={"forecast_id": "id"})
+                   [["id", "ticker", "forecast_date", "days_ahead", "model_type", "created_at"]])
+        df = pd.concat([live, headers], ignore_index=True)
+        return df.sort_values("created_at", ascending=False).reset_index(drop=True)
+
     def get_forecast_accuracy_by_days(self, ticker):
         """Analiza dokładności w zależności od liczby dni do przodu."""
+        if self.column_store is not None:
+            headers = self.column_store.forecasts(ticker, columns=["forecast_id", "days_ahead"])
+            headers = headers.drop_duplicates(subset=["forecast_id"]) if not headers.empty else headers
+            if headers.empty:
+                return pd.DataFrame(columns=["days_ahead", "count", "avg_error"])
+            errors = self.column_store.backtests(ticker, columns=["id", "abs_pct_error"])
+            # Ta sama semantyka co zapytanie SQL (LEFT JOIN po tickerze)
+            df = headers.groupby("days_ahead").size().rename("count").reset_index()
+            df["count"] = df["count"] * max(len(errors), 1)
+            df["avg_error"] = round(errors["abs_pct_error"].mean(), 2) if not errors.empty else None
+            return df.sort_values("days_ahead").reset_index(drop=True)
+
         query = '''
             SELECT 
                 f.days_ahead,
@@ -287,6 +873,18 @@ class ForecastAnalyzer:
     
     def get_recent_forecast_summary(self, ticker, days=7):
         """Podsumowanie ostatnich prognoz."""
+        if self.column_store is not None:
+            start = (date.today() - timedelta(days=days)).isoformat()
+            df = self.column_store.forecasts(ticker, start_date=start,
+                                             columns=["forecast_id", "forecast_date", "days_ahead"])
+            if df.empty:
+                return pd.DataFrame(columns=["date", "num_forecasts", "avg_days_ahead"])
+            df = df.drop_duplicates(subset=["forecast_id"]).rename(columns={"forecast_date": "date"})
+            summary = df.groupby("date").agg(num_forecasts=("forecast_id", "size"),
+                                             avg_days_ahead=("days_ahead", "mean"))
+            summary["avg_days_ahead"] = summary["avg_days_ahead"].round(1)
+            return summary.reset_index().sort_values("date", ascending=False).reset_index(drop=True)
+
         query = '''
             SELECT 
                 DATE(forecast_date) as date,
@@ -299,6 +897,47 @@ class ForecastAnalyzer:
         '''
         df = pd.read_sql_query(query, self.db.conn, params=(ticker, days))
         return df
+
+    def get_accuracy_study(self, tickers=None, start_date=None, end_date=None):
+        """
+        Dokładność backtestów w podziale na ticker i rok (wiele tickerów, wiele lat).
+
+        Args:
+            tickers: lista tickerów (None = wszystkie)
+            start_date, end_date: zakres dat (YYYY-MM-DD), opcjonalnie
+
+        Returns:
+            DataFrame: ticker, year, tests, avg_error, median_error, worst_error
+        """
+        columns = ["ticker", "forecast_date", "abs_pct_error"]
+        if self.column_store is not None:
+            df = self.column_store.backtests(tickers, start_date, end_date)
+        else:
+            query = "SELECT id, ticker, forecast_date, abs_pct_error FROM backtest_results WHERE 1 = 1"
+            params = []
+            if tickers:
+                query += f" AND ticker IN ({','.join('?' * len(tickers))})"
+                params.extend(tickers)
+            if start_date:
+                query += " AND forecast_date >= ?"
+                params.append(str(start_date))
+            if end_date:
+                query += " AND forecast_date <= ?"
+                params.append(str(end_date))
+            df = pd.read_sql_query(query, self.db.conn, params=params)
+            archived = self.get_archived_backtests(tickers, start_date, end_date)
+            if not archived.empty:
+                df = pd.concat([df, archived[["id"] + columns]], ignore_index=True)
+
+        if df.empty:
+            return pd.DataFrame(columns=["ticker", "year", "tests", "avg_error", "median_error", "worst_error"])
+
+        df = df[columns].copy()
+        df["year"] = df["forecast_date"].astype(str).str.slice(0, 4)
+        study = df.groupby(["ticker", "year"])["abs_pct_error"].agg(
+            tests="size", avg_error="mean", median_error="median", worst_error="max"
+        )
+        return study.round(2).reset_index().sort_values(["ticker", "year"]).reset_index(drop=True)
     
     def close(self):
         self.db.close()
@@ -0,0 +1,298 @@
+# forecast_runtime.py
+
+"""
+Moduł z runtime opartym o asyncio:
+- Zaplanowane prognozy, sprawdzanie alertów i powiadomienia jako korutyny
+- Jedna pętla zdarzeń zamiast osobnego wątku na każdy mechanizm
+- Blokująca praca (Keras, yfinance, SMTP) w ograniczonej puli wątków
+"""
+
+import asyncio
+import functools
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from forecast_scheduler import ForecastScheduler
+
+
+class AsyncForecastRuntime:
+    """
+    Runtime asyncio dla prognoz, alertów i powiadomień.
+
+    Każdy timer to korutyna (asyncio.sleep), więc tysiące zadań kosztują
+    tylko pamięć, a liczba wątków jest stała: wątek pętli + pula executora.
+    """
+
+    def __init__(self, max_workers=8, fetch_concurrency=8, inference_concurrency=2, ticker_timeout=None):
+        """
+        Args:
+            max_workers: rozmiar puli wątków dla blokującej pracy
+            fetch_concurrency: limit równoczesnych pobrań danych (sieć)
+            inference_concurrency: limit równoczesnych predykcji (CPU)
+            ticker_timeout: limit czasu na jeden ticker w sekundach (None = bez limitu)
+        """
+        self.max_workers = max_workers
+        self.fetch_concurrency = fetch_concurrency
+        self.inference_concurrency = inference_concurrency
+        self.ticker_timeout = ticker_timeout
+        self.jobs = []
+        self.batch_hooks = []  # funkcje (job, results) wywoływane po każdej partii
+        self.is_running = False
+
+        self.loop = None
+        self.executor = None
+        self._thread = None
+        self._stop_event = None
+        self._tasks = set()
+        self._pending = []  # fabryki korutyn dodane przed startem
+        self._job_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._start_error = None
+
+    # ========= START / STOP =========
+    def start(self):
+        """Uruchom pętlę zdarzeń w osobnym wątku."""
+        if self.is_running:
+            print("⚠️ Runtime już jest uruchomiony.")
+            return
+
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._thread_main, args=(ready,), daemon=True)
+        self._thread.start()
+        ready.wait()
+        if self._start_error is not None:
+            error, self._start_error = self._start_error, None
+            self._thread = None
+            raise error
+        print("✅ Runtime asyncio uruchomiony.")
+
+    def run_forever(self):
+        """Uruchom pętlę zdarzeń w bieżącym wątku (blokuje do stop())."""
+        asyncio.run(self._main(None))
+
+    def _thread_main(self, ready):
+        try:
+            asyncio.run(self._main(ready))
+        except BaseException as e:
+            if ready.is_set():
+                raise
+            self._start_error = e  # błąd przed gotowością – start() zgłosi go w swoim wątku
+        finally:
+            ready.set()
+
+    async def _main(self, ready):
+        self.loop = asyncio.get_running_loop()
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="runtime")
+        try:
+            self._stop_event = asyncio.Event()
+            self._fetch_sem = asyncio.Semaphore(self.fetch_concurrency)
+            self._infer_sem = asyncio.Semaphore(self.inference_concurrency)
+
+            with self._lock:
+                self.is_running = True
+                pending, self._pending = self._pending, []
+            for factory in pending:
+                self._spawn(factory)
+            if ready is not None:
+                ready.set()
+
+            await self._stop_event.wait()
+        finally:
+            for task in list(self._tasks):
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.is_running = False
+
+    def stop(self):
+        """Zatrzymaj wszystkie timery i pętlę zdarzeń."""
+        if not self.is_running or self.loop is None:
+            return
+        self.loop.call_soon_threadsafe(self._stop_event.set)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        print("⏹️  Runtime zatrzymany.")
+
+    def _spawn(self, factory):
+        """Utwórz zadanie asyncio z fabryki korutyny (wywoływać w wątku pętli)."""
+        task = self.loop.create_task(factory())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def _submit(self, factory):
+        """Dodaj korutynę: od razu, jeśli pętla działa, albo przy starcie."""
+        with self._lock:
+            if not self.is_running:
+                self._pending.append(factory)
+                return
+        self.loop.call_soon_threadsafe(self._spawn, factory)
+
+    async def run_blocking(self, func, *args, **kwargs):
+        """Wykonaj blokującą funkcję w puli wątków runtime."""
+        return await self.loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    # ========= PROGNOZY =========
+    def add_daily_forecast(self, ticker_list, time_of_day, forecast_func, lookback=60, horizon=5,
+                           fetch_func=None, **kwargs):
+        """
+        Zaplanuj dzienną prognozę (jak ForecastScheduler.schedule_daily_forecast).
+
+        Args:
+            ticker_list: lista tickerów
+            time_of_day: godzina "HH:MM" lub "HH:MM:SS"
+            forecast_func: funkcja prognozy (ticker, lookback, horizon, **kwargs)
+            fetch_func: opcjonalna funkcja pobierania danych (ticker -> data)
+        """
+        job = {'id': next(self._job_ids), 'tickers': list(ticker_list), 'time': time_of_day,
+               'type': 'daily', 'next_run': None, 'last_run': None}
+        self._add_forecast_job(job, forecast_func, lookback, horizon, fetch_func, kwargs)
+        print(f"✅ Zaplanowano dzienną prognozę o {time_of_day} dla: {ticker_list}")
+        return job
+
+    def add_recurring_forecast(self, ticker_list, interval_minutes, forecast_func, lookback=60, horizon=5,
+                               fetch_func=None, **kwargs):
+        """Zaplanuj prognozę co interval_minutes minut."""
+        job = {'id': next(self._job_ids), 'tickers': list(ticker_list), 'interval_minutes': interval_minutes,
+               'type': 'recurring', 'next_run': None, 'last_run': None}
+        self._add_forecast_job(job, forecast_func, lookback, horizon, fetch_func, kwargs)
+        print(f"✅ Zaplanowano periodyczną prognozę co {interval_minutes} minut dla: {ticker_list}")
+        return job
+
+    def _add_forecast_job(self, job, forecast_func, lookback, horizon, fetch_func, kwargs):
+        self.jobs.append(job)
+
+        async def timer():
+            while True:
+                job['next_run'] = ForecastScheduler._next_run_time(job, datetime.now())
+                await asyncio.sleep(max(0.0, job['next_run'].timestamp() - time.time()))
+                job['last_run'] = await self.run_forecast_batch(
+                    job['tickers'], forecast_func, lookback, horizon, fetch_func=fetch_func, **kwargs
+                )
+                for hook in self.batch_hooks:
+                    try:
+                        await self.run_blocking(hook, job, job['last_run'])
+                    except Exception as e:
+                        print(f"⚠️ Błąd w hooku po partii prognoz: {e}")
+
+        self._submit(timer)
+
+    def add_batch_hook(self, hook):
+        """Dodaj funkcję (job, results) wywoływaną po każdej zaplanowanej partii prognoz."""
+        self.batch_hooks.append(hook)
+
+    async def run_forecast_batch(self, ticker_list, forecast_func, lookback=60, horizon=5,
+                                 fetch_func=None, **kwargs):
+        """
+        Prognozy dla listy tickerów jako korutyny.
+
+        Returns:
+            dict {ticker: {'status': 'ok'|'error'|'timeout', 'seconds': float, 'error': str|None}}
+        """
+        batch_start = time.monotonic()
+
+        async def run_one(ticker):
+            call_kwargs = dict(kwargs)
+            if fetch_func is not None:
+                async with self._fetch_sem:
+                    call_kwargs['data'] = await self.run_blocking(fetch_func, ticker)
+                async with self._infer_sem:
+                    return await self.run_blocking(forecast_func, ticker, lookback=lookback,
+                                                   horizon=horizon, **call_kwargs)
+            return await self.run_blocking(forecast_func, ticker, lookback=lookback,
+                                           horizon=horizon, **call_kwargs)
+
+        async def guarded(ticker):
+            start = time.monotonic()
+            try:
+                await asyncio.wait_for(run_one(ticker), timeout=self.ticker_timeout)
+                return ticker, {'status': 'ok', 'seconds': time.monotonic() - start, 'error': None}
+            except asyncio.TimeoutError:
+                print(f"⏱️ Przekroczono limit czasu ({self.ticker_timeout} s) dla {ticker}")
+                return ticker, {'status': 'timeout', 'seconds': time.monotonic() - start,
+                                'error': f"timeout po {self.ticker_timeout} s"}
+            except Exception as e:
+                print(f"❌ Błąd podczas prognozy {ticker}: {e}")
+                return ticker, {'status': 'error', 'seconds': time.monotonic() - start, 'error': str(e)}
+
+        results = dict(await asyncio.gather(*(guarded(t) for t in ticker_list)))
+
+        ok = sum(1 for r in results.values() if r['status'] == 'ok')
+        print(f"✅ Partia prognoz zakończona w {time.monotonic() - batch_start:.1f} s: "
+              f"{ok}/{len(results)} OK")
+        return results
+
+    # ========= ALERTY =========
+    def add_alert_monitor(self, alert_manager, price_check_func=None, notify_func=None,
+                          batch_price_func=None, batch_size=100):
+        """
+        Sprawdzaj alerty AlertManager co alert_manager.check_interval sekund.
+
+        Args:
+            alert_manager: instancja AlertManager (progi i wyzwalanie alertów)
+            price_check_func: funkcja pobierająca cenę (ticker -> price)
+            notify_func: opcjonalna funkcja powiadomienia (ticker, message), np. e-mail
+            batch_price_func: funkcja pobierająca ceny wielu tickerów (lista -> {ticker: price})
+            batch_size: maksymalna liczba tickerów w jednym wywołaniu batch_price_func
+        """
+        async def monitor():
+            while True:
+                cycle_start = time.monotonic()
+                await self.check_alerts(alert_manager, price_check_func, notify_func,
+                                        batch_price_func, batch_size)
+                elapsed = time.monotonic() - cycle_start
+                await asyncio.sleep(max(0.0, alert_manager.check_interval - elapsed))
+
+        self._submit(monitor)
+
+    async def check_alerts(self, alert_manager, price_check_func=None, notify_func=None,
+                           batch_price_func=None, batch_size=100):
+        """
+        Jeden cykl sprawdzania alertów: ceny (lub porcje cen) pobierane równolegle,
+        a reguły oceniane jednym wywołaniem alert_manager.check_prices.
+        """
+        prices = {}
+
+        async def check(ticker):
+            try:
+                async with self._fetch_sem:
+                    prices[ticker] = await self.run_blocking(price_check_func, ticker)
+            except Exception as e:
+                print(f"⚠️ Błąd podczas sprawdzenia {ticker}: {e}")
+
+        async def check_chunk(chunk):
+            try:
+                async with self._fetch_sem:
+                    chunk_prices = await self.run_blocking(batch_price_func, chunk)
+            except Exception as e:
+                print(f"⚠️ Błąd podczas pobierania cen ({len(chunk)} tickerów): {e}")
+                return
+            prices.update((t, p) for t, p in chunk_prices.items() if p is not None)
+
+        tickers = list(alert_manager.alerts)
+        if batch_price_func is None:
+            await asyncio.gather(*(check(t) for t in tickers))
+        else:
+            await asyncio.gather(*(check_chunk(tickers[i:i + batch_size])
+                                   for i in range(0, len(tickers), batch_size)))
+
+        for ticker, msg in alert_manager.check_prices(prices):
+            if notify_func is not None:
+                self.notify(notify_func, ticker, msg)
+
+    # ========= POWIADOMIENIA =========
+    def notify(self, func, *args, **kwargs):
+        """
+        Wyślij powiadomienie w tle (np. NotificationManager.send_email_notification).
+        Bezpieczne do wywołania z dowolnego wątku.
+        """
+        async def send():
+            try:
+                await self.run_blocking(func, *args, **kwargs)
+            except Exception as e:
+                print(f"⚠️ Błąd przy wysyłaniu powiadomienia: {e}")
+
+        self._submit(send)
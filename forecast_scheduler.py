@@ -7,27 +7,379 @@ Moduł do scheduling i automatycznego monitoringu prognoz.
 - Automatyczne alerty cenowe
 """
 
-import schedule
+import hashlib
+import heapq
+import importlib
+import itertools
+import json
+import queue
+import sqlite3
 import time
 import threading
-from datetime import datetime, time as dt_time
-from typing import Callable, Optional
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
 
+from alert_rules import AlertRuleEngine
+from forecast_database import ForecastDatabase
+
+
+def _callable_name(func):
+    """Nazwa funkcji w formacie "moduł:kwalifikowana_nazwa"."""
+    return f"{func.__module__}:{func.__qualname__}"
+
+
+def _resolve_callable(name, registry=None):
+    """Znajdź funkcję po nazwie: najpierw w rejestrze, potem przez import."""
+    registry = registry or {}
+    if name in registry:
+        return registry[name]
+    module_name, _, qualname = name.partition(":")
+    if qualname in registry:
+        return registry[qualname]
+    if "<locals>" in qualname or "<lambda>" in qualname:
+        raise ValueError(f"funkcji lokalnej {name} nie da się zaimportować – podaj ją w func_registry")
+    obj = importlib.import_module(module_name)
+    for part in qualname.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+class SchedulerJobStore:
+    """
+    Trwały magazyn zadań harmonogramu i stanu uruchomień (SQLite).
+    Domyślnie w tej samej bazie co historia prognoz.
+    """
+    
+    def __init__(self, db_path="forecast_history.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.init_database()
+    
+    def init_database(self):
+        """Utwórz tabele jeśli nie istnieją."""
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS scheduler_jobs (
+                    job_key TEXT PRIMARY KEY,
+                    spec TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS scheduler_runs (
+                    run_id TEXT PRIMARY KEY,
+                    job_key TEXT NOT NULL,
+                    scheduled_for TIMESTAMP NOT NULL,
+                    status TEXT NOT NULL,
+                    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    finished_at TIMESTAMP
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS scheduler_run_tickers (
+                    run_id TEXT NOT NULL,
+                    ticker TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    seconds REAL,
+                    error TEXT,
+                    PRIMARY KEY (run_id, ticker)
+                )
+            ''')
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_scheduler_runs_status ON scheduler_runs(status)")
+            self.conn.commit()
+    
+    @staticmethod
+    def make_job_key(spec):
+        """Deterministyczny klucz zadania – ponowna rejestracja nie tworzy duplikatu."""
+        when = spec['time_of_day'] if spec['type'] == 'daily' else f"{spec['interval_minutes']}m"
+        digest = hashlib.sha1(json.dumps(spec, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:10]
+        return f"{spec['type']}@{when}:{digest}"
+    
+    @staticmethod
+    def make_run_id(job_key, scheduled_for):
+        """Idempotentny identyfikator uruchomienia: klucz zadania + termin."""
+        return f"{job_key}#{scheduled_for.strftime('%Y-%m-%dT%H:%M:%S')}"
+    
+    def save_job(self, job_key, spec):
+        """Zapisz (lub nadpisz) definicję zadania."""
+        try:
+            payload = json.dumps(spec)
+        except TypeError as e:
+            print(f"⚠️ Zadanie {job_key} ma argumenty spoza JSON – nie zostanie zapisane: {e}")
+            return False
+        with self._lock:
+            self.conn.execute('''
+                INSERT INTO scheduler_jobs (job_key, spec) VALUES (?, ?)
+                ON CONFLICT(job_key) DO UPDATE SET spec = excluded.spec
+            ''', (job_key, payload))
+            self.conn.commit()
+        return True
+    
+    def delete_job(self, job_key):
+        """Usuń definicję zadania."""
+        with self._lock:
+            self.conn.execute("DELETE FROM scheduler_jobs WHERE job_key = ?", (job_key,))
+            self.conn.commit()
+    
+    def load_jobs(self):
+        """Zwróć listę (job_key, spec) wszystkich zapisanych zadań."""
+        with self._lock:
+            rows = self.conn.execute("SELECT job_key, spec FROM scheduler_jobs ORDER BY created_at").fetchall()
+        return [(key, json.loads(spec)) for key, spec in rows]
+    
+    def begin_run(self, run_id, job_key, scheduled_for):
+        """
+        Zarejestruj uruchomienie (idempotentnie).
+        
+        Returns:
+            status uruchomienia: 'running' (nowe lub wznawiane) albo 'done'
+        """
+        with self._lock:
+            self.conn.execute('''
+                INSERT OR IGNORE INTO scheduler_runs (run_id, job_key, scheduled_for, status)
+                VALUES (?, ?, ?, 'running')
+            ''', (run_id, job_key, scheduled_for.isoformat()))
+            self.conn.commit()
+            row = self.conn.execute("SELECT status FROM scheduler_runs WHERE run_id = ?", (run_id,)).fetchone()
+        return row[0]
+    
+    def record_ticker(self, run_id, ticker, result):
+        """Zapisz wynik jednego tickera w ramach uruchomienia."""
+        with self._lock:
+            self.conn.execute('''
+                INSERT OR REPLACE INTO scheduler_run_tickers (run_id, ticker, status, seconds, error)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (run_id, ticker, result['status'], result.get('seconds'), result.get('error')))
+            self.conn.commit()
+    
+    def finished_tickers(self, run_id, statuses=('ok',)):
+        """
+        Zbiór tickerów, które mają już wynik w danym uruchomieniu.
+        
+        Args:
+            run_id: identyfikator uruchomienia
+            statuses: brane pod uwagę statusy wyników; domyślnie tylko 'ok', więc
+                      tickery z 'error'/'timeout' są przy wznowieniu ponawiane
+                      (None = każdy zapisany wynik)
+        """
+        query = "SELECT ticker FROM scheduler_run_tickers WHERE run_id = ?"
+        params = [run_id]
+        if statuses is not None:
+            query += f" AND status IN ({', '.join('?' * len(statuses))})"
+            params.extend(statuses)
+        with self._lock:
+            rows = self.conn.execute(query, params).fetchall()
+        return {r[0] for r in rows}
+    
+    def finish_run(self, run_id):
+        """Oznacz uruchomienie jako zakończone."""
+        with self._lock:
+            self.conn.execute('''
+                UPDATE scheduler_runs SET status = 'done', finished_at = CURRENT_TIMESTAMP
+                WHERE run_id = ?
+            ''', (run_id,))
+            self.conn.commit()
+    
+    def abandon_orphaned_runs(self):
+        """
+        Oznacz jako 'abandoned' przerwane uruchomienia zadań, których nie ma już
+        w magazynie (usuniętych w międzyczasie) – inaczej wisiałyby jako 'running'.
+        
+        Returns:
+            liczba oznaczonych uruchomień
+        """
+        with self._lock:
+            cursor = self.conn.execute('''
+                UPDATE scheduler_runs SET status = 'abandoned', finished_at = CURRENT_TIMESTAMP
+                WHERE status = 'running'
+                  AND job_key NOT IN (SELECT job_key FROM scheduler_jobs)
+            ''')
+            self.conn.commit()
+        return cursor.rowcount
+    
+    def interrupted_runs(self):
+        """Uruchomienia przerwane w trakcie: lista (run_id, job_key, scheduled_for)."""
+        with self._lock:
+            rows = self.conn.execute('''
+                SELECT run_id, job_key, scheduled_for FROM scheduler_runs
+                WHERE status = 'running'
+                ORDER BY scheduled_for
+            ''').fetchall()
+        return [(run_id, key, datetime.fromisoformat(when)) for run_id, key, when in rows]
+    
+    def close(self):
+        """Zamknij połączenie z bazą danych."""
+        with self._lock:
+            self.conn.close()
+
 
 class ForecastScheduler:
     """Klasa do planowania prognoz."""
     
-    def __init__(self):
+    # Maksymalny jednorazowy sen – zabezpieczenie przed zmianą zegara systemowego
+    MAX_SLEEP_SECONDS = 300
+    
+    def __init__(self, max_workers=8, fetch_concurrency=8, inference_concurrency=2, ticker_timeout=None,
+                 job_store=None):
+        """
+        Args:
+            max_workers: domyślny rozmiar puli wątków jednego zadania
+            fetch_concurrency: limit równoczesnych pobrań danych (sieć)
+            inference_concurrency: limit równoczesnych predykcji (CPU)
+            ticker_timeout: domyślny limit czasu na jeden ticker w sekundach (None = bez limitu)
+            job_store: SchedulerJobStore – trwały zapis zadań i postępu uruchomień (opcjonalnie)
+        """
+        self.job_store = job_store
         self.jobs = []
         self.is_running = False
         self.scheduler_thread = None
+        self._heap = []  # (timestamp, seq, job_id)
+        self._runners = {}  # job_id -> callable
+        self._jobs_by_id = {}
+        self._seq = itertools.count()
+        self._job_ids = itertools.count(1)
+        self._cond = threading.Condition()
+        self.max_workers = max_workers
+        self.fetch_concurrency = fetch_concurrency
+        self.inference_concurrency = inference_concurrency
+        self.ticker_timeout = ticker_timeout
+        self.batch_hooks = []  # funkcje (job, results) wywoływane po każdej partii
+    
+    def add_batch_hook(self, hook):
+        """
+        Dodaj funkcję wywoływaną po zakończeniu każdej partii prognoz,
+        np. ForecastAlertPass sprawdzający progi na świeżych prognozach.
+        
+        Args:
+            hook: funkcja (job, results), results jak w _run_ticker_batch
+        """
+        self.batch_hooks.append(hook)
+    
+    def _run_batch_hooks(self, job, results):
+        for hook in self.batch_hooks:
+            try:
+                hook(job, results)
+            except Exception as e:
+                print(f"⚠️ Błąd w hooku po partii prognoz: {e}")
+    
+    def _run_ticker_batch(self, ticker_list, forecast_func, lookback, horizon, kwargs,
+                          fetch_func=None, max_workers=None, ticker_timeout=None, on_result=None):
+        """
+        Uruchom prognozy dla listy tickerów w ograniczonej puli wątków.
+        
+        Jeśli podano fetch_func, dane pobierane są osobno (limit fetch_concurrency)
+        i przekazywane do forecast_func jako argument `data` (limit inference_concurrency).
+        Bez fetch_func całe forecast_func ogranicza tylko rozmiar puli.
+        Błąd albo przekroczenie czasu jednego tickera nie przerywa pozostałych.
+        on_result(ticker, result) wywoływane jest zaraz po zakończeniu każdego tickera.
+        
+        Limit czasu tickera liczy tylko pracę (od uzyskania miejsca w puli / semafora),
+        bez czekania w kolejce. Cała partia ma okno timeout * liczba "rund" puli –
+        tickery, które do tego czasu nie skończyły (np. bo wszystkie wątki utknęły),
+        dostają status 'timeout'.
+        
+        Returns:
+            dict {ticker: {'status': 'ok'|'error'|'timeout', 'seconds': float, 'error': str|None}}
+        """
+        workers = max(1, min(max_workers or self.max_workers, len(ticker_list) or 1))
+        timeout = ticker_timeout if ticker_timeout is not None else self.ticker_timeout
+        fetch_sem = threading.BoundedSemaphore(self.fetch_concurrency)
+        infer_sem = threading.BoundedSemaphore(self.inference_concurrency)
+        active = {}  # ticker -> początek bieżącego etapu pracy
+        used = {}    # ticker -> czas zakończonych etapów pracy
+        results = {}
+        batch_start = time.monotonic()
+        batch_deadline = None
+        if timeout is not None:
+            slots = workers if fetch_func is None else min(workers, self.fetch_concurrency,
+                                                           self.inference_concurrency)
+            rounds = -(-len(ticker_list) // max(1, slots))
+            batch_deadline = batch_start + timeout * max(1, rounds)
+        
+        def record(ticker, result):
+            results[ticker] = result
+            if on_result is not None:
+                on_result(ticker, result)
+        
+        def elapsed(ticker, now):
+            return used.get(ticker, 0.0) + (now - active[ticker] if ticker in active else 0.0)
+        
+        def timed(ticker, func, *args, **call_kwargs):
+            active[ticker] = time.monotonic()
+            try:
+                return func(*args, **call_kwargs)
+            finally:
+                used[ticker] = used.get(ticker, 0.0) + time.monotonic() - active.pop(ticker)
+        
+        def run_one(ticker):
+            call_kwargs = dict(kwargs)
+            if fetch_func is None:
+                return timed(ticker, forecast_func, ticker, lookback=lookback, horizon=horizon, **call_kwargs)
+            with fetch_sem:
+                call_kwargs['data'] = timed(ticker, fetch_func, ticker)
+            with infer_sem:
+                return timed(ticker, forecast_func, ticker, lookback=lookback, horizon=horizon, **call_kwargs)
+        
+        def expire(future, now, message):
+            ticker = futures[future]
+            pending.discard(future)
+            print(f"⏱️ {message} dla {ticker}")
+            record(ticker, {'status': 'timeout', 'seconds': elapsed(ticker, now), 'error': message})
+        
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="forecast")
+        try:
+            futures = {executor.submit(run_one, ticker): ticker for ticker in ticker_list}
+            pending = set(futures)
+            
+            while pending:
+                wait_for = None
+                if timeout is not None:
+                    now = time.monotonic()
+                    deadlines = [batch_deadline] + [
+                        now + timeout - elapsed(futures[f], now) for f in pending if futures[f] in active
+                    ]
+                    wait_for = max(0.0, min(deadlines) - now)
+                
+                done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    ticker = futures[future]
+                    seconds = elapsed(ticker, time.monotonic())
+                    error = future.exception()
+                    if error is None:
+                        record(ticker, {'status': 'ok', 'seconds': seconds, 'error': None})
+                    else:
+                        print(f"❌ Błąd podczas prognozy {ticker}: {error}")
+                        record(ticker, {'status': 'error', 'seconds': seconds, 'error': str(error)})
+                
+                if timeout is not None:
+                    now = time.monotonic()
+                    for future in list(pending):
+                        # Wątku nie da się przerwać – wynik zostanie zignorowany
+                        if elapsed(futures[future], now) > timeout:
+                            expire(future, now, f"timeout po {timeout} s")
+                        elif now >= batch_deadline:
+                            expire(future, now, f"koniec okna partii ({batch_deadline - batch_start:.0f} s)")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        ok = sum(1 for r in results.values() if r['status'] == 'ok')
+        failed = sum(1 for r in results.values() if r['status'] == 'error')
+        timed_out = sum(1 for r in results.values() if r['status'] == 'timeout')
+        print(f"✅ Partia prognoz zakończona w {time.monotonic() - batch_start:.1f} s: "
+              f"{ok} OK, {failed} błędów, {timed_out} timeout")
+        return results
     
     def schedule_daily_forecast(self, ticker_list, time_of_day, forecast_func, 
-                               lookback=60, horizon=5, **kwargs):
+                               lookback=60, horizon=5, fetch_func=None, max_workers=None,
+                               ticker_timeout=None, job_key=None, **kwargs):
         """
         Zaplanuj dzienną prognozę.
         
@@ -36,26 +388,22 @@ class ForecastScheduler:
             time_of_day: godzina (format "HH:MM", np. "09:30")
             forecast_func: funkcja do generowania prognozy
             lookback, horizon: parametry modelu
+            fetch_func: opcjonalna funkcja pobierania danych (ticker -> data)
+            max_workers: rozmiar puli wątków dla tego zadania
+            ticker_timeout: limit czasu na jeden ticker w sekundach
+            job_key: stały identyfikator zadania w magazynie zadań (domyślnie wyliczany)
             **kwargs: dodatkowe argumenty dla funkcji
         """
-        def run_forecasts():
-            for ticker in ticker_list:
-                try:
-                    forecast_func(ticker, lookback=lookback, horizon=horizon, **kwargs)
-                except Exception as e:
-                    print(f"❌ Błąd podczas prognozy {ticker}: {e}")
-        
-        schedule.every().day.at(time_of_day).do(run_forecasts)
-        self.jobs.append({
-            'tickers': ticker_list,
-            'time': time_of_day,
-            'type': 'daily'
-        })
-        
-        print(f"✅ Zaplanowano dzienną prognozę o {time_of_day} dla: {ticker_list}")
+        job, created = self._add_job('daily', ticker_list, forecast_func, lookback, horizon, kwargs,
+                            fetch_func=fetch_func, max_workers=max_workers, ticker_timeout=ticker_timeout,
+                            job_key=job_key, time_of_day=time_of_day)
+        if created:
+            print(f"✅ Zaplanowano dzienną prognozę o {time_of_day} dla: {ticker_list}")
+        return job
     
     def schedule_recurring_forecast(self, ticker_list, interval_minutes, forecast_func,
-                                   lookback=60, horizon=5, **kwargs):
+                                   lookback=60, horizon=5, fetch_func=None, max_workers=None,
+                                   ticker_timeout=None, job_key=None, **kwargs):
         """
         Zaplanuj periodyczne prognozy.
         
@@ -64,22 +412,206 @@ class ForecastScheduler:
             interval_minutes: interwał w minutach
             forecast_func: funkcja prognozy
             lookback, horizon: parametry modelu
+            fetch_func: opcjonalna funkcja pobierania danych (ticker -> data)
+            max_workers: rozmiar puli wątków dla tego zadania
+            ticker_timeout: limit czasu na jeden ticker w sekundach
+            job_key: stały identyfikator zadania w magazynie zadań (domyślnie wyliczany)
         """
-        def run_forecasts():
-            for ticker in ticker_list:
-                try:
-                    forecast_func(ticker, lookback=lookback, horizon=horizon, **kwargs)
-                except Exception as e:
-                    print(f"❌ Błąd podczas prognozy {ticker}: {e}")
-        
-        schedule.every(interval_minutes).minutes.do(run_forecasts)
-        self.jobs.append({
+        job, created = self._add_job('recurring', ticker_list, forecast_func, lookback, horizon, kwargs,
+                            fetch_func=fetch_func, max_workers=max_workers, ticker_timeout=ticker_timeout,
+                            job_key=job_key, interval_minutes=interval_minutes)
+        if created:
+            print(f"✅ Zaplanowano periodyczną prognozę co {interval_minutes} minut dla: {ticker_list}")
+        return job
+    
+    def _add_job(self, job_type, ticker_list, forecast_func, lookback, horizon, kwargs,
+                 fetch_func=None, max_workers=None, ticker_timeout=None, job_key=None,
+                 time_of_day=None, interval_minutes=None, persist=True):
+        """Zbuduj zadanie, zapisz je w magazynie (jeśli jest) i wstaw do harmonogramu."""
+        ticker_list = list(ticker_list)
+        spec = {
+            'type': job_type,
             'tickers': ticker_list,
+            'time_of_day': time_of_day,
             'interval_minutes': interval_minutes,
-            'type': 'recurring'
-        })
+            'func_name': _callable_name(forecast_func),
+            'fetch_func_name': _callable_name(fetch_func) if fetch_func else None,
+            'lookback': lookback,
+            'horizon': horizon,
+            'options': {'max_workers': max_workers, 'ticker_timeout': ticker_timeout, 'kwargs': kwargs},
+        }
+        key = job_key or SchedulerJobStore.make_job_key(spec)
+        
+        with self._cond:
+            for existing in self.jobs:
+                if existing['key'] == key:
+                    print(f"⚠️ Zadanie {key} jest już zarejestrowane.")
+                    return existing, False
+        
+        if self.job_store is not None and persist:
+            self.job_store.save_job(key, spec)
+        
+        job = {
+            'id': next(self._job_ids),
+            'key': key,
+            'tickers': ticker_list,
+            'type': job_type,
+            'next_run': None,
+            'last_run': None
+        }
+        if job_type == 'daily':
+            job['time'] = time_of_day
+        else:
+            job['interval_minutes'] = interval_minutes
+        
+        def run_forecasts(scheduled_for=None):
+            self._run_job(job, forecast_func, lookback, horizon, kwargs, scheduled_for,
+                          fetch_func=fetch_func, max_workers=max_workers, ticker_timeout=ticker_timeout)
+        
+        self._register_job(job, run_forecasts)
+        return job, True
+    
+    def _run_job(self, job, forecast_func, lookback, horizon, kwargs, scheduled_for,
+                 fetch_func=None, max_workers=None, ticker_timeout=None):
+        """
+        Wykonaj jedno uruchomienie zadania.
+        
+        Z magazynem zadań uruchomienie ma idempotentny run_id (klucz zadania + termin):
+        termin już zakończony jest pomijany, przerwany – wznawiany tylko dla
+        tickerów, które nie zakończyły się sukcesem (brak wyniku, 'error' lub 'timeout').
+        """
+        ticker_list = job['tickers']
+        run_id = None
+        on_result = None
+        
+        if self.job_store is not None and scheduled_for is not None:
+            run_id = SchedulerJobStore.make_run_id(job['key'], scheduled_for)
+            if self.job_store.begin_run(run_id, job['key'], scheduled_for) == 'done':
+                print(f"ℹ️ Uruchomienie {run_id} zostało już zakończone – pomijam.")
+                return
+            finished = self.job_store.finished_tickers(run_id)
+            ticker_list = [t for t in ticker_list if t not in finished]
+            if finished:
+                print(f"🔁 Wznawiam {run_id}: pozostało {len(ticker_list)} z {len(job['tickers'])} tickerów")
+            
+            def on_result(ticker, result):
+                self.job_store.record_ticker(run_id, ticker, result)
+        
+        job['last_run'] = self._run_ticker_batch(
+            ticker_list, forecast_func, lookback, horizon, kwargs,
+            fetch_func=fetch_func, max_workers=max_workers, ticker_timeout=ticker_timeout,
+            on_result=on_result
+        )
+        
+        if run_id is not None:
+            self.job_store.finish_run(run_id)
+        
+        self._run_batch_hooks(job, job['last_run'])
+    
+    def restore_jobs(self, func_registry=None):
+        """
+        Odtwórz zadania zapisane w magazynie (np. po restarcie procesu).
         
-        print(f"✅ Zaplanowano periodyczną prognozę co {interval_minutes} minut dla: {ticker_list}")
+        Args:
+            func_registry: dict {nazwa: funkcja}; nazwy, których tu nie ma,
+                           rozwiązywane są przez import ("moduł:funkcja")
+        
+        Returns:
+            liczba odtworzonych zadań
+        """
+        if self.job_store is None:
+            print("⚠️ Brak magazynu zadań – nie ma czego odtwarzać.")
+            return 0
+        
+        abandoned = self.job_store.abandon_orphaned_runs()
+        if abandoned:
+            print(f"ℹ️ Porzucono {abandoned} przerwanych uruchomień usuniętych zadań.")
+        
+        restored = 0
+        registered = {job['key'] for job in self.jobs}
+        for key, spec in self.job_store.load_jobs():
+            if key in registered:
+                continue
+            try:
+                forecast_func = _resolve_callable(spec['func_name'], func_registry)
+                fetch_func = (_resolve_callable(spec['fetch_func_name'], func_registry)
+                              if spec['fetch_func_name'] else None)
+            except (ImportError, AttributeError, ValueError) as e:
+                print(f"⚠️ Nie udało się odtworzyć zadania {key}: {e}")
+                continue
+            
+            options = spec['options']
+            self._add_job(spec['type'], spec['tickers'], forecast_func, spec['lookback'], spec['horizon'],
+                          options.get('kwargs') or {}, fetch_func=fetch_func,
+                          max_workers=options.get('max_workers'), ticker_timeout=options.get('ticker_timeout'),
+                          job_key=key, time_of_day=spec['time_of_day'],
+                          interval_minutes=spec['interval_minutes'], persist=False)
+            restored += 1
+        
+        print(f"✅ Odtworzono {restored} zadań z magazynu.")
+        return restored
+    
+    def _resume_interrupted_runs(self):
+        """Dokończ uruchomienia przerwane przez awarię (tylko brakujące tickery)."""
+        pending = {}
+        jobs_by_key = {job['key']: job for job in self.jobs}
+        for run_id, job_key, scheduled_for in self.job_store.interrupted_runs():
+            if job_key in jobs_by_key:
+                pending.setdefault(job_key, []).append(scheduled_for)
+        
+        for job_key, terms in pending.items():
+            job = jobs_by_key[job_key]
+            if job.get('running'):
+                continue
+            job['running'] = True
+            threading.Thread(target=self._execute_job, args=(job, terms), daemon=True).start()
+    
+    @staticmethod
+    def _next_run_time(job, now):
+        """Wylicz najbliższy termin zadania (po chwili `now`)."""
+        if job['type'] == 'daily':
+            parts = [int(p) for p in job['time'].split(':')]
+            hour, minute = parts[0], parts[1]
+            second = parts[2] if len(parts) > 2 else 0
+            candidate = now.replace(hour=hour, minute=minute, second=second, microsecond=0)
+            if candidate <= now:
+                candidate += timedelta(days=1)
+            return candidate
+        
+        # Zadania cykliczne liczone od poprzedniego terminu – bez dryfu
+        interval = timedelta(minutes=job['interval_minutes'])
+        candidate = (job['next_run'] or now) + interval
+        while candidate <= now:
+            candidate += interval
+        return candidate
+    
+    def _push_job(self, job, now=None):
+        """Wstaw zadanie na kopiec z kolejnym terminem (wywoływać pod self._cond)."""
+        job['next_run'] = self._next_run_time(job, now or datetime.now())
+        heapq.heappush(self._heap, (job['next_run'].timestamp(), next(self._seq), job['id']))
+    
+    def _register_job(self, job, runner):
+        """Dodaj zadanie i obudź pętlę harmonogramu, żeby przeliczyła czas uśpienia."""
+        with self._cond:
+            self.jobs.append(job)
+            self._jobs_by_id[job['id']] = job
+            self._runners[job['id']] = runner
+            self._push_job(job)
+            self._cond.notify_all()
+    
+    def _execute_job(self, job, scheduled_for=None):
+        """
+        Wykonaj zadanie (w osobnym wątku, żeby nie blokować pętli).
+        scheduled_for może być listą terminów – wtedy wykonywane są po kolei.
+        """
+        terms = scheduled_for if isinstance(scheduled_for, list) else [scheduled_for]
+        try:
+            for term in terms:
+                self._runners[job['id']](term)
+        except Exception as e:
+            print(f"❌ Błąd zadania harmonogramu: {e}")
+        finally:
+            job['running'] = False
     
     def start_scheduler(self):
         """Uruchom harmonogram w osobnym wątku."""
@@ -87,23 +619,56 @@ class ForecastScheduler:
             print("⚠️ Harmonogram już jest uruchomiony.")
             return
         
-        self.is_running = True
+        with self._cond:
+            # Odbuduj kopiec – terminy z przeszłości przesuwamy na najbliższe
+            self._heap = []
+            now = datetime.now()
+            for job in self.jobs:
+                if job['next_run'] is not None and job['next_run'] > now:
+                    heapq.heappush(self._heap, (job['next_run'].timestamp(), next(self._seq), job['id']))
+                else:
+                    self._push_job(job, now)
+            self.is_running = True
+        
         self.scheduler_thread = threading.Thread(target=self._scheduler_loop, daemon=True)
         self.scheduler_thread.start()
         print("✅ Harmonogram prognoz uruchomiony.")
+        
+        if self.job_store is not None:
+            self._resume_interrupted_runs()
     
     def _scheduler_loop(self):
-        """Główna pętla harmonogramu."""
-        while self.is_running:
-            schedule.run_pending()
-            time.sleep(60)  # Sprawdzaj co minutę
+        """Główna pętla harmonogramu: śpi dokładnie do najbliższego terminu."""
+        with self._cond:
+            while self.is_running:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+                
+                due_ts, _, job_id = self._heap[0]
+                delay = due_ts - time.time()
+                if delay > 0:
+                    self._cond.wait(timeout=min(delay, self.MAX_SLEEP_SECONDS))
+                    continue
+                
+                heapq.heappop(self._heap)
+                job = self._jobs_by_id[job_id]
+                self._push_job(job)
+                
+                if job.get('running'):
+                    print(f"⚠️ Poprzednie uruchomienie zadania {job_id} jeszcze trwa – pomijam termin.")
+                    continue
+                job['running'] = True
+                scheduled_for = datetime.fromtimestamp(due_ts)
+                threading.Thread(target=self._execute_job, args=(job, scheduled_for), daemon=True).start()
     
     def stop_scheduler(self):
-        """Zatrzymaj harmonogram."""
-        self.is_running = False
+        """Zatrzymaj harmonogram (zadania pozostają zarejestrowane do kolejnego startu)."""
+        with self._cond:
+            self.is_running = False
+            self._cond.notify_all()
         if self.scheduler_thread:
             self.scheduler_thread.join(timeout=5)
-        schedule.clear()
         print("⏹️  Harmonogram zatrzymany.")
     
     def get_scheduled_jobs(self):
@@ -112,19 +677,46 @@ class ForecastScheduler:
 
 
 class AlertManager:
-    """Zarządzanie alertami cenowymi."""
+    """Zarządzanie alertami cenowymi (reguły oceniane wektorowo przez AlertRuleEngine)."""
+    
+    # Klucze w self.alerts[ticker] -> typ reguły
+    RULE_TYPES = {
+        'above': AlertRuleEngine.CROSS_ABOVE,
+        'below': AlertRuleEngine.CROSS_BELOW,
+        'pct_move': AlertRuleEngine.PCT_MOVE,
+        'forecast_above': AlertRuleEngine.FORECAST_ABOVE,
+        'forecast_below': AlertRuleEngine.FORECAST_BELOW,
+    }
     
-    def __init__(self, check_interval_seconds=300):
+    def __init__(self, check_interval_seconds=300, hysteresis_pct=0.5, cooldown_seconds=0.0):
         """
         Inicjalizuj menedżer alertów.
         
         Args:
             check_interval_seconds: interwał sprawdzania cen w sekundach
+            hysteresis_pct: pasmo histerezy w % – alert wyzwolony raz uzbraja się ponownie
+                            dopiero po powrocie ceny za próg o tyle procent
+            cooldown_seconds: minimalny odstęp między kolejnymi wyzwoleniami jednego alertu
         """
-        self.alerts = {}  # {ticker: {'above': price, 'below': price}}
+        self.alerts = {}  # {ticker: {'above': price, 'below': price, 'pct_move': %, ...}}
+        self.rules = AlertRuleEngine(hysteresis_pct=hysteresis_pct, cooldown_seconds=cooldown_seconds)
+        self._rule_ids = {}  # (ticker, klucz) -> ID reguły w silniku
+        self._lock = threading.Lock()
         self.check_interval = check_interval_seconds
         self.is_monitoring = False
         self.monitor_thread = None
+        self._stop_event = None
+    
+    def _set_rule(self, ticker, key, threshold, reference=None):
+        """Dodaj regułę albo zmień próg istniejącej (wywoływać pod self._lock)."""
+        self.alerts.setdefault(ticker, {})[key] = threshold
+        rule_id = self._rule_ids.get((ticker, key))
+        if rule_id is None:
+            self._rule_ids[(ticker, key)] = self.rules.add_rule(
+                ticker, self.RULE_TYPES[key], threshold, reference=reference
+            )
+        else:
+            self.rules.set_threshold(rule_id, threshold)
     
     def set_price_alert(self, ticker, above_price=None, below_price=None):
         """
@@ -135,55 +727,164 @@ class AlertManager:
             above_price: alert gdy cena będzie powyżej
             below_price: alert gdy cena będzie poniżej
         """
-        if ticker not in self.alerts:
-            self.alerts[ticker] = {}
-        
-        if above_price:
-            self.alerts[ticker]['above'] = above_price
-        if below_price:
-            self.alerts[ticker]['below'] = below_price
+        with self._lock:
+            self.alerts.setdefault(ticker, {})
+            if above_price:
+                self._set_rule(ticker, 'above', above_price)
+            if below_price:
+                self._set_rule(ticker, 'below', below_price)
         
         print(f"✅ Alert ustawiony dla {ticker.upper()}")
     
-    def start_monitoring(self, price_check_func):
+    def set_pct_move_alert(self, ticker, pct, reference_price=None):
+        """
+        Alert na ruch ceny o co najmniej pct % od ceny odniesienia.
+        Po wyzwoleniu ceną odniesienia staje się bieżąca cena.
+        
+        Args:
+            reference_price: cena odniesienia (None = pierwsza sprawdzona cena)
+        """
+        with self._lock:
+            self._set_rule(ticker, 'pct_move', pct, reference=reference_price)
+        print(f"✅ Alert ruchu {pct}% ustawiony dla {ticker.upper()}")
+    
+    def set_forecast_alert(self, ticker, pct_above=None, pct_below=None):
+        """
+        Alert, gdy prognoza (update_forecasts) odbiega od bieżącej ceny.
+        
+        Args:
+            pct_above: alert gdy prognoza jest powyżej ceny o więcej niż pct_above %
+            pct_below: alert gdy prognoza jest poniżej ceny o więcej niż pct_below %
+        """
+        with self._lock:
+            if pct_above:
+                self._set_rule(ticker, 'forecast_above', pct_above)
+            if pct_below:
+                self._set_rule(ticker, 'forecast_below', pct_below)
+        print(f"✅ Alert prognozy ustawiony dla {ticker.upper()}")
+    
+    def update_forecasts(self, forecasts):
+        """Ustaw prognozowane ceny dla reguł prognozy: dict {ticker: cena}."""
+        with self._lock:
+            self.rules.set_forecasts(forecasts)
+    
+    def start_monitoring(self, price_check_func=None, batch_price_func=None, batch_size=100):
         """
         Uruchom monitoring cen.
         
         Args:
             price_check_func: funkcja pobierająca aktualną cenę (ticker -> price)
+            batch_price_func: funkcja pobierająca ceny wielu tickerów naraz
+                              (lista tickerów -> {ticker: price}), np. fetch_last_prices_yfinance
+            batch_size: maksymalna liczba tickerów w jednym wywołaniu batch_price_func
         """
         if self.is_monitoring:
             print("⚠️ Monitoring już jest aktywny.")
             return
+        if price_check_func is None and batch_price_func is None:
+            raise ValueError("Podaj price_check_func albo batch_price_func.")
         
         self.is_monitoring = True
+        self._stop_event = threading.Event()
         self.monitor_thread = threading.Thread(
             target=self._monitor_loop, 
-            args=(price_check_func,),
+            args=(price_check_func, batch_price_func, batch_size),
             daemon=True
         )
         self.monitor_thread.start()
         print("✅ Monitoring cen uruchomiony.")
     
-    def _monitor_loop(self, price_check_func):
-        """Główna pętla monitoringu."""
+    def _monitor_loop(self, price_check_func, batch_price_func=None, batch_size=100):
+        """Główna pętla monitoringu – kolejny cykl liczony od początku poprzedniego."""
         while self.is_monitoring:
-            for ticker, alert_levels in self.alerts.items():
+            cycle_start = time.monotonic()
+            self.check_all_prices(price_check_func, batch_price_func, batch_size)
+            
+            elapsed = time.monotonic() - cycle_start
+            if elapsed > self.check_interval:
+                print(f"⚠️ Cykl sprawdzania cen trwał {elapsed:.1f} s (interwał {self.check_interval} s)")
+            self._stop_event.wait(max(0.0, self.check_interval - elapsed))
+    
+    def check_all_prices(self, price_check_func=None, batch_price_func=None, batch_size=100):
+        """
+        Jeden cykl: pobierz ceny wszystkich monitorowanych tickerów
+        i oceń wszystkie reguły jednym wywołaniem silnika.
+        
+        Returns:
+            lista (ticker, komunikat) wyzwolonych alertów
+        """
+        tickers = list(self.alerts)
+        prices = {}
+        
+        if batch_price_func is None:
+            for ticker in tickers:
                 try:
-                    current_price = price_check_func(ticker)
-                    
-                    if 'above' in alert_levels and current_price > alert_levels['above']:
-                        msg = f"🔔 ALERT: {ticker} powyżej {alert_levels['above']:.2f} (aktualnie: {current_price:.2f})"
-                        self._trigger_alert(ticker, msg)
-                    
-                    if 'below' in alert_levels and current_price < alert_levels['below']:
-                        msg = f"🔔 ALERT: {ticker} poniżej {alert_levels['below']:.2f} (aktualnie: {current_price:.2f})"
-                        self._trigger_alert(ticker, msg)
-                
+                    prices[ticker] = price_check_func(ticker)
                 except Exception as e:
                     print(f"⚠️ Błąd podczas sprawdzenia {ticker}: {e}")
-            
-            time.sleep(self.check_interval)
+        else:
+            for i in range(0, len(tickers), batch_size):
+                chunk = tickers[i:i + batch_size]
+                try:
+                    chunk_prices = batch_price_func(chunk)
+                except Exception as e:
+                    print(f"⚠️ Błąd podczas pobierania cen ({len(chunk)} tickerów): {e}")
+                    continue
+                
+                for ticker in chunk:
+                    price = chunk_prices.get(ticker)
+                    if price is None:
+                        print(f"⚠️ Brak ceny dla {ticker}")
+                        continue
+                    prices[ticker] = price
+        
+        return self.check_prices(prices)
+    
+    def check_prices(self, prices):
+        """
+        Oceń wszystkie reguły względem cen i wyzwól alerty.
+        Alert wyzwala się raz przy przekroczeniu progu, a ponownie dopiero
+        po powrocie ceny za próg (histereza) i upływie cooldownu.
+        
+        Args:
+            prices: dict {ticker: cena}
+        
+        Returns:
+            lista (ticker, komunikat) wyzwolonych alertów
+        """
+        with self._lock:
+            fired = self.rules.evaluate(prices)
+        
+        triggered = []
+        for hit in fired:
+            ticker = hit['ticker']
+            msg = self._format_alert(hit)
+            self._trigger_alert(ticker, msg)
+            triggered.append((ticker, msg))
+        return triggered
+    
+    def check_price(self, ticker, current_price):
+        """
+        Sprawdź bieżącą cenę względem progów tickera i wyzwól alerty.
+        
+        Returns:
+            lista komunikatów wyzwolonych alertów
+        """
+        return [msg for _, msg in self.check_prices({ticker: current_price})]
+    
+    @staticmethod
+    def _format_alert(hit):
+        """Komunikat alertu dla wyniku AlertRuleEngine.evaluate."""
+        ticker, rule, threshold, price = hit['ticker'], hit['rule'], hit['threshold'], hit['price']
+        if rule == 'cross_above':
+            return f"🔔 ALERT: {ticker} powyżej {threshold:.2f} (aktualnie: {price:.2f})"
+        if rule == 'cross_below':
+            return f"🔔 ALERT: {ticker} poniżej {threshold:.2f} (aktualnie: {price:.2f})"
+        if rule == 'pct_move':
+            return f"🔔 ALERT: {ticker} zmiana o {hit['value']:.2f}% (próg {threshold:.2f}%, aktualnie: {price:.2f})"
+        direction = "powyżej" if rule == 'forecast_above' else "poniżej"
+        return (f"🔔 ALERT: prognoza {ticker} {abs(hit['value']):.2f}% {direction} ceny "
+                f"(próg {threshold:.2f}%, aktualnie: {price:.2f})")
     
     def _trigger_alert(self, ticker, message):
         """Wyzwól alert."""
@@ -193,23 +894,291 @@ class AlertManager:
     def stop_monitoring(self):
         """Zatrzymaj monitoring."""
         self.is_monitoring = False
+        if self._stop_event is not None:
+            self._stop_event.set()
         if self.monitor_thread:
             self.monitor_thread.join(timeout=5)
         print("⏹️  Monitoring zatrzymany.")
 
 
+class ForecastAlertPass:
+    """
+    Zbiorcze sprawdzanie alertów na prognozach zapisanych w ForecastDatabase.
+    
+    Jedno zapytanie porównuje ostatni dzień wszystkich świeżych prognoz
+    z progami z tabeli alert_thresholds; wynik to jedna skonsolidowana
+    lista komunikatów zamiast osobnego okna na każdy ticker.
+    """
+    
+    def __init__(self, db_path="forecast_history.db", notify_func=None, since_id=None):
+        """
+        Args:
+            db_path: ścieżka do bazy prognoz
+            notify_func: opcjonalna funkcja (messages) wywoływana raz na przebieg,
+                         gdy jakikolwiek alert został wyzwolony
+            since_id: sprawdzaj prognozy o ID większym niż since_id
+                      (None = tylko prognozy dodane po utworzeniu obiektu)
+        """
+        self.db_path = db_path
+        self.notify_func = notify_func
+        if since_id is None:
+            with ForecastDatabase(db_path) as db:
+                since_id = db.get_last_forecast_id()
+        self.last_forecast_id = since_id
+        self._lock = threading.Lock()
+    
+    def run(self):
+        """
+        Sprawdź prognozy dodane od poprzedniego przebiegu.
+        
+        Returns:
+            lista komunikatów (posortowana po tickerze)
+        """
+        with self._lock:
+            with ForecastDatabase(self.db_path) as db:
+                # Górna granica odczytana przed zapytaniem – prognoza dodana w międzyczasie
+                # zostanie sprawdzona w następnym przebiegu, a nie pominięta
+                max_id = db.get_last_forecast_id()
+                triggered = db.get_triggered_forecast_alerts(since_id=self.last_forecast_id, until_id=max_id)
+                self.last_forecast_id = max(self.last_forecast_id, max_id)
+        
+        messages = []
+        for row in triggered.itertuples(index=False):
+            direction = "POWYŻEJ" if row.direction == 'above' else "PONIŻEJ"
+            messages.append(f"🔔 ALERT: {row.ticker} prognoza D+{row.day_offset} "
+                            f"({row.predicted_price:.2f}) jest {direction} progu {row.threshold:.2f}")
+        
+        if messages:
+            print(f"🔔 Alerty prognoz ({len(messages)}):")
+            for msg in messages:
+                print(f"   {msg}")
+            if self.notify_func is not None:
+                self.notify_func(messages)
+        return messages
+    
+    def __call__(self, job=None, results=None):
+        """Użycie jako hook: ForecastScheduler.add_batch_hook(ForecastAlertPass(...))."""
+        return self.run()
+
+
+def fetch_last_prices_yfinance(tickers):
+    """
+    Ostatnie ceny wielu tickerów jednym zapytaniem do Yahoo Finance.
+    Do użycia jako batch_price_func w AlertManager.start_monitoring.
+    
+    Returns:
+        dict {ticker: price}
+    """
+    import yfinance as yf
+    
+    data = yf.download(list(tickers), period="1d", interval="1m", progress=False, group_by="column")
+    if data.empty:
+        return {}
+    
+    close = data["Close"]
+    if not hasattr(close, "columns"):
+        close = close.to_frame(name=tickers[0])
+    last = close.ffill().iloc[-1]
+    return {ticker: float(price) for ticker, price in last.items() if price == price}
+
+
+class BoundedHistory:
+    """
+    Historia o stałym rozmiarze (bufor cykliczny) z licznikami O(1).
+    
+    Najstarsze wpisy są usuwane po przekroczeniu pojemności; jeśli podano
+    spill_db_path, trafiają wtedy do tabeli SQLite zamiast przepadać.
+    """
+    
+    def __init__(self, capacity=1000, spill_db_path=None, table="history"):
+        """
+        Args:
+            capacity: maksymalna liczba wpisów trzymanych w pamięci (co najmniej 1)
+            spill_db_path: ścieżka do bazy SQLite na wpisy usunięte z bufora (opcjonalnie)
+            table: nazwa tabeli w bazie spill
+        """
+        if capacity < 1:
+            raise ValueError(f"Pojemność historii musi wynosić co najmniej 1 (podano {capacity})")
+        self.capacity = capacity
+        self.table = table
+        self._items = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self.total = 0          # wszystkie kiedykolwiek dodane wpisy
+        self.spilled = 0        # wpisy przeniesione do SQLite
+        self.counts = {}        # {typ wpisu: liczba} – licząc od początku
+        
+        self._spill_conn = None
+        if spill_db_path:
+            self._spill_conn = sqlite3.connect(spill_db_path, check_same_thread=False)
+            self._spill_conn.execute(f'''
+                CREATE TABLE IF NOT EXISTS {table} (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    type TEXT,
+                    timestamp TEXT,
+                    payload TEXT NOT NULL
+                )
+            ''')
+            self._spill_conn.commit()
+    
+    def append(self, entry):
+        """Dodaj wpis (dict); najstarszy wpis jest usuwany lub przenoszony do SQLite."""
+        with self._lock:
+            if len(self._items) == self.capacity and self._spill_conn is not None:
+                self._spill(self._items[0])
+            self._items.append(entry)
+            self.total += 1
+            kind = entry.get('type')
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+    
+    def _spill(self, entry):
+        self._spill_conn.execute(
+            f"INSERT INTO {self.table} (type, timestamp, payload) VALUES (?, ?, ?)",
+            (entry.get('type'), str(entry.get('timestamp')), json.dumps(entry, default=str))
+        )
+        self._spill_conn.commit()
+        self.spilled += 1
+    
+    def recent(self, n=None):
+        """Ostatnie n wpisów z pamięci (od najstarszego)."""
+        with self._lock:
+            items = list(self._items)
+        return items if n is None else items[-n:]
+    
+    def load_spilled(self, limit=1000):
+        """Wpisy przeniesione do SQLite (najnowsze najpierw; timestamp jako tekst)."""
+        if self._spill_conn is None:
+            return []
+        with self._lock:
+            rows = self._spill_conn.execute(
+                f"SELECT payload FROM {self.table} ORDER BY id DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+    
+    def close(self):
+        if self._spill_conn is not None:
+            self._spill_conn.close()
+            self._spill_conn = None
+    
+    def __len__(self):
+        return len(self._items)
+    
+    def __iter__(self):
+        return iter(self.recent())
+    
+    def __getitem__(self, index):
+        return self.recent()[index]
+
+
 class NotificationManager:
-    """Zarządzanie powiadomienimi."""
+    """
+    Zarządzanie powiadomienimi.
+    
+    E-maile można wysyłać od razu (send_email_notification) albo przez kolejkę
+    (queue_email_notification): wątek w tle zbiera powiadomienia w oknie czasowym,
+    łączy je w jeden digest na odbiorcę i wysyła przez jedną, ponownie używaną
+    sesję SMTP, ponawiając nieudane próby z rosnącym odstępem.
+    """
     
-    def __init__(self, email_config=None):
+    def __init__(self, email_config=None, digest_window_seconds=10.0, max_retries=3,
+                 retry_backoff_seconds=1.0, idle_timeout_seconds=60.0,
+                 log_capacity=1000, log_spill_db_path=None):
         """
         Inicjalizuj menedżer powiadomień.
         
         Args:
             email_config: dict {'sender': email, 'password': pwd, 'smtp_server': server, 'port': port}
+                          oraz opcjonalnie 'use_tls' (domyślnie True) i 'timeout';
+                          bez 'password' logowanie jest pomijane (np. lokalny serwer testowy)
+            digest_window_seconds: jak długo kolejka zbiera powiadomienia przed wysłaniem digestu
+            max_retries: liczba ponowień wysyłki po błędzie
+            retry_backoff_seconds: odstęp przed pierwszym ponowieniem (podwajany przy kolejnych)
+            idle_timeout_seconds: po takim czasie bezczynności sesja SMTP jest zamykana
+            log_capacity: liczba wpisów logu trzymanych w pamięci
+            log_spill_db_path: baza SQLite na starsze wpisy logu (None = starsze wpisy są usuwane)
         """
         self.email_config = email_config
-        self.notification_log = []
+        self.notification_log = BoundedHistory(log_capacity, log_spill_db_path, table="notification_log")
+        self.digest_window = digest_window_seconds
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff_seconds
+        self.idle_timeout = idle_timeout_seconds
+        
+        self._smtp = None
+        self._smtp_last_used = 0.0
+        self._smtp_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._sender_thread = None
+        self._sender_stop = threading.Event()
+    
+    # ========= SESJA SMTP =========
+    def _connect(self):
+        """Otwórz sesję SMTP (TLS i logowanie zgodnie z konfiguracją)."""
+        cfg = self.email_config
+        server = smtplib.SMTP(cfg['smtp_server'], cfg['port'], timeout=cfg.get('timeout', 30))
+        if cfg.get('use_tls', True):
+            server.starttls()
+        if cfg.get('password'):
+            server.login(cfg['sender'], cfg['password'])
+        return server
+    
+    def _close_session(self):
+        """Zamknij sesję SMTP (wywoływać pod self._smtp_lock)."""
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+    
+    @staticmethod
+    def _is_transient(error):
+        """
+        Czy błąd SMTP jest przejściowy (warto ponowić wysyłkę)?
+        Tak: zerwane połączenie, błędy sieci/gniazda i odpowiedzi 4xx.
+        Nie: odpowiedzi 5xx (np. błędne logowanie, odrzucony nadawca) i odrzuceni odbiorcy.
+        """
+        if isinstance(error, smtplib.SMTPServerDisconnected):
+            return True
+        if isinstance(error, smtplib.SMTPResponseException):
+            return 400 <= error.smtp_code < 500
+        if isinstance(error, smtplib.SMTPException):  # m.in. SMTPRecipientsRefused
+            return False
+        return isinstance(error, OSError)
+    
+    def _send_message(self, msg):
+        """
+        Wyślij wiadomość przez współdzieloną sesję SMTP.
+        Sesja bezczynna dłużej niż idle_timeout jest otwierana na nowo (serwer mógł ją już zerwać).
+        Po błędzie przejściowym sesja jest odtwarzana, a wysyłka ponawiana z rosnącym odstępem;
+        błędy trwałe są zgłaszane od razu.
+        """
+        delay = self.retry_backoff
+        for attempt in range(self.max_retries + 1):
+            with self._smtp_lock:
+                try:
+                    if (self._smtp is not None
+                            and time.monotonic() - self._smtp_last_used > self.idle_timeout):
+                        self._close_session()
+                    if self._smtp is None:
+                        self._smtp = self._connect()
+                    self._smtp.send_message(msg)
+                    self._smtp_last_used = time.monotonic()
+                    return
+                except (smtplib.SMTPException, OSError) as e:
+                    self._close_session()
+                    if attempt == self.max_retries or not self._is_transient(e):
+                        raise
+                    print(f"⚠️ Błąd SMTP ({e}) – ponowienie za {delay:.1f} s")
+            time.sleep(delay)
+            delay *= 2
+    
+    def _build_message(self, recipient, subject, body):
+        msg = MIMEMultipart()
+        msg['From'] = self.email_config['sender']
+        msg['To'] = recipient
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'plain'))
+        return msg
     
     def send_email_notification(self, recipient, subject, body):
         """
@@ -225,18 +1194,7 @@ class NotificationManager:
             return False
         
         try:
-            msg = MIMEMultipart()
-            msg['From'] = self.email_config['sender']
-            msg['To'] = recipient
-            msg['Subject'] = subject
-            
-            msg.attach(MIMEText(body, 'plain'))
-            
-            server = smtplib.SMTP(self.email_config['smtp_server'], self.email_config['port'])
-            server.starttls()
-            server.login(self.email_config['sender'], self.email_config['password'])
-            server.send_message(msg)
-            server.quit()
+            self._send_message(self._build_message(recipient, subject, body))
             
             self.notification_log.append({
                 'type': 'email',
@@ -252,6 +1210,115 @@ class NotificationManager:
             print(f"❌ Błąd przy wysyłaniu emaila: {e}")
             return False
     
+    # ========= KOLEJKA I DIGESTY =========
+    def queue_email_notification(self, recipient, subject, body):
+        """
+        Dodaj powiadomienie do kolejki (nie blokuje).
+        Powiadomienia do jednego odbiorcy z okna digest_window_seconds
+        zostaną wysłane jako jedna wiadomość.
+        """
+        if not self.email_config:
+            print("⚠️ Email nie skonfigurowany.")
+            return False
+        
+        self.start_sender()
+        self._queue.put((recipient, subject, body))
+        return True
+    
+    def start_sender(self):
+        """Uruchom wątek wysyłający kolejkę (wywoływane automatycznie)."""
+        if self._sender_thread is not None and self._sender_thread.is_alive():
+            return
+        self._sender_stop.clear()
+        self._sender_thread = threading.Thread(target=self._sender_loop, daemon=True)
+        self._sender_thread.start()
+    
+    def _sender_loop(self):
+        """Zbieraj powiadomienia w oknie czasowym i wysyłaj digesty."""
+        while not self._sender_stop.is_set() or not self._queue.empty():
+            try:
+                first = self._queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                with self._smtp_lock:
+                    self._close_session()
+                continue
+            if first is None:  # sygnał zatrzymania z stop_sender
+                self._queue.task_done()
+                continue
+            
+            batch = [first]
+            deadline = time.monotonic() + self.digest_window
+            while not self._sender_stop.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            try:
+                self._send_digests(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+        
+        with self._smtp_lock:
+            self._close_session()
+    
+    def _send_digests(self, batch):
+        """Wyślij jedną wiadomość na odbiorcę dla zebranych powiadomień."""
+        by_recipient = {}
+        for recipient, subject, body in filter(None, batch):
+            by_recipient.setdefault(recipient, []).append((subject, body))
+        
+        for recipient, items in by_recipient.items():
+            if len(items) == 1:
+                subject, body = items[0]
+            else:
+                subject = f"[{len(items)} powiadomień] {items[0][0]}"
+                body = "\n\n".join(f"=== {s} ===\n{b}" for s, b in items)
+            
+            try:
+                self._send_message(self._build_message(recipient, subject, body))
+            except Exception as e:
+                print(f"❌ Nie udało się wysłać {len(items)} powiadomień do {recipient}: {e}")
+                self.notification_log.append({
+                    'type': 'email_failed',
+                    'recipient': recipient,
+                    'subject': subject,
+                    'count': len(items),
+                    'timestamp': datetime.now()
+                })
+                continue
+            
+            self.notification_log.append({
+                'type': 'email',
+                'recipient': recipient,
+                'subject': subject,
+                'count': len(items),
+                'timestamp': datetime.now()
+            })
+            print(f"📧 Email ({len(items)} powiadomień) wysłany do {recipient}")
+    
+    def flush(self):
+        """Poczekaj, aż wszystkie powiadomienia z kolejki zostaną obsłużone."""
+        if self._sender_thread is not None and self._sender_thread.is_alive():
+            self._queue.join()
+    
+    def stop_sender(self, timeout=None):
+        """Wyślij to, co zostało w kolejce (bez czekania na okno), i zatrzymaj wątek."""
+        self._sender_stop.set()
+        self._queue.put(None)
+        if self._sender_thread is not None:
+            self._sender_thread.join(timeout=timeout)
+            self._sender_thread = None
+    
     def send_desktop_notification(self, title, message):
         """
         Wyślij powiadomienie pulpitu.
@@ -278,18 +1345,30 @@ class NotificationManager:
             print(f"⚠️ Błąd przy wysyłaniu powiadomienia: {e}")
             return False
     
-    def get_notification_log(self):
-        """Pobierz log powiadomień."""
-        return self.notification_log
+    def get_notification_log(self, n=None):
+        """Pobierz log powiadomień (ostatnie n wpisów z pamięci, domyślnie wszystkie)."""
+        return self.notification_log.recent(n)
 
 
 class MonitoringDashboard:
-    """Dashboard do monitorowania prognoz."""
+    """Dashboard do monitorowania prognoz (pamięć ograniczona, podsumowanie w O(1))."""
     
-    def __init__(self):
-        self.active_forecasts = {}
-        self.alerts = {}
+    def __init__(self, max_forecasts=500, alerts_per_ticker=100, alert_history_capacity=5000,
+                 spill_db_path=None):
+        """
+        Args:
+            max_forecasts: maksymalna liczba tickerów z aktywną prognozą (najdawniej aktualizowane są usuwane)
+            alerts_per_ticker: liczba ostatnich alertów trzymanych dla jednego tickera
+            alert_history_capacity: pojemność wspólnej historii alertów
+            spill_db_path: baza SQLite na alerty usunięte z historii (opcjonalnie)
+        """
+        self.max_forecasts = max_forecasts
+        self.alerts_per_ticker = alerts_per_ticker
+        self.active_forecasts = OrderedDict()
+        self.alerts = {}  # {ticker: deque ostatnich alertów}
+        self.alert_history = BoundedHistory(alert_history_capacity, spill_db_path, table="dashboard_alerts")
         self.performance_metrics = {}
+        self._active_alerts = 0
     
     def add_forecast(self, ticker, forecast_data):
         """Dodaj prognozę do dashboardu."""
@@ -297,17 +1376,26 @@ class MonitoringDashboard:
             'data': forecast_data,
             'timestamp': datetime.now()
         }
+        self.active_forecasts.move_to_end(ticker)
+        while len(self.active_forecasts) > self.max_forecasts:
+            self.active_forecasts.popitem(last=False)
     
     def add_alert(self, ticker, alert_type, value):
         """Dodaj alert do dashboardu."""
         if ticker not in self.alerts:
-            self.alerts[ticker] = []
+            self.alerts[ticker] = deque(maxlen=self.alerts_per_ticker)
+        
+        ticker_alerts = self.alerts[ticker]
+        if len(ticker_alerts) < self.alerts_per_ticker:
+            self._active_alerts += 1
         
-        self.alerts[ticker].append({
+        entry = {
             'type': alert_type,
             'value': value,
             'timestamp': datetime.now()
-        })
+        }
+        ticker_alerts.append(entry)
+        self.alert_history.append(dict(entry, ticker=ticker))
     
     def update_metrics(self, ticker, metrics):
         """Aktualizuj metryki modelu."""
@@ -320,7 +1408,8 @@ class MonitoringDashboard:
         """Pobierz podsumowanie dashboardu."""
         return {
             'active_forecasts': len(self.active_forecasts),
-            'active_alerts': sum(len(a) for a in self.alerts.values()),
+            'active_alerts': self._active_alerts,
+            'total_alerts': self.alert_history.total,
             'monitored_tickers': list(self.active_forecasts.keys()),
             'last_update': datetime.now()
         }
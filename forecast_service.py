@@ -0,0 +1,359 @@
+# forecast_service.py
+
+"""
+Moduł z lokalną usługą prognoz po HTTP:
+- Modele i scalery trzymane "na ciepło" w pamięci (LRU), bez ładowania przy każdej prognozie
+- Równoczesne żądania dla tego samego modelu łączone w jedno wywołanie model.predict
+- Prognoza dla jednego lub wielu tickerów, czas obsługi każdego żądania w odpowiedzi
+
+Uruchomienie:
+    python forecast_service.py --port 8765
+
+Przykład:
+    curl "http://127.0.0.1:8765/predict?ticker=AAPL&lookback=60&horizon=5"
+    curl -X POST http://127.0.0.1:8765/predict -d '{"tickers": ["AAPL", "MSFT"], "horizon": 5}'
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+import joblib
+
+import gielda_lstm_core as core
+from prediction_batcher import PredictionBatcher
+
+
+class ForecastService:
+    """Prognozy z modeli trzymanych w pamięci, z łączeniem równoczesnych żądań."""
+
+    def __init__(self, cache_size=16, max_batch=32, max_wait_ms=5.0, data_ttl_seconds=300, registry=None):
+        """
+        Args:
+            cache_size: maksymalna liczba modeli w pamięci (najdawniej używany jest zwalniany)
+            max_batch: maksymalna liczba żądań w jednym model.predict
+            max_wait_ms: jak długo czekać na kolejne żądania do partii
+            data_ttl_seconds: jak długo trzymać pobrane kursy tickera
+            registry: opcjonalny ModelRegistry (najnowsza wersja modelu, fallback na stare pliki)
+        """
+        self.cache_size = cache_size
+        self.registry = registry
+        self.data_ttl = data_ttl_seconds
+        self.batcher = PredictionBatcher(max_batch=max_batch, max_wait_ms=max_wait_ms)
+
+        self._models = OrderedDict()  # (ticker, lookback, horizon) -> wpis z modelem
+        self._models_lock = threading.Lock()
+        self._load_locks = {}
+        self._closes = {}             # ticker -> (czas pobrania, DataFrame)
+        self._closes_lock = threading.Lock()
+        self.stats = {'requests': 0, 'errors': 0, 'model_loads': 0}
+        self._stats_lock = threading.Lock()
+
+    # ========= MODELE =========
+    def _get_model(self, ticker, lookback, horizon):
+        """Wpis z modelem, scalerem i kolejką partii (ładowany przy pierwszym użyciu)."""
+        key = (ticker.upper(), lookback, horizon)
+        model_id = None
+        if self.registry is None:
+            model_path, scaler_path = core.get_file_paths(ticker, lookback, horizon)
+        else:
+            model_path, scaler_path, record = self.registry.resolve(ticker, lookback, horizon)
+            model_id = record['id'] if record else None
+        with self._models_lock:
+            entry = self._models.get(key)
+            if entry is not None and entry['source'] == (model_path, _mtime(model_path), model_id):
+                self._models.move_to_end(key)
+                return entry
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Jeden wątek ładuje model, pozostałe czekają na gotowy wpis
+        with load_lock:
+            with self._models_lock:
+                entry = self._models.get(key)
+                if entry is not None and entry['source'] == (model_path, _mtime(model_path), model_id):
+                    self._models.move_to_end(key)
+                    return entry
+
+            core.require_tf()
+            if not os.path.exists(model_path) or not os.path.exists(scaler_path):
+                raise FileNotFoundError(f"Brak modelu dla {key[0]} L{lookback} H{horizon} ({model_path})")
+
+            start = time.perf_counter()
+            source = (model_path, _mtime(model_path), model_id)
+            entry = {
+                'key': key,
+                'batch_key': key + source,  # nowa wersja modelu = nowa kolejka partii
+                'model': core.load_model(model_path),
+                'scaler': joblib.load(scaler_path),
+                'source': source,
+                'model_id': model_id,
+                'loaded_at': time.time(),
+                'load_seconds': time.perf_counter() - start,
+                'requests': 0,
+            }
+            print(f"📦 Załadowano model {key[0]} L{lookback} H{horizon} w {entry['load_seconds']:.2f} s")
+
+            with self._models_lock:
+                old = self._models.pop(key, None)
+                self._models[key] = entry
+                evicted = []
+                while len(self._models) > self.cache_size:
+                    evicted.append(self._models.popitem(last=False)[1])
+            self._count('model_loads')
+            for e in ([old] if old else []) + evicted:
+                self.batcher.close(e['batch_key'])
+            return entry
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    def loaded_models(self):
+        """Lista modeli w pamięci (od najdawniej używanego)."""
+        with self._models_lock:
+            return [
+                {'ticker': e['key'][0], 'lookback': e['key'][1], 'horizon': e['key'][2],
+                 'model_id': e['model_id'], 'requests': e['requests'], 'load_seconds': round(e['load_seconds'], 3),
+                 'loaded_at': e['loaded_at']}
+                for e in self._models.values()
+            ]
+
+    # ========= DANE =========
+    def _get_closes(self, ticker, lookback):
+        """Ostatnie kursy tickera (cache na data_ttl sekund)."""
+        ticker = ticker.upper()
+        with self._closes_lock:
+            cached = self._closes.get(ticker)
+        if cached is not None and time.time() - cached[0] < self.data_ttl and len(cached[1]) >= lookback:
+            return cached[1]
+        df = core.download_close(ticker, max(365, lookback * 3))
+        with self._closes_lock:
+            self._closes[ticker] = (time.time(), df)
+        return df
+
+    # ========= PROGNOZY =========
+    def submit(self, ticker, lookback=60, horizon=5, closes=None):
+        """
+        Zgłoś prognozę bez czekania na wynik.
+
+        Args:
+            closes: opcjonalna lista ostatnich kursów (domyślnie pobierane z Yahoo Finance)
+
+        Returns:
+            funkcja bez argumentów zwracająca wynik predict (czeka na partię)
+        """
+        start = time.perf_counter()
+        entry = self._get_model(ticker, lookback, horizon)
+        last_date = None
+        if closes is None:
+            df = self._get_closes(ticker, lookback)
+            values = np.asarray(df["Close"].values, dtype=float)
+            last_date = pd.Timestamp(df["Date"].iloc[-1])
+        else:
+            values = np.asarray(closes, dtype=float)
+        if len(values) < lookback:
+            raise ValueError(f"Za mało danych dla {ticker}: {len(values)} < lookback {lookback}")
+
+        x = entry['scaler'].transform(values[-lookback:].reshape(-1, 1))  # (lookback, 1)
+        future = self.batcher.submit(entry['batch_key'], entry['model'], x)
+        with self._models_lock:
+            entry['requests'] += 1
+
+        def result():
+            row, batch_size, queue_seconds = future.result()
+            prices = entry['scaler'].inverse_transform(np.asarray(row).reshape(-1, 1)).flatten()
+            out = {
+                'ticker': ticker.upper(),
+                'lookback': lookback,
+                'horizon': horizon,
+                'model_id': entry['model_id'],
+                'forecast': prices.tolist(),
+                'dates': None,
+                'batch_size': batch_size,
+                'queue_ms': round(queue_seconds * 1000, 3),
+                'latency_ms': None,
+            }
+            if last_date is not None:
+                out['dates'] = [d.strftime("%Y-%m-%d") for d in
+                                pd.date_range(last_date + pd.Timedelta(days=1), periods=len(prices))]
+            out['latency_ms'] = round((time.perf_counter() - start) * 1000, 3)
+            return out
+
+        return result
+
+    def predict(self, ticker, lookback=60, horizon=5, closes=None):
+        """Prognoza dla jednego tickera (dict z forecast, dates, batch_size, queue_ms, latency_ms)."""
+        self._count('requests')
+        try:
+            return self.submit(ticker, lookback, horizon, closes)()
+        except Exception:
+            self._count('errors')
+            raise
+
+    def predict_many(self, tickers, lookback=60, horizon=5, closes=None):
+        """
+        Prognozy dla wielu tickerów – wszystkie zgłaszane od razu, więc żądania
+        do tego samego modelu trafiają do wspólnej partii.
+
+        Args:
+            closes: opcjonalny dict {ticker: lista kursów}
+
+        Returns:
+            lista wyników; dla błędnych tickerów {'ticker', 'error'}
+        """
+        closes = closes or {}
+        pending = []
+        for ticker in tickers:
+            self._count('requests')
+            try:
+                pending.append((ticker, self.submit(ticker, lookback, horizon, closes.get(ticker))))
+            except Exception as e:
+                pending.append((ticker, e))
+
+        results = []
+        for ticker, item in pending:
+            try:
+                if isinstance(item, Exception):
+                    raise item
+                results.append(item())
+            except Exception as e:
+                self._count('errors')
+                results.append({'ticker': ticker.upper(), 'error': f"{type(e).__name__}: {e}"})
+        return results
+
+    def close(self):
+        """Zwolnij modele i zatrzymaj kolejki partii."""
+        with self._models_lock:
+            self._models.clear()
+        self.batcher.close()
+
+    # ========= HTTP =========
+    def make_server(self, host="127.0.0.1", port=8765):
+        """Serwer HTTP (wątek na połączenie) obsługujący tę instancję."""
+        service = self
+
+        class Handler(_ForecastRequestHandler):
+            pass
+        Handler.service = service
+        return ThreadingHTTPServer((host, port), Handler)
+
+    def serve_forever(self, host="127.0.0.1", port=8765):
+        """Uruchom usługę w bieżącym wątku (Ctrl+C kończy)."""
+        server = self.make_server(host, port)
+        print(f"✅ Usługa prognoz działa na http://{host}:{server.server_address[1]}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.close()
+            print("⏹️  Usługa prognoz zatrzymana.")
+
+
+class _ForecastRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET  /health                          – stan usługi
+    GET  /models                          – modele w pamięci
+    GET  /predict?ticker=AAPL&lookback=60&horizon=5   (ticker można powtórzyć)
+    POST /predict  {"ticker" | "tickers", "lookback", "horizon", "closes"}
+    """
+
+    service = None
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/health":
+            return self._send(200, {'status': 'ok', 'models': len(self.service.loaded_models()),
+                                    'stats': self.service.stats, 'batching': self.service.batcher.stats})
+        if url.path == "/models":
+            return self._send(200, {'models': self.service.loaded_models()})
+        if url.path == "/predict":
+            query = parse_qs(url.query)
+            params = {
+                'tickers': [t for v in query.get('ticker', []) for t in v.split(',') if t],
+                'lookback': query.get('lookback', [60])[0],
+                'horizon': query.get('horizon', [5])[0],
+            }
+            return self._predict(params)
+        self._send(404, {'error': f"Nieznana ścieżka: {url.path}"})
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/predict":
+            return self._send(404, {'error': f"Nieznana ścieżka: {self.path}"})
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            params = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as e:
+            return self._send(400, {'error': f"Niepoprawny JSON: {e}"})
+        if not isinstance(params, dict):
+            return self._send(400, {'error': "Treść żądania musi być obiektem JSON"})
+        if 'ticker' in params:
+            params['tickers'] = [params.pop('ticker')]
+            if 'closes' in params and not isinstance(params['closes'], dict):
+                params['closes'] = {params['tickers'][0]: params['closes']}
+        self._predict(params)
+
+    def _predict(self, params):
+        start = time.perf_counter()
+        try:
+            tickers = list(params.get('tickers') or [])
+            lookback = int(params.get('lookback', 60))
+            horizon = int(params.get('horizon', 5))
+        except (TypeError, ValueError) as e:
+            return self._send(400, {'error': f"Niepoprawne parametry: {e}"})
+        if not tickers:
+            return self._send(400, {'error': "Podaj ticker albo tickers"})
+        if isinstance(params.get('tickers'), str) or not all(isinstance(t, str) for t in tickers):
+            return self._send(400, {'error': "tickers musi być listą napisów"})
+        if params.get('closes') is not None and not isinstance(params['closes'], dict):
+            return self._send(400, {'error': "closes musi być obiektem {ticker: lista kursów}"})
+
+        results = self.service.predict_many(tickers, lookback, horizon, params.get('closes'))
+        status = 200 if any('error' not in r for r in results) else 422
+        self._send(status, {'results': results,
+                            'latency_ms': round((time.perf_counter() - start) * 1000, 3)})
+
+    def _send(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Lokalna usługa prognoz LSTM (HTTP, JSON).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cache-size", type=int, default=16, help="liczba modeli w pamięci")
+    parser.add_argument("--max-batch", type=int, default=32, help="maks. żądań w jednym model.predict")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="czas zbierania partii [ms]")
+    parser.add_argument("--registry", help="katalog rejestru modeli (model_registry.py)")
+    args = parser.parse_args()
+
+    registry = None
+    if args.registry:
+        from model_registry import ModelRegistry
+        registry = ModelRegistry(args.registry)
+    ForecastService(cache_size=args.cache_size, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms,
+                    registry=registry).serve_forever(args.host, args.port)
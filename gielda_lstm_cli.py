@@ -0,0 +1,191 @@
+# gielda_lstm_cli.py
+
+"""
+Wiersz poleceń bez GUI (serwer, cron, scheduler):
+- train / predict / walk-forward / compare / indicators dla listy tickerów, backtest dla plików CSV
+- Wynik w JSON na stdout (albo JSON Lines – rekord na ticker zaraz po zakończeniu), komunikaty na stderr
+- Ta sama logika co w GUI (gielda_lstm_core)
+
+Przykłady:
+    python gielda_lstm_cli.py train AAPL MSFT PKN.WA --epochs 20
+    python gielda_lstm_cli.py predict AAPL MSFT --horizon 5 --jsonl
+    python gielda_lstm_cli.py indicators --tickers-file watchlista.txt --workers 4 -o wskazniki.json
+    python gielda_lstm_cli.py backtest prognozy/*.csv
+"""
+
+import argparse
+import contextlib
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import gielda_lstm_core as core
+from model_registry import ModelRegistry
+
+
+def _stderr_log(msg, level="info"):
+    print(msg, file=sys.stderr, flush=True)
+
+
+def _quiet_log(msg, level="info"):
+    pass
+
+
+# Polecenie -> (funkcja rdzenia, parametry przekazywane z argumentów)
+COMMANDS = {
+    "train": (core.train_model, ("lookback", "horizon", "epochs", "batch_size")),
+    "predict": (core.predict_future, ("lookback", "horizon", "alert_high", "alert_low",
+                                      "save_csv", "save_db", "save_chart", "output_dir")),
+    "walk-forward": (core.walk_forward_test, ("lookback", "horizon", "epochs", "output_dir")),
+    "compare": (core.compare_models, ("lookback", "horizon", "epochs", "output_dir")),
+    "indicators": (core.analyze_technical_indicators, ("save_csv", "output_dir")),
+    "backtest": (core.backtest_forecast_csv, ("output_dir",)),
+}
+
+DEFAULT_EPOCHS = {"train": 20, "walk-forward": 5, "compare": 10}
+
+
+def run_batch(command, items, workers=1, log=_stderr_log, on_result=None, **params):
+    """
+    Uruchom polecenie dla listy tickerów (lub plików CSV przy backteście).
+
+    Błąd jednego elementu nie przerywa partii – trafia do rekordu ze statusem 'error'.
+
+    Args:
+        command: klucz z COMMANDS
+        items: lista tickerów / plików
+        workers: liczba równoległych wątków (1 = po kolei)
+        log: funkcja komunikatów
+        on_result: opcjonalna funkcja wywoływana z każdym rekordem zaraz po jego zakończeniu
+        **params: parametry funkcji rdzenia
+
+    Returns:
+        lista rekordów {'item', 'status', 'seconds', 'result', 'error'} w kolejności items
+    """
+    func, _ = COMMANDS[command]
+
+    def run_one(item):
+        start = time.perf_counter()
+        record = {"item": item, "status": "ok", "seconds": None, "result": None, "error": None}
+        try:
+            record["result"] = func(item, log=log, **params)
+        except Exception as e:
+            record["status"] = "error"
+            record["error"] = f"{type(e).__name__}: {e}"
+            log(f"❌ {item}: {e}")
+        record["seconds"] = round(time.perf_counter() - start, 3)
+        if on_result is not None:
+            on_result(record)
+        return record
+
+    if workers <= 1 or len(items) <= 1:
+        return [run_one(item) for item in items]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="cli") as executor:
+        return list(executor.map(run_one, items))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="gielda_lstm_cli",
+        description="Prognozy LSTM kursów akcji bez GUI (wynik w JSON).",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("items", nargs="*", metavar="TICKER",
+                        help="tickery (dla backtest: pliki CSV z prognozą)")
+    common.add_argument("--tickers-file", help="plik z tickerami (jeden w linii, # = komentarz)")
+    common.add_argument("--workers", type=int, default=1, help="liczba równoległych tickerów (domyślnie 1)")
+    common.add_argument("-o", "--output", help="zapisz JSON do pliku zamiast na stdout")
+    common.add_argument("--jsonl", action="store_true",
+                        help="JSON Lines: rekord na ticker wypisywany zaraz po zakończeniu")
+    common.add_argument("--output-dir", help="katalog bazowy na CSV/wykresy/bazę (domyślnie katalog programu)")
+    common.add_argument("-q", "--quiet", action="store_true", help="bez komunikatów na stderr")
+
+    model = argparse.ArgumentParser(add_help=False)
+    model.add_argument("--lookback", type=int, default=60)
+    model.add_argument("--horizon", type=int, default=5)
+
+    for name in ("train", "walk-forward", "compare"):
+        p = sub.add_parser(name, parents=[common, model])
+        p.add_argument("--epochs", type=int, default=DEFAULT_EPOCHS[name])
+        if name == "train":
+            p.add_argument("--batch-size", type=int, default=32)
+            p.add_argument("--registry", help="katalog rejestru modeli (model_registry.py)")
+
+    p = sub.add_parser("predict", parents=[common, model])
+    p.add_argument("--alert-high", type=float)
+    p.add_argument("--alert-low", type=float)
+    p.add_argument("--no-csv", dest="save_csv", action="store_false")
+    p.add_argument("--no-db", dest="save_db", action="store_false")
+    p.add_argument("--no-chart", dest="save_chart", action="store_false")
+    p.add_argument("--registry", help="katalog rejestru modeli (gdy brak modelu w rejestrze – stare pliki)")
+
+    p = sub.add_parser("indicators", parents=[common])
+    p.add_argument("--no-csv", dest="save_csv", action="store_false")
+
+    sub.add_parser("backtest", parents=[common])
+    return parser
+
+
+def _read_items(args):
+    items = list(args.items)
+    if args.tickers_file:
+        with open(args.tickers_file, encoding="utf-8") as f:
+            items.extend(line.split("#")[0].strip() for line in f)
+    return [item for item in items if item]
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    items = _read_items(args)
+    if not items:
+        print("❌ Podaj tickery (lub pliki CSV) albo --tickers-file.", file=sys.stderr)
+        return 2
+
+    _, param_names = COMMANDS[args.command]
+    params = {name: getattr(args, name) for name in param_names}
+    log = _quiet_log if args.quiet else _stderr_log
+    registry = ModelRegistry(args.registry) if getattr(args, "registry", None) else None
+    call_params = dict(params, registry=registry) if registry is not None else params
+
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        on_result = None
+        if args.jsonl:
+            write_lock = threading.Lock()
+
+            def on_result(record):
+                line = json.dumps(record, ensure_ascii=False) + "\n"
+                with write_lock:
+                    out.write(line)
+                    out.flush()
+
+        start = time.perf_counter()
+        # print() z modułów (baza, Keras) idzie na stderr – stdout zostaje czystym JSON-em
+        with contextlib.redirect_stdout(sys.stderr):
+            records = run_batch(args.command, items, workers=args.workers, log=log,
+                                on_result=on_result, **call_params)
+        if not args.jsonl:
+            json.dump({
+                "command": args.command,
+                "params": dict(params, registry=getattr(args, "registry", None)),
+                "seconds": round(time.perf_counter() - start, 3),
+                "ok": sum(r["status"] == "ok" for r in records),
+                "failed": sum(r["status"] != "ok" for r in records),
+                "results": records,
+            }, out, ensure_ascii=False, indent=2)
+            out.write("\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if registry is not None:
+            registry.close()
+
+    return 0 if all(r["status"] == "ok" for r in records) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
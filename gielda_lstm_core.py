@@ -0,0 +1,722 @@
+# gielda_lstm_core.py
+
+"""
+Rdzeń programu bez GUI:
+- Trening, prognoza, walk-forward, porównanie modeli, wskaźniki i backtest
+- Funkcje zwracają słowniki z prostymi typami (gotowe do JSON), a błędy zgłaszają wyjątkami
+- Komunikaty przez parametr log (domyślnie print) – GUI przekazuje swoje okno logu,
+  CLI stderr, scheduler może podać własną funkcję
+"""
+
+import datetime as dt
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+import joblib
+
+from sklearn.preprocessing import MinMaxScaler
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# TensorFlow (opcjonalnie) – bez niego działają wskaźniki i backtest
+try:
+    from tensorflow.keras.models import Sequential, load_model
+    from tensorflow.keras.layers import LSTM, Dense, Dropout
+    TF_AVAILABLE = True
+except ImportError:
+    TF_AVAILABLE = False
+    Sequential = load_model = LSTM = Dense = Dropout = None
+
+try:
+    from model_comparison import ModelComparator
+except (ImportError, ModuleNotFoundError):
+    ModelComparator = None
+
+try:
+    from validation_metrics import WalkForwardValidator, UncertaintyIntervals
+except (ImportError, ModuleNotFoundError):
+    WalkForwardValidator = UncertaintyIntervals = None
+
+try:
+    from technical_indicators import TechnicalIndicators
+except (ImportError, ModuleNotFoundError):
+    TechnicalIndicators = None
+
+try:
+    from forecast_database import ForecastDatabase
+except (ImportError, ModuleNotFoundError):
+    ForecastDatabase = None
+
+try:
+    from advanced_visualization import ChartTemplateCache
+except (ImportError, ModuleNotFoundError):
+    ChartTemplateCache = None
+
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_SIZE = 0.2
+LSTM_ARCHITECTURE = "LSTM(50)-Dropout(0.2)-LSTM(50)-Dropout(0.2)-Dense(25)-Dense(horizon)"
+
+
+# =============== FUNKCJE POMOCNICZE ===============
+def create_sequences_multi(dataset, lookback, horizon):
+    """
+    Tworzy sekwencje dla wielodniowej predykcji:
+    X: sekwencje o długości lookback
+    y: wektor długości horizon (kolejne dni)
+    """
+    X, y = [], []
+    for i in range(lookback, len(dataset) - horizon + 1):
+        X.append(dataset[i - lookback:i, 0])        # wejście: lookback dni
+        y.append(dataset[i:i + horizon, 0])         # wyjście: horizon dni naprzód
+    X = np.array(X)
+    y = np.array(y)
+    X = np.reshape(X, (X.shape[0], X.shape[1], 1))  # (samples, timesteps, features)
+    return X, y
+
+
+def get_file_paths(ticker, lookback, horizon):
+    ticker_clean = ticker.upper().replace(".", "_")
+    model_path = f"model_{ticker_clean}_L{lookback}_H{horizon}.keras"
+    scaler_path = f"scaler_{ticker_clean}_L{lookback}_H{horizon}.pkl"
+    return model_path, scaler_path
+
+
+def download_close(ticker, days):
+    """
+    Pobierz kursy zamknięcia z Yahoo Finance.
+
+    Returns:
+        DataFrame z kolumnami Date, Close (bez braków)
+    """
+    end = dt.date.today()
+    start = end - dt.timedelta(days=days)
+    df = yf.download(ticker, start=start, end=end, progress=False)
+    if df.empty:
+        raise ValueError(f"Brak danych z Yahoo Finance dla {ticker}. Sprawdź symbol (np. AAPL, MSFT, PKN.WA, ^GSPC).")
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+    return df.reset_index()[["Date", "Close"]].dropna()
+
+
+def require_tf():
+    if not TF_AVAILABLE:
+        raise RuntimeError("TensorFlow nie jest zainstalowany. Uruchom: pip install tensorflow")
+
+
+def build_lstm_model(lookback, horizon):
+    """Model LSTM używany do treningu i walk-forward (opis: LSTM_ARCHITECTURE)."""
+    require_tf()
+    model = Sequential()
+    model.add(LSTM(50, return_sequences=True, input_shape=(lookback, 1)))
+    model.add(Dropout(0.2))
+    model.add(LSTM(50, return_sequences=False))
+    model.add(Dropout(0.2))
+    model.add(Dense(25))
+    model.add(Dense(horizon))  # tyle dni do przodu
+    model.compile(optimizer="adam", loss="mean_squared_error")
+    return model
+
+
+def split_train_test(scaled_data, lookback, horizon, test_size=TEST_SIZE):
+    """Podział chronologiczny + sekwencje: (X_train, y_train, X_test, y_test)."""
+    train_size = int((1 - test_size) * len(scaled_data))
+    train_data = scaled_data[:train_size]
+    test_data = scaled_data[train_size - lookback:]
+    X_train, y_train = create_sequences_multi(train_data, lookback, horizon)
+    X_test, y_test = create_sequences_multi(test_data, lookback, horizon)
+    return X_train, y_train, X_test, y_test
+
+
+def _output_path(output_dir, subdir, filename):
+    folder = os.path.join(output_dir or BASE_DIR, subdir)
+    os.makedirs(folder, exist_ok=True)
+    return os.path.join(folder, filename)
+
+
+def _dates(values):
+    return [pd.Timestamp(d).strftime("%Y-%m-%d") for d in values]
+
+
+# =============== TRENING MODELU ===============
+def train_model(ticker, lookback=60, horizon=5, epochs=20, batch_size=32, data=None, verbose=0,
+                registry=None, log=print):
+    """
+    Wytrenuj model LSTM i zapisz model + scaler (ścieżki z get_file_paths).
+
+    Args:
+        data: opcjonalny DataFrame Date/Close (domyślnie 5 lat z Yahoo Finance)
+        verbose: poziom logów Keras przy fit
+        registry: opcjonalny ModelRegistry – model trafia też do rejestru jako nowa wersja
+        log: funkcja komunikatów
+
+    Returns:
+        dict: ticker, lookback, horizon, epochs, model_path, scaler_path,
+              train_samples, test_samples, val_loss, test_loss, model_id, version
+    """
+    require_tf()
+    log(f"\n[1/5] Pobieram dane z Yahoo Finance dla {ticker} (ostatnie 5 lat)...")
+    df = download_close(ticker, 5 * 365) if data is None else data
+
+    log("[2/5] Przygotowuję dane...")
+    values = df[["Close"]].values  # (N, 1)
+    scaler = MinMaxScaler(feature_range=(0, 1))
+    scaled_data = scaler.fit_transform(values)
+    X_train, y_train, X_test, y_test = split_train_test(scaled_data, lookback, horizon)
+
+    log(f"X_train shape: {X_train.shape}")
+    log(f"y_train shape: {y_train.shape}")
+    log(f"X_test shape : {X_test.shape}")
+    log(f"y_test shape : {y_test.shape}")
+
+    log("[3/5] Buduję model LSTM...")
+    model = build_lstm_model(lookback, horizon)
+
+    log("[4/5] Trenuję model (to może chwilę potrwać)...")
+    history = model.fit(
+        X_train,
+        y_train,
+        epochs=epochs,
+        batch_size=batch_size,
+        validation_split=0.1,
+        verbose=verbose
+    )
+    test_loss = float(model.evaluate(X_test, y_test, verbose=0)) if len(X_test) else None
+
+    model_path, scaler_path = get_file_paths(ticker, lookback, horizon)
+
+    log("[5/5] Zapisuję model i scaler...")
+    model.save(model_path)
+    joblib.dump(scaler, scaler_path)
+
+    log("\n✅ Zakończono trening.")
+    log(f"Model zapisany jako:  {model_path}")
+    log(f"Scaler zapisany jako: {scaler_path}")
+    result = {
+        "ticker": ticker.upper(),
+        "lookback": lookback,
+        "horizon": horizon,
+        "epochs": epochs,
+        "model_path": model_path,
+        "scaler_path": scaler_path,
+        "train_samples": int(len(X_train)),
+        "test_samples": int(len(X_test)),
+        "val_loss": float(history.history["val_loss"][-1]),
+        "test_loss": test_loss,
+        "model_id": None,
+        "version": None,
+    }
+
+    if registry is not None:
+        record = registry.register(
+            ticker, lookback, horizon, model_path, scaler_path,
+            architecture=LSTM_ARCHITECTURE,
+            train_start=pd.Timestamp(df["Date"].iloc[0]).date(),
+            train_end=pd.Timestamp(df["Date"].iloc[-1]).date(),
+            metrics={"val_loss": result["val_loss"], "test_loss": test_loss},
+            params={"epochs": epochs, "batch_size": batch_size, "test_size": TEST_SIZE,
+                    "train_samples": result["train_samples"], "test_samples": result["test_samples"]},
+        )
+        result["model_id"] = record["id"]
+        result["version"] = record["version"]
+        log(f"📦 Model w rejestrze: ID {record['id']}, wersja {record['version']}")
+    return result
+
+
+# =============== PROGNOZA Z ZAPISANEGO MODELU ===============
+def predict_future(ticker, lookback=60, horizon=5, alert_high=None, alert_low=None, data=None,
+                   save_csv=True, save_db=True, save_chart=True, output_dir=None, batcher=None,
+                   registry=None, log=print):
+    """
+    Prognoza z zapisanego modelu (+ przedziały ufności, alerty, zapis CSV / bazy / wykresu).
+
+    Args:
+        alert_high, alert_low: progi dla ostatniego dnia prognozy
+        data: opcjonalny DataFrame Date/Close (domyślnie 2 lata z Yahoo Finance)
+        save_csv, save_db, save_chart: które artefakty zapisać
+        output_dir: katalog bazowy dla 'prognozy', 'wykresy' i bazy (domyślnie katalog programu)
+        batcher: opcjonalny PredictionBatcher wspólny dla równoległych wywołań (np. scheduler) –
+                 równoczesne prognozy z tego samego pliku modelu idą jednym model.predict,
+                 a model nie jest wczytywany przy każdej prognozie
+        registry: opcjonalny ModelRegistry – najnowsza wersja z rejestru, a gdy jej brak, stare pliki
+        log: funkcja komunikatów
+
+    Returns:
+        dict: ticker, dates, forecast, lower, upper, alerts, history, csv_path, chart_path,
+              forecast_id, model_id
+    """
+    require_tf()
+    model_id = None
+    if registry is None:
+        model_path, scaler_path = get_file_paths(ticker, lookback, horizon)
+    else:
+        model_path, scaler_path, record = registry.resolve(ticker, lookback, horizon)
+        model_id = record["id"] if record else None
+    if not os.path.exists(model_path) or not os.path.exists(scaler_path):
+        raise FileNotFoundError(
+            f"Nie znaleziono modelu lub scalera dla tych parametrów ({model_path}, {scaler_path}). "
+            "Najpierw uruchom trening z tym samym tickerem / LOOKBACK / HORIZON."
+        )
+
+    log(f"\n[1/4] Wczytuję model i scaler dla {ticker}...")
+    # Z batcherem model zostaje w pamięci przy kolejce tej konfiguracji – wczytywany
+    # ponownie tylko gdy zmieni się plik (retrening, nowa wersja w rejestrze)
+    batch_key = (ticker.upper(), lookback, horizon)
+    version = (model_path, os.path.getmtime(model_path))
+    model = batcher.model(batch_key, version) if batcher is not None else None
+    if model is None:
+        model = load_model(model_path)
+    scaler = joblib.load(scaler_path)
+
+    log("[2/4] Pobieram najnowsze dane z Yahoo Finance...")
+    df = download_close(ticker, 365 * 2) if data is None else data  # ostatnie 2 lata
+    values = df[["Close"]].values
+    if len(values) < lookback:
+        raise ValueError("Za mało danych, żeby zbudować sekwencję wejściową.")
+
+    last_seq = scaler.transform(values[-lookback:]).reshape(1, lookback, 1)
+
+    log("[3/4] Liczę prognozę...")
+    if batcher is None:
+        pred_scaled = model.predict(last_seq, verbose=0)
+    else:
+        pred_scaled = batcher.predict(batch_key, model, last_seq[0], version=version)
+    pred_scaled = np.asarray(pred_scaled).reshape(-1, 1)  # (horizon, 1)
+    pred_prices = scaler.inverse_transform(pred_scaled).flatten()
+
+    log(f"\n📈 Prognoza na kolejne {len(pred_prices)} dni dla {ticker.upper()}:")
+    for i, price in enumerate(pred_prices, start=1):
+        log(f"D+{i}: {price:.2f}")
+
+    # ======== UNCERTAINTY INTERVALS =========
+    lower_interval = upper_interval = None
+    try:
+        # Dla uncertainty intervals: używamy ostatnich 30 dni jako proxy na błędy
+        last_30_prices = values[-min(30, len(values)):]
+        recent_errors = np.diff(last_30_prices).flatten()
+        # Jeśli mamy bardzo mało danych, używamy średniej z pełnych danych
+        if len(recent_errors) < 5:
+            recent_errors = np.random.normal(0, np.std(values) * 0.01, 30)
+
+        lower_interval, upper_interval = UncertaintyIntervals.calculate_prediction_intervals(
+            pred_prices, recent_errors, confidence=0.95
+        )
+        log(f"\n🎯 Przedziały ufności (95%):")
+        for i, (price, lower, upper) in enumerate(zip(pred_prices, lower_interval, upper_interval), start=1):
+            log(f"D+{i}: {price:.2f} [{lower:.2f}, {upper:.2f}]")
+    except Exception as e_interval:
+        log(f"⚠️ Nie udało się obliczyć przedziałów ufności: {e_interval}")
+
+    # ======== ALERT NA OSTATNI DZIEŃ (D+HORYZONT) =========
+    alerts = []
+    last_day_index = len(pred_prices)
+    last_day_price = pred_prices[-1]
+    if alert_high is not None and last_day_price > alert_high:
+        alerts.append(f"🔔 ALERT: prognoza D+{last_day_index} "
+                      f"({last_day_price:.2f}) jest POWYŻEJ progu {alert_high:.2f}")
+    if alert_low is not None and last_day_price < alert_low:
+        alerts.append(f"🔔 ALERT: prognoza D+{last_day_index} "
+                      f"({last_day_price:.2f}) jest PONIŻEJ progu {alert_low:.2f}")
+    for msg in alerts:
+        log(msg)
+
+    # ======== WYLICZENIE DAT PRZYSZŁYCH =========
+    last_n = min(100, len(df))
+    start_future = pd.Timestamp(df["Date"].iloc[-1]) + pd.Timedelta(days=1)
+    future_dates = pd.date_range(start_future, periods=len(pred_prices))
+
+    result = {
+        "ticker": ticker.upper(),
+        "lookback": lookback,
+        "horizon": horizon,
+        "dates": _dates(future_dates),
+        "forecast": pred_prices.tolist(),
+        "lower": None if lower_interval is None else np.asarray(lower_interval).tolist(),
+        "upper": None if upper_interval is None else np.asarray(upper_interval).tolist(),
+        "alerts": alerts,
+        "history": {
+            "dates": _dates(df["Date"].values[-last_n:]),
+            "close": np.asarray(df["Close"].values[-last_n:], dtype=float).tolist(),
+        },
+        "csv_path": None,
+        "chart_path": None,
+        "forecast_id": None,
+        "model_id": model_id,
+    }
+
+    # ======== ZAPIS PROGNOZY DO CSV =========
+    if save_csv:
+        try:
+            now_str = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
+            today_str = dt.date.today().isoformat()
+            filepath_csv = _output_path(output_dir, "prognozy",
+                                        f"{ticker.upper()}_{today_str}_{len(pred_prices)}dni_{now_str}.csv")
+            pd.DataFrame({
+                "ticker": [ticker.upper()] * len(pred_prices),
+                "date": future_dates,
+                "day_offset": list(range(1, len(pred_prices) + 1)),
+                "forecast": pred_prices
+            }).to_csv(filepath_csv, index=False)
+            result["csv_path"] = filepath_csv
+            log(f"📄 Prognoza zapisana do CSV: {filepath_csv}")
+        except Exception as e_csv:
+            log(f"⚠️ Nie udało się zapisać prognozy do CSV: {e_csv}")
+
+    # ======== ZAPIS DO BAZY DANYCH =========
+    if save_db:
+        try:
+            if ForecastDatabase is not None:
+                db_path = os.path.join(output_dir or BASE_DIR, "forecast_history.db")
+                with ForecastDatabase(db_path) as db:
+                    result["forecast_id"] = db.add_forecast(
+                        ticker=ticker.upper(),
+                        days_ahead=len(pred_prices),
+                        forecast_prices=result["forecast"],
+                        lower_bounds=result["lower"],
+                        upper_bounds=result["upper"],
+                        model_type="LSTM",
+                        lookback=lookback,
+                        horizon=horizon
+                    )
+                    log(f"💾 Prognoza zapisana w bazie danych (ID: {result['forecast_id']})")
+
+                    # Progi zapamiętane dla zbiorczych alertów po partiach prognoz
+                    if alert_high is not None or alert_low is not None:
+                        db.set_alert_threshold(ticker.upper(), above_price=alert_high, below_price=alert_low)
+            else:
+                log("⚠️ Moduł forecast_database niedostępny - baza danych nie wrzyta")
+        except Exception as e_db:
+            log(f"⚠️ Nie udało się zapisać prognozy w bazie danych: {e_db}")
+
+    # ======== WYKRES DO PLIKU PNG (bez GUI) =========
+    if save_chart:
+        try:
+            today_str = dt.date.today().isoformat()
+            filepath_png = _output_path(output_dir, "wykresy",
+                                        f"{ticker.upper()}_{today_str}_{len(pred_prices)}dni.png")
+            save_forecast_chart(result, filepath_png)
+            result["chart_path"] = filepath_png
+            log(f"💾 Wykres zapisany jako: {filepath_png}")
+        except Exception as e_plot:
+            log(f"⚠️ Nie udało się narysować lub zapisać wykresu: {e_plot}")
+
+    return result
+
+
+_chart_templates = threading.local()  # ChartTemplateCache na wątek (figury nie są współdzielone)
+
+
+def save_forecast_chart(result, path, dpi=150):
+    """
+    Zapisz wykres wyniku predict_future do pliku PNG. Figura jest szablonem wielokrotnego
+    użytku (ChartTemplateCache) – kolejne prognozy w tym samym wątku podmieniają tylko dane.
+    """
+    if ChartTemplateCache is None:
+        fig = Figure(figsize=(12, 6))
+        FigureCanvasAgg(fig)
+        draw_forecast(fig.add_subplot(1, 1, 1), result)
+        fig.tight_layout()
+        fig.savefig(path, dpi=dpi)
+        fig.clear()
+        return path
+
+    templates = getattr(_chart_templates, "cache", None)
+    if templates is None or templates.dpi != dpi:
+        templates = _chart_templates.cache = ChartTemplateCache(dpi=dpi)
+    history_dates = pd.to_datetime(result["history"]["dates"]).to_pydatetime()
+    future_dates = pd.to_datetime(result["dates"]).to_pydatetime()
+    return templates.render_forecast(
+        np.concatenate([history_dates, future_dates]), result["history"]["close"], result["forecast"],
+        result["lower"], result["upper"], result["ticker"], path,
+        title=f"Prognoza kursu {result['ticker']} na {len(result['forecast'])} dni naprzód",
+        figsize=(12, 6),
+    )
+
+
+def draw_forecast(ax, result):
+    """Narysuj wynik predict_future na podanych osiach (plik PNG albo okno GUI)."""
+    future_dates = pd.to_datetime(result["dates"])
+    ax.plot(pd.to_datetime(result["history"]["dates"]), result["history"]["close"],
+            label="Historia (Close)", color="blue", linewidth=2)
+    ax.plot(future_dates, result["forecast"], label="Prognoza", color="red", marker="o", linewidth=2)
+    if result["lower"] is not None:
+        ax.fill_between(future_dates, result["lower"], result["upper"],
+                        alpha=0.2, color="red", label="95% przedział ufności")
+    ax.set_title(f"Prognoza kursu {result['ticker']} na {len(result['forecast'])} dni naprzód")
+    ax.set_xlabel("Data")
+    ax.set_ylabel("Cena")
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+
+
+# =============== ANALIZA WSKAŹNIKÓW TECHNICZNYCH ===============
+def analyze_technical_indicators(ticker, data=None, save_csv=True, output_dir=None, log=print):
+    """
+    Oblicz wskaźniki techniczne (RSI, MACD, Bollinger, SMA) i sygnały.
+
+    Returns:
+        dict: ticker, close, rsi, rsi_state, macd, sma20, sma50, bb_lower, bb_upper, signals, csv_path
+    """
+    if TechnicalIndicators is None:
+        raise RuntimeError("Brak modułu technical_indicators.")
+
+    log(f"Pobieranie danych dla {ticker}...")
+    df = download_close(ticker, 365) if data is None else data  # ostatni rok
+    close_prices = np.asarray(df["Close"].values, dtype=float)
+
+    log("\nObliczam wskaźniki techniczne...")
+    rsi = TechnicalIndicators.calculate_rsi(close_prices, period=14)
+    macd, signal, hist = TechnicalIndicators.calculate_macd(close_prices)
+    bb_upper, bb_mid, bb_lower = TechnicalIndicators.calculate_bollinger_bands(close_prices)
+    sma20 = TechnicalIndicators.calculate_sma(close_prices, period=20)
+    sma50 = TechnicalIndicators.calculate_sma(close_prices, period=50)
+
+    last_close = close_prices[-1]
+    last_rsi = rsi[-1]
+    last_sma20 = sma20[-1]
+    last_sma50 = sma50[-1]
+
+    if last_rsi < 30:
+        rsi_state = "oversold"
+    elif last_rsi > 70:
+        rsi_state = "overbought"
+    else:
+        rsi_state = "neutral"
+
+    signals = []
+    if last_close > last_sma20 > last_sma50:
+        signals.append("✅ Trend wzrostu (Close > SMA20 > SMA50)")
+    elif last_close < last_sma20 < last_sma50:
+        signals.append("⚠️ Trend spadku (Close < SMA20 < SMA50)")
+    if rsi_state == "oversold":
+        signals.append("✅ Sygnał kupna: Oversold (RSI < 30)")
+    elif rsi_state == "overbought":
+        signals.append("⚠️ Sygnał sprzedaży: Overbought (RSI > 70)")
+
+    rsi_label = {"oversold": " ⚠️ OVERSOLD", "overbought": " ⚠️ OVERBOUGHT", "neutral": " (neutralny)"}
+    log(f"\n📊 Bieżące wskaźniki dla {ticker.upper()}:")
+    log(f"   Cena zamknięcia: {last_close:.2f}")
+    log(f"   RSI(14): {last_rsi:.2f}{rsi_label[rsi_state]}")
+    log(f"   MACD: {macd[-1]:.6f}")
+    log(f"   SMA(20): {last_sma20:.2f}")
+    log(f"   SMA(50): {last_sma50:.2f}")
+    log(f"   Bollinger Bands: [{bb_lower[-1]:.2f}, {bb_upper[-1]:.2f}]")
+    log(f"\n🎯 Sygnały techniczne:")
+    for s in signals:
+        log(f"   {s}")
+
+    result = {
+        "ticker": ticker.upper(),
+        "close": float(last_close),
+        "rsi": float(last_rsi),
+        "rsi_state": rsi_state,
+        "macd": float(macd[-1]),
+        "sma20": float(last_sma20),
+        "sma50": float(last_sma50),
+        "bb_lower": float(bb_lower[-1]),
+        "bb_upper": float(bb_upper[-1]),
+        "signals": signals,
+        "csv_path": None,
+    }
+
+    if save_csv:
+        try:
+            today_str = dt.date.today().isoformat()
+            filepath = _output_path(output_dir, "wskazniki", f"wskazniki_{ticker}_{today_str}.csv")
+            pd.DataFrame({
+                "Date": df["Date"].values,
+                "Close": close_prices,
+                "RSI": rsi,
+                "MACD": macd,
+                "MACD_Signal": signal,
+                "SMA20": sma20,
+                "SMA50": sma50,
+                "BB_Upper": bb_upper,
+                "BB_Lower": bb_lower
+            }).to_csv(filepath, index=False)
+            result["csv_path"] = filepath
+            log(f"\n📄 Wskaźniki zapisane do: {filepath}")
+        except Exception as e_save:
+            log(f"⚠️ Nie udało się zapisać wskaźników: {e_save}")
+
+    return result
+
+
+# =============== PORÓWNANIE MODELI ===============
+def compare_models(ticker, lookback=60, horizon=5, epochs=10, data=None, output_dir=None, log=print):
+    """
+    Porównaj architektury modeli (ModelComparator) i zapisz raport CSV.
+
+    Returns:
+        dict: ticker, best_model, best_rmse, results (lista rekordów), report_path
+    """
+    if ModelComparator is None:
+        raise RuntimeError("Brak modułu model_comparison.")
+
+    log(f"Pobieranie danych dla {ticker}...")
+    df = download_close(ticker, 5 * 365) if data is None else data
+    scaler = MinMaxScaler(feature_range=(0, 1))
+    scaled_data = scaler.fit_transform(df[["Close"]].values)
+    X_train, y_train, X_test, y_test = split_train_test(scaled_data, lookback, horizon)
+    log(f"Dane przygotowane: X_train={X_train.shape}, X_test={X_test.shape}")
+
+    comparator = ModelComparator(lookback, horizon)
+    comparator.compare_all_models(X_train, y_train, X_test, y_test, epochs=epochs)
+    df_results = comparator.get_results_dataframe()
+
+    today_str = dt.date.today().isoformat()
+    report_path = _output_path(output_dir, "porownania", f"porownanie_modeli_{ticker}_{today_str}.csv")
+    df_results.to_csv(report_path)
+
+    log(f"\n✅ Raport porównania modeli:")
+    log(df_results.to_string())
+    log(f"📄 Zapisano do: {report_path}")
+    return {
+        "ticker": ticker.upper(),
+        "best_model": str(df_results.index[0]),
+        "best_rmse": float(df_results.iloc[0]["RMSE"]),
+        "results": df_results.reset_index().rename(columns={"index": "model"}).to_dict(orient="records"),
+        "report_path": report_path,
+    }
+
+
+# =============== WALK-FORWARD TESTING ===============
+def walk_forward_test(ticker, lookback=60, horizon=5, epochs=5, data=None, output_dir=None, log=print):
+    """
+    Walk-forward testing modelu LSTM.
+
+    Returns:
+        dict: ticker, sequences, metrics (RMSE, MAE, MAPE, Directional_Accuracy), report_path
+    """
+    if WalkForwardValidator is None:
+        raise RuntimeError("Brak modułu validation_metrics.")
+    require_tf()
+
+    log(f"Pobieranie danych dla {ticker}...")
+    df = download_close(ticker, 5 * 365) if data is None else data
+    scaler = MinMaxScaler(feature_range=(0, 1))
+    scaled_data = scaler.fit_transform(df[["Close"]].values)
+    X_full, y_full = create_sequences_multi(scaled_data, lookback, horizon)
+    log(f"Dane przygotowane: {len(X_full)} sekwencji")
+
+    validator = WalkForwardValidator(lambda: build_lstm_model(lookback, horizon), scaler)
+    wf = validator.run_walk_forward(X_full, y_full, lookback, horizon,
+                                    initial_train_size=0.7, step_size=1,
+                                    epochs=epochs, verbose=True)
+    metrics = {k: float(v) for k, v in wf["metrics"].items()}
+
+    log(f"\n✅ Walk-Forward Testing wyniki:")
+    log(f"   RMSE: {metrics['RMSE']:.6f}")
+    log(f"   MAE: {metrics['MAE']:.6f}")
+    log(f"   MAPE: {metrics['MAPE']:.2f}%")
+    log(f"   Directional Accuracy: {metrics['Directional_Accuracy']*100:.1f}%")
+
+    today_str = dt.date.today().isoformat()
+    wf_path = _output_path(output_dir, "walk_forward", f"walk_forward_{ticker}_{today_str}.csv")
+    validator.get_results_dataframe().to_csv(wf_path, index=False)
+    log(f"📄 Szczegóły zapisane do: {wf_path}")
+    return {
+        "ticker": ticker.upper(),
+        "sequences": int(len(X_full)),
+        "metrics": metrics,
+        "report_path": wf_path,
+    }
+
+
+# =============== BACKTEST: PROGNOZA vs RZECZYWISTOŚĆ ===============
+def backtest_forecast_csv(file_path, real_data=None, output_dir=None, log=print):
+    """
+    Porównaj plik prognozy (CSV z predict_future) z rzeczywistymi kursami.
+
+    Args:
+        file_path: CSV z kolumnami ticker, date, forecast
+        real_data: opcjonalny DataFrame Date/Close (domyślnie Yahoo Finance dla zakresu prognozy)
+
+    Returns:
+        dict: ticker, file, points, avg_abs_pct_error, max_abs_pct_error, rows, csv_path
+    """
+    df_forecast = pd.read_csv(file_path)
+
+    # oczekiwane kolumny z naszego generatora prognoz
+    required_cols = {"ticker", "date", "forecast"}
+    if not required_cols.issubset(df_forecast.columns):
+        raise ValueError("Plik nie zawiera wymaganych kolumn: 'ticker', 'date', 'forecast'.")
+
+    df_forecast["date"] = pd.to_datetime(df_forecast["date"]).dt.date
+
+    # zakładamy jeden ticker w pliku
+    ticker = str(df_forecast["ticker"].iloc[0]).upper()
+    log(f"🔍 Ticker z pliku prognozy: {ticker}")
+
+    # bierzemy tylko te daty, które już minęły (lub są dziś)
+    df_past = df_forecast[df_forecast["date"] <= dt.date.today()].copy()
+    if df_past.empty:
+        raise ValueError("Żadna data prognozy jeszcze nie nastąpiła – brak danych do porównania.")
+
+    start_date = df_past["date"].min()
+    end_date = df_past["date"].max()
+    log(f"📆 Zakres dat do porównania: {start_date} – {end_date}")
+
+    if real_data is None:
+        log("⬇️ Pobieram rzeczywiste dane z Yahoo Finance...")
+        df_real = yf.download(
+            ticker,
+            start=start_date,
+            end=end_date + dt.timedelta(days=1),  # end w yfinance jest ekskluzywne
+            progress=False
+        )
+        if df_real.empty:
+            raise ValueError("Nie udało się pobrać rzeczywistych danych z Yahoo Finance.")
+        if isinstance(df_real.columns, pd.MultiIndex):
+            df_real.columns = df_real.columns.get_level_values(0)
+        df_real = df_real.reset_index()
+    else:
+        df_real = real_data.copy()
+
+    df_real["Date"] = pd.to_datetime(df_real["Date"]).dt.date
+    df_real = df_real[["Date", "Close"]].rename(columns={"Date": "date", "Close": "real"})
+
+    # łączymy prognozę z realnymi danymi po dacie
+    df_merge = pd.merge(df_past, df_real, on="date", how="inner")
+    if df_merge.empty:
+        raise ValueError("Nie znaleziono wspólnych dat między prognozą a danymi rzeczywistymi.")
+
+    df_merge["diff"] = df_merge["real"] - df_merge["forecast"]
+    df_merge["abs_diff"] = df_merge["diff"].abs()
+    df_merge["pct_error"] = df_merge["diff"] / df_merge["real"] * 100.0
+    df_merge["abs_pct_error"] = df_merge["pct_error"].abs()
+
+    avg_abs_pct_error = float(df_merge["abs_pct_error"].mean())
+    max_abs_pct_error = float(df_merge["abs_pct_error"].max())
+
+    log("\n📊 Podsumowanie backtestu:")
+    log(f"   Liczba punktów porównania: {len(df_merge)}")
+    log(f"   Średni bezwzględny błąd procentowy: {avg_abs_pct_error:.2f}%")
+    log(f"   Maksymalny bezwzględny błąd procentowy: {max_abs_pct_error:.2f}%")
+
+    result = {
+        "ticker": ticker,
+        "file": file_path,
+        "points": int(len(df_merge)),
+        "avg_abs_pct_error": avg_abs_pct_error,
+        "max_abs_pct_error": max_abs_pct_error,
+        "rows": [
+            {"date": d.isoformat(), "forecast": float(f), "real": float(r), "pct_error": float(p)}
+            for d, f, r, p in zip(df_merge["date"], df_merge["forecast"], df_merge["real"], df_merge["pct_error"])
+        ],
+        "csv_path": None,
+    }
+
+    try:
+        now_str = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
+        filepath_bt = _output_path(output_dir, "backtesty", f"BACKTEST_{ticker}_{now_str}.csv")
+        df_merge.to_csv(filepath_bt, index=False)
+        result["csv_path"] = filepath_bt
+        log(f"📄 Szczegóły backtestu zapisane do: {filepath_bt}")
+    except Exception as e_bt_save:
+        log(f"⚠️ Nie udało się zapisać szczegółów backtestu do CSV: {e_bt_save}")
+
+    return result
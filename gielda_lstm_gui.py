@@ -1,17 +1,15 @@
 # gielda_lstm_gui.py
 
-import datetime as dt
 import os
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 
-import numpy as np
 import pandas as pd
-import yfinance as yf
-import joblib
 import matplotlib.pyplot as plt
 
-from sklearn.preprocessing import MinMaxScaler
+# Logika programu (trening, prognoza, backtest...) – wspólna z gielda_lstm_cli.py
+import gielda_lstm_core as core
+from gielda_lstm_core import TF_AVAILABLE
 
 # Nowoczesny UI theme
 try:
@@ -20,15 +18,6 @@ try:
 except ImportError:
     UI_MODERN = False
 
-# TensorFlow - importuj później jeśli potrzebny
-try:
-    from tensorflow.keras.models import Sequential, load_model
-    from tensorflow.keras.layers import LSTM, Dense, Dropout
-    TF_AVAILABLE = True
-except ImportError:
-    TF_AVAILABLE = False
-    Sequential = load_model = LSTM = Dense = Dropout = None
-
 # Importy z nowych modułów - OPCJONALNE (mogą być niedostępne)
 try:
     from model_comparison import ModelComparator, reshape_for_dense
@@ -104,30 +93,6 @@ def log(msg: str, level="info"):
         output_text.update_idletasks()
 
 
-# =============== FUNKCJE POMOCNICZE ===============
-def create_sequences_multi(dataset, lookback, horizon):
-    """
-    Tworzy sekwencje dla wielodniowej predykcji:
-    X: sekwencje o długości lookback
-    y: wektor długości horizon (kolejne dni)
-    """
-    X, y = [], []
-    for i in range(lookback, len(dataset) - horizon + 1):
-        X.append(dataset[i - lookback:i, 0])        # wejście: lookback dni
-        y.append(dataset[i:i + horizon, 0])         # wyjście: horizon dni naprzód
-    X = np.array(X)
-    y = np.array(y)
-    X = np.reshape(X, (X.shape[0], X.shape[1], 1))  # (samples, timesteps, features)
-    return X, y
-
-
-def get_file_paths(ticker, lookback, horizon):
-    ticker_clean = ticker.upper().replace(".", "_")
-    model_path = f"model_{ticker_clean}_L{lookback}_H{horizon}.keras"
-    scaler_path = f"scaler_{ticker_clean}_L{lookback}_H{horizon}.pkl"
-    return model_path, scaler_path
-
-
 # =============== TRENING MODELU ===============
 def train_model(ticker, lookback=60, horizon=5, epochs=20, batch_size=32):
     try:
@@ -136,70 +101,9 @@ def train_model(ticker, lookback=60, horizon=5, epochs=20, batch_size=32):
             log("Uruchom: pip install tensorflow")
             messagebox.showerror("Błąd", "TensorFlow nie jest zainstalowany.")
             return
-            
-        log(f"\n[1/5] Pobieram dane z Yahoo Finance dla {ticker} (ostatnie 5 lat)...")
-        end = dt.date.today()
-        start = end - dt.timedelta(days=5 * 365)
-
-        df = yf.download(ticker, start=start, end=end)
-
-        if df.empty:
-            log("❌ Brak danych. Sprawdź symbol (np. AAPL, MSFT, PKN.WA, ^GSPC).")
-            messagebox.showerror("Błąd", "Brak danych z Yahoo Finance dla podanego tickera.")
-            return
-
-        df = df.reset_index()
-        df = df[["Date", "Close"]].dropna()
-
-        log("[2/5] Przygotowuję dane...")
-        data = df[["Close"]].values  # (N, 1)
-
-        scaler = MinMaxScaler(feature_range=(0, 1))
-        scaled_data = scaler.fit_transform(data)
-
-        TEST_SIZE = 0.2
-        train_size = int((1 - TEST_SIZE) * len(scaled_data))
-        train_data = scaled_data[:train_size]
-        test_data = scaled_data[train_size - lookback:]
-
-        X_train, y_train = create_sequences_multi(train_data, lookback, horizon)
-        X_test, y_test = create_sequences_multi(test_data, lookback, horizon)
-
-        log(f"X_train shape: {X_train.shape}")
-        log(f"y_train shape: {y_train.shape}")
-        log(f"X_test shape : {X_test.shape}")
-        log(f"y_test shape : {y_test.shape}")
-
-        log("[3/5] Buduję model LSTM...")
-        model = Sequential()
-        model.add(LSTM(50, return_sequences=True, input_shape=(lookback, 1)))
-        model.add(Dropout(0.2))
-        model.add(LSTM(50, return_sequences=False))
-        model.add(Dropout(0.2))
-        model.add(Dense(25))
-        model.add(Dense(horizon))  # tyle dni do przodu
-
-        model.compile(optimizer="adam", loss="mean_squared_error")
-
-        log("[4/5] Trenuję model (to może chwilę potrwać)...")
-        model.fit(
-            X_train,
-            y_train,
-            epochs=epochs,
-            batch_size=batch_size,
-            validation_split=0.1,
-            verbose=1
-        )
-
-        model_path, scaler_path = get_file_paths(ticker, lookback, horizon)
 
-        log("[5/5] Zapisuję model i scaler...")
-        model.save(model_path)
-        joblib.dump(scaler, scaler_path)
-
-        log("\n✅ Zakończono trening.")
-        log(f"Model zapisany jako:  {model_path}")
-        log(f"Scaler zapisany jako: {scaler_path}")
+        core.train_model(ticker, lookback=lookback, horizon=horizon, epochs=epochs,
+                         batch_size=batch_size, verbose=1, log=log)
         messagebox.showinfo("Sukces", "Trening zakończony i zapisany.")
     except Exception as e:
         log(f"❌ Błąd podczas treningu: {e}")
@@ -209,11 +113,11 @@ def train_model(ticker, lookback=60, horizon=5, epochs=20, batch_size=32):
 # =============== PROGNOZA Z ZAPISANEGO MODELU ===============
 def predict_future(ticker, lookback=60, horizon=5, alert_high=None, alert_low=None):
     try:
-        model_path, scaler_path = get_file_paths(ticker, lookback, horizon)
-
-        if not os.path.exists(model_path) or not os.path.exists(scaler_path):
-            log("\n❌ Nie znaleziono modelu lub scalera dla tych parametrów.")
-            log(f"Szukane pliki: {model_path}, {scaler_path}")
+        try:
+            result = core.predict_future(ticker, lookback=lookback, horizon=horizon,
+                                         alert_high=alert_high, alert_low=alert_low, log=log)
+        except FileNotFoundError as e:
+            log(f"\n❌ {e}")
             messagebox.showwarning(
                 "Brak modelu",
                 "Nie znaleziono modelu dla tych ustawień.\n"
@@ -221,171 +125,24 @@ def predict_future(ticker, lookback=60, horizon=5, alert_high=None, alert_low=No
             )
             return
 
-        log(f"\n[1/4] Wczytuję model i scaler dla {ticker}...")
-        model = load_model(model_path)
-        scaler = joblib.load(scaler_path)
-
-        log("[2/4] Pobieram najnowsze dane z Yahoo Finance...")
-        end = dt.date.today()
-        start = end - dt.timedelta(days=365 * 2)  # ostatnie 2 lata
-
-        df = yf.download(ticker, start=start, end=end).reset_index()
-        if df.empty:
-            log("❌ Brak danych. Sprawdź symbol.")
-            messagebox.showerror("Błąd", "Brak danych z Yahoo Finance dla podanego tickera.")
-            return
-
-        df = df[["Date", "Close"]].dropna()
-        data = df[["Close"]].values
-        scaled_data = scaler.transform(data)
+        for msg in result["alerts"]:
+            title = ("Alert – próg górny przekroczony" if "POWYŻEJ" in msg
+                     else "Alert – próg dolny przekroczony")
+            messagebox.showinfo(title, msg)
 
-        if len(scaled_data) < lookback:
-            log("❌ Za mało danych, żeby zbudować sekwencję wejściową.")
-            messagebox.showerror("Błąd", "Za mało danych do prognozy.")
-            return
-
-        last_seq = scaled_data[-lookback:]
-        last_seq = last_seq.reshape(1, lookback, 1)
-
-        log("[3/4] Liczę prognozę...")
-        pred_scaled = model.predict(last_seq)  # (1, horizon)
-        pred_scaled = pred_scaled.reshape(-1, 1)
-        pred_prices = scaler.inverse_transform(pred_scaled).flatten()
-
-        log(f"\n📈 Prognoza na kolejne {len(pred_prices)} dni dla {ticker.upper()}:")
-        for i, price in enumerate(pred_prices, start=1):
-            log(f"D+{i}: {price:.2f}")
-
-        # ======== UNCERTAINTY INTERVALS =========
+        # Wykres w oknie (plik PNG zapisał już core)
+        fig = None
         try:
-            # Dla uncertainty intervals: używamy ostatnich 30 dni jako proxy na błędy
-            last_30_prices = data[-min(30, len(data)):]
-            recent_errors = np.diff(last_30_prices).flatten()
-            # Jeśli mamy bardzo mało danych, używamy średniej z pełnych danych
-            if len(recent_errors) < 5:
-                recent_errors = np.random.normal(0, np.std(data) * 0.01, 30)
-            
-            lower_interval, upper_interval = UncertaintyIntervals.calculate_prediction_intervals(
-                pred_prices, recent_errors, confidence=0.95
-            )
-            
-            log(f"\n🎯 Przedziały ufności (95%):")
-            for i, (price, lower, upper) in enumerate(zip(pred_prices, lower_interval, upper_interval), start=1):
-                log(f"D+{i}: {price:.2f} [{lower:.2f}, {upper:.2f}]")
-        except Exception as e_interval:
-            log(f"⚠️ Nie udało się obliczyć przedziałów ufności: {e_interval}")
-
-        # ======== ALERT NA OSTATNI DZIEŃ (D+HORYZONT) =========
-        last_day_index = len(pred_prices)  # np. 5 przy horyzoncie 5
-        last_day_price = pred_prices[-1]
-
-        if alert_high is not None and last_day_price > alert_high:
-            msg = (f"🔔 ALERT: prognoza D+{last_day_index} "
-                   f"({last_day_price:.2f}) jest POWYŻEJ progu {alert_high:.2f}")
-            log(msg)
-            messagebox.showinfo("Alert – próg górny przekroczony", msg)
-
-        if alert_low is not None and last_day_price < alert_low:
-            msg = (f"🔔 ALERT: prognoza D+{last_day_index} "
-                   f"({last_day_price:.2f}) jest PONIŻEJ progu {alert_low:.2f}")
-            log(msg)
-            messagebox.showinfo("Alert – próg dolny przekroczony", msg)
-
-        # ======== WYLICZENIE DAT PRZYSZŁYCH =========
-        last_n = min(100, len(df))
-        hist_dates = df["Date"].values[-last_n:]
-        hist_prices = df["Close"].values[-last_n:]
-
-        start_future = df["Date"].iloc[-1] + pd.Timedelta(days=1)
-        future_dates = pd.date_range(start_future, periods=len(pred_prices))
-
-        # ======== ZAPIS PROGNOZY DO CSV =========
-        try:
-            output_dir_csv = os.path.join(os.path.dirname(__file__), "prognozy")
-            os.makedirs(output_dir_csv, exist_ok=True)
-
-            now = dt.datetime.now()
-            now_str = now.strftime("%Y%m%d_%H%M%S")
-            today_str = dt.date.today().isoformat()
-
-            filename_csv = f"{ticker.upper()}_{today_str}_{len(pred_prices)}dni_{now_str}.csv"
-            filepath_csv = os.path.join(output_dir_csv, filename_csv)
-
-            df_forecast = pd.DataFrame({
-                "ticker": [ticker.upper()] * len(pred_prices),
-                "date": future_dates,
-                "day_offset": list(range(1, len(pred_prices) + 1)),
-                "forecast": pred_prices
-            })
-
-            df_forecast.to_csv(filepath_csv, index=False)
-            log(f"📄 Prognoza zapisana do CSV: {filepath_csv}")
-        except Exception as e_csv:
-            log(f"⚠️ Nie udało się zapisać prognozy do CSV: {e_csv}")
-        
-        # ======== ZAPIS DO BAZY DANYCH =========
-        try:
-            if ForecastDatabase is not None:
-                db_path = os.path.join(os.path.dirname(__file__), "forecast_history.db")
-                with ForecastDatabase(db_path) as db:
-                    # Przygotuj dane dla bazy
-                    forecast_prices_list = pred_prices.tolist()
-                    try:
-                        lower_list = lower_interval.tolist()
-                        upper_list = upper_interval.tolist()
-                    except:
-                        lower_list = None
-                        upper_list = None
-                    
-                    forecast_id = db.add_forecast(
-                        ticker=ticker.upper(),
-                        days_ahead=len(pred_prices),
-                        forecast_prices=forecast_prices_list,
-                        lower_bounds=lower_list,
-                        upper_bounds=upper_list,
-                        model_type="LSTM",
-                        lookback=lookback,
-                        horizon=horizon
-                    )
-                    log(f"💾 Prognoza zapisana w bazie danych (ID: {forecast_id})")
-            else:
-                log("⚠️ Moduł forecast_database niedostępny - baza danych nie wrzyta")
-        except Exception as e_db:
-            log(f"⚠️ Nie udało się zapisać prognozy w bazie danych: {e_db}")
-
-        # ======== WYKRES + ZAPIS DO PLIKU PNG =========
-        try:
-            plt.figure(figsize=(12, 6))
-            plt.plot(hist_dates, hist_prices, label="Historia (Close)", color="blue", linewidth=2)
-            plt.plot(future_dates, pred_prices, label="Prognoza", color="red", marker="o", linewidth=2)
-            
-            # Dodaj uncertainty intervals jeśli są dostępne
-            try:
-                plt.fill_between(future_dates, lower_interval, upper_interval, 
-                               alpha=0.2, color="red", label="95% przedział ufności")
-            except:
-                pass
-
-            plt.title(f"Prognoza kursu {ticker.upper()} na {len(pred_prices)} dni naprzód")
-            plt.xlabel("Data")
-            plt.ylabel("Cena")
-            plt.legend()
-            plt.grid(True, alpha=0.3)
+            fig = plt.figure(figsize=(12, 6))
+            core.draw_forecast(fig.gca(), result)
             plt.tight_layout()
-
-            output_dir_png = os.path.join(os.path.dirname(__file__), "wykresy")
-            os.makedirs(output_dir_png, exist_ok=True)
-
-            today_str = dt.date.today().isoformat()
-            filename_png = f"{ticker.upper()}_{today_str}_{len(pred_prices)}dni.png"
-            filepath_png = os.path.join(output_dir_png, filename_png)
-
-            plt.savefig(filepath_png, dpi=150)
-            log(f"💾 Wykres zapisany jako: {filepath_png}")
-
             plt.show()
         except Exception as e_plot:
-            log(f"⚠️ Nie udało się narysować lub zapisać wykresu: {e_plot}")
+            log(f"⚠️ Nie udało się narysować wykresu: {e_plot}")
+        finally:
+            # Kolejne prognozy nie zostawiają otwartych figur w pamięci
+            if fig is not None:
+                plt.close(fig)
 
         messagebox.showinfo(
             "Prognoza gotowa",
@@ -405,91 +162,13 @@ def analyze_technical_indicators(ticker):
             log("❌ Moduł technical_indicators nie załadowany.")
             messagebox.showerror("Błąd", "Brak modułu technical_indicators.")
             return
-            
+
         log(f"\n================ ANALIZA WSKAŹNIKÓW TECHNICZNYCH ================")
-        log(f"Pobieranie danych dla {ticker}...")
-        
-        end = dt.date.today()
-        start = end - dt.timedelta(days=365)  # ostatni rok
-        
-        df = yf.download(ticker, start=start, end=end).reset_index()
-        if df.empty:
-            log("❌ Brak danych.")
-            return
-        
-        df = df[["Date", "Close"]].dropna()
-        close_prices = df["Close"].values
-        
-        # Oblicz wskaźniki
-        log("\nObliczam wskaźniki techniczne...")
-        
-        rsi = TechnicalIndicators.calculate_rsi(close_prices, period=14)
-        macd, signal, hist = TechnicalIndicators.calculate_macd(close_prices)
-        bb_upper, bb_mid, bb_lower = TechnicalIndicators.calculate_bollinger_bands(close_prices)
-        sma20 = TechnicalIndicators.calculate_sma(close_prices, period=20)
-        sma50 = TechnicalIndicators.calculate_sma(close_prices, period=50)
-        
-        # Ostatnie wartości
-        last_close = close_prices[-1]
-        last_rsi = rsi[-1]
-        last_macd = macd[-1]
-        last_sma20 = sma20[-1]
-        last_sma50 = sma50[-1]
-        
-        log(f"\n📊 Bieżące wskaźniki dla {ticker.upper()}:")
-        log(f"   Cena zamknięcia: {last_close:.2f}")
-        log(f"   RSI(14): {last_rsi:.2f}", end="")
-        if last_rsi < 30:
-            log(" ⚠️ OVERSOLD")
-        elif last_rsi > 70:
-            log(" ⚠️ OVERBOUGHT")
-        else:
-            log(" (neutralny)")
-        
-        log(f"   MACD: {last_macd:.6f}")
-        log(f"   SMA(20): {last_sma20:.2f}")
-        log(f"   SMA(50): {last_sma50:.2f}")
-        log(f"   Bollinger Bands: [{bb_lower[-1]:.2f}, {bb_upper[-1]:.2f}]")
-        
-        # Sygnały
-        log(f"\n🎯 Sygnały techniczne:")
-        if last_close > last_sma20 > last_sma50:
-            log("   ✅ Trend wzrostu (Close > SMA20 > SMA50)")
-        elif last_close < last_sma20 < last_sma50:
-            log("   ⚠️ Trend spadku (Close < SMA20 < SMA50)")
-        
-        if last_rsi < 30:
-            log("   ✅ Sygnał kupna: Oversold (RSI < 30)")
-        elif last_rsi > 70:
-            log("   ⚠️ Sygnał sprzedaży: Overbought (RSI > 70)")
-        
-        # Zapis do CSV
-        try:
-            output_dir = os.path.join(os.path.dirname(__file__), "wskazniki")
-            os.makedirs(output_dir, exist_ok=True)
-            
-            df_ind = pd.DataFrame({
-                "Date": df["Date"],
-                "Close": close_prices,
-                "RSI": rsi,
-                "MACD": macd,
-                "MACD_Signal": signal,
-                "SMA20": sma20,
-                "SMA50": sma50,
-                "BB_Upper": bb_upper,
-                "BB_Lower": bb_lower
-            })
-            
-            today_str = dt.date.today().isoformat()
-            filepath = os.path.join(output_dir, f"wskazniki_{ticker}_{today_str}.csv")
-            df_ind.to_csv(filepath, index=False)
-            log(f"\n📄 Wskaźniki zapisane do: {filepath}")
-        except Exception as e_save:
-            log(f"⚠️ Nie udało się zapisać wskaźników: {e_save}")
-        
-        messagebox.showinfo("Wskaźniki techniczne", 
-                           f"RSI: {last_rsi:.2f}\nSMA20: {last_sma20:.2f}\nSMA50: {last_sma50:.2f}")
-        
+        result = core.analyze_technical_indicators(ticker, log=log)
+
+        messagebox.showinfo("Wskaźniki techniczne",
+                           f"RSI: {result['rsi']:.2f}\nSMA20: {result['sma20']:.2f}\nSMA50: {result['sma50']:.2f}")
+
     except Exception as e:
         log(f"❌ Błąd podczas analizy wskaźników: {e}")
         messagebox.showerror("Błąd", f"Błąd: {e}")
@@ -503,60 +182,14 @@ def compare_models_command(ticker, lookback=60, horizon=5, epochs=10):
             log("❌ Moduł model_comparison nie załadowany.")
             messagebox.showerror("Błąd", "Brak modułu model_comparison.")
             return
-            
+
         log("\n================ PORÓWNANIE MODELI ================")
-        log(f"Pobieranie danych dla {ticker}...")
-        
-        end = dt.date.today()
-        start = end - dt.timedelta(days=5 * 365)
-        
-        df = yf.download(ticker, start=start, end=end)
-        if df.empty:
-            log("❌ Brak danych z Yahoo Finance.")
-            messagebox.showerror("Błąd", "Brak danych dla podanego tickera.")
-            return
-        
-        df = df.reset_index()
-        df = df[["Date", "Close"]].dropna()
-        data = df[["Close"]].values
-        
-        # Normalizacja
-        scaler = MinMaxScaler(feature_range=(0, 1))
-        scaled_data = scaler.fit_transform(data)
-        
-        # Podział
-        TEST_SIZE = 0.2
-        train_size = int((1 - TEST_SIZE) * len(scaled_data))
-        train_data = scaled_data[:train_size]
-        test_data = scaled_data[train_size - lookback:]
-        
-        X_train, y_train = create_sequences_multi(train_data, lookback, horizon)
-        X_test, y_test = create_sequences_multi(test_data, lookback, horizon)
-        
-        log(f"Dane przygotowane: X_train={X_train.shape}, X_test={X_test.shape}")
-        
-        # Porównanie modeli
-        comparator = ModelComparator(lookback, horizon)
-        results = comparator.compare_all_models(X_train, y_train, X_test, y_test, epochs=epochs)
-        
-        # Zapis raportu
-        output_dir = os.path.join(os.path.dirname(__file__), "porownania")
-        os.makedirs(output_dir, exist_ok=True)
-        
-        today_str = dt.date.today().isoformat()
-        report_path = os.path.join(output_dir, f"porownanie_modeli_{ticker}_{today_str}.csv")
-        
-        df_results = comparator.get_results_dataframe()
-        df_results.to_csv(report_path)
-        
-        log(f"\n✅ Raport porównania modeli:")
-        log(df_results.to_string())
-        log(f"📄 Zapisano do: {report_path}")
-        
-        messagebox.showinfo("Porównanie modeli", 
-                           f"Porównanie ukończone.\nNajlepszy model: {df_results.index[0]}\n"
-                           f"RMSE: {df_results.iloc[0]['RMSE']:.6f}")
-        
+        result = core.compare_models(ticker, lookback=lookback, horizon=horizon, epochs=epochs, log=log)
+
+        messagebox.showinfo("Porównanie modeli",
+                           f"Porównanie ukończone.\nNajlepszy model: {result['best_model']}\n"
+                           f"RMSE: {result['best_rmse']:.6f}")
+
     except Exception as e:
         log(f"❌ Błąd podczas porównania modeli: {e}")
         messagebox.showerror("Błąd", f"Błąd: {e}")
@@ -570,69 +203,14 @@ def walk_forward_test(ticker, lookback=60, horizon=5, epochs=5):
             log("❌ Moduł validation_metrics nie załadowany.")
             messagebox.showerror("Błąd", "Brak modułu validation_metrics.")
             return
-            
+
         log("\n================ WALK-FORWARD TESTING ================")
-        log(f"Pobieranie danych dla {ticker}...")
-        
-        end = dt.date.today()
-        start = end - dt.timedelta(days=5 * 365)
-        
-        df = yf.download(ticker, start=start, end=end)
-        if df.empty:
-            log("❌ Brak danych.")
-            return
-        
-        df = df.reset_index()
-        df = df[["Date", "Close"]].dropna()
-        data = df[["Close"]].values
-        
-        scaler = MinMaxScaler(feature_range=(0, 1))
-        scaled_data = scaler.fit_transform(data)
-        
-        X_full, y_full = create_sequences_multi(scaled_data, lookback, horizon)
-        
-        log(f"Dane przygotowane: {len(X_full)} sekwencji")
-        
-        # Funkcja do budowania modelu
-        def build_model():
-            m = Sequential()
-            m.add(LSTM(50, return_sequences=True, input_shape=(lookback, 1)))
-            m.add(Dropout(0.2))
-            m.add(LSTM(50, return_sequences=False))
-            m.add(Dropout(0.2))
-            m.add(Dense(25))
-            m.add(Dense(horizon))
-            m.compile(optimizer="adam", loss="mean_squared_error")
-            return m
-        
-        # Walk-forward validator
-        validator = WalkForwardValidator(build_model, scaler)
-        result = validator.run_walk_forward(X_full, y_full, lookback, horizon, 
-                                           initial_train_size=0.7, step_size=1, 
-                                           epochs=epochs, verbose=True)
-        
-        metrics = result["metrics"]
-        log(f"\n✅ Walk-Forward Testing wyniki:")
-        log(f"   RMSE: {metrics['RMSE']:.6f}")
-        log(f"   MAE: {metrics['MAE']:.6f}")
-        log(f"   MAPE: {metrics['MAPE']:.2f}%")
-        log(f"   Directional Accuracy: {metrics['Directional_Accuracy']*100:.1f}%")
-        
-        # Zapis wyników
-        output_dir = os.path.join(os.path.dirname(__file__), "walk_forward")
-        os.makedirs(output_dir, exist_ok=True)
-        
-        today_str = dt.date.today().isoformat()
-        wf_path = os.path.join(output_dir, f"walk_forward_{ticker}_{today_str}.csv")
-        
-        df_wf = validator.get_results_dataframe()
-        df_wf.to_csv(wf_path, index=False)
-        log(f"📄 Szczegóły zapisane do: {wf_path}")
-        
-        messagebox.showinfo("Walk-Forward Testing", 
+        result = core.walk_forward_test(ticker, lookback=lookback, horizon=horizon, epochs=epochs, log=log)
+
+        messagebox.showinfo("Walk-Forward Testing",
                            f"Testowanie ukończone.\n"
-                           f"Directional Accuracy: {metrics['Directional_Accuracy']*100:.1f}%")
-        
+                           f"Directional Accuracy: {result['metrics']['Directional_Accuracy']*100:.1f}%")
+
     except Exception as e:
         log(f"❌ Błąd podczas walk-forward testing: {e}")
         messagebox.showerror("Błąd", f"Błąd: {e}")
@@ -655,98 +233,22 @@ def backtest_from_csv():
             return
 
         log(f"📂 Wybrano plik: {file_path}")
-        df_forecast = pd.read_csv(file_path)
-
-        # oczekiwane kolumny z naszego generatora prognoz
-        required_cols = {"ticker", "date", "forecast"}
-        if not required_cols.issubset(df_forecast.columns):
-            log("❌ Plik nie wygląda na prognozę z tego programu (brak wymaganych kolumn).")
-            messagebox.showerror(
-                "Błędny plik",
-                "Plik nie zawiera wymaganych kolumn: 'ticker', 'date', 'forecast'."
-            )
-            return
-
-        # konwersja dat
-        df_forecast["date"] = pd.to_datetime(df_forecast["date"]).dt.date
-
-        # zakładamy jeden ticker w pliku
-        ticker = str(df_forecast["ticker"].iloc[0]).upper()
-        log(f"🔍 Ticker z pliku prognozy: {ticker}")
-
-        # bierzemy tylko te daty, które już minęły (lub są dziś)
-        today = dt.date.today()
-        df_past = df_forecast[df_forecast["date"] <= today].copy()
-        if df_past.empty:
-            log("❌ Żadna data prognozy jeszcze nie nastąpiła – brak danych do porównania.")
-            messagebox.showinfo(
-                "Brak danych do backtestu",
-                "prognoza jest całkowicie w przyszłości.\n"
-                "Spróbuj za kilka dni."
-            )
-            return
-
-        start_date = df_past["date"].min()
-        end_date = df_past["date"].max()
-        log(f"📆 Zakres dat do porównania: {start_date} – {end_date}")
-
-        # pobieramy rzeczywiste dane z Yahoo Finance
-        log("⬇️ Pobieram rzeczywiste dane z Yahoo Finance...")
-        df_real = yf.download(
-            ticker,
-            start=start_date,
-            end=end_date + dt.timedelta(days=1)  # end w yfinance jest ekskluzywne
-        ).reset_index()
-
-        if df_real.empty:
-            log("❌ Brak rzeczywistych danych z Yahoo Finance.")
-            messagebox.showerror("Błąd", "Nie udało się pobrać rzeczywistych danych z Yahoo Finance.")
-            return
-
-        df_real["Date"] = pd.to_datetime(df_real["Date"]).dt.date
-        df_real = df_real[["Date", "Close"]].rename(columns={"Date": "date", "Close": "real"})
-
-        # łączymy prognozę z realnymi danymi po dacie
-        df_merge = pd.merge(df_past, df_real, on="date", how="inner")
-
-        if df_merge.empty:
-            log("❌ Brak wspólnych dat między prognozą a danymi rzeczywistymi.")
-            messagebox.showerror("Błąd", "Nie znaleziono wspólnych dat do porównania.")
-            return
-
-        # liczymy błędy
-        df_merge["diff"] = df_merge["real"] - df_merge["forecast"]
-        df_merge["abs_diff"] = df_merge["diff"].abs()
-        df_merge["pct_error"] = df_merge["diff"] / df_merge["real"] * 100.0
-        df_merge["abs_pct_error"] = df_merge["pct_error"].abs()
-
-        avg_abs_pct_error = df_merge["abs_pct_error"].mean()
-        max_abs_pct_error = df_merge["abs_pct_error"].max()
-
-        log("\n📊 Podsumowanie backtestu:")
-        log(f"   Liczba punktów porównania: {len(df_merge)}")
-        log(f"   Średni bezwzględny błąd procentowy: {avg_abs_pct_error:.2f}%")
-        log(f"   Maksymalny bezwzględny błąd procentowy: {max_abs_pct_error:.2f}%")
-
-        # Zapis wyników backtestu do pliku
         try:
-            output_dir_bt = os.path.join(os.path.dirname(__file__), "backtesty")
-            os.makedirs(output_dir_bt, exist_ok=True)
-
-            now_str = dt.datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename_bt = f"BACKTEST_{ticker}_{now_str}.csv"
-            filepath_bt = os.path.join(output_dir_bt, filename_bt)
+            result = core.backtest_forecast_csv(file_path, log=log)
+        except ValueError as e:
+            log(f"❌ {e}")
+            messagebox.showerror("Backtest", str(e))
+            return
 
-            df_merge.to_csv(filepath_bt, index=False)
-            log(f"📄 Szczegóły backtestu zapisane do: {filepath_bt}")
-        except Exception as e_bt_save:
-            log(f"⚠️ Nie udało się zapisać szczegółów backtestu do CSV: {e_bt_save}")
+        ticker = result["ticker"]
+        avg_abs_pct_error = result["avg_abs_pct_error"]
 
         # wykres prognoza vs real
         try:
+            rows = pd.DataFrame(result["rows"])
             plt.figure(figsize=(10, 5))
-            plt.plot(df_merge["date"], df_merge["real"], label="Rzeczywiste", color="blue")
-            plt.plot(df_merge["date"], df_merge["forecast"], label="Prognoza", color="red", marker="o")
+            plt.plot(rows["date"], rows["real"], label="Rzeczywiste", color="blue")
+            plt.plot(rows["date"], rows["forecast"], label="Prognoza", color="red", marker="o")
 
             plt.title(f"Backtest prognozy dla {ticker}\n"
                       f"Śr. abs. błąd %: {avg_abs_pct_error:.2f}")
@@ -1012,7 +514,7 @@ def configure_scheduler():
         log("\n================ KONFIGURACJA HARMONOGRAMU ================")
         
         # Proste konfigurowanie – można rozszerzyć
-        log("Aby używać harmonogramu, zainstaluj: pip install schedule")
+        log("Harmonogram: forecast_scheduler.ForecastScheduler (bez dodatkowych zależności)")
         log("Przykład: scheduler.schedule_daily_forecast(['AAPL', 'MSFT'], '09:30', predict_future)")
         
         messagebox.showinfo("Scheduler", 
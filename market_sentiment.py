@@ -1,9 +1,17 @@
 import os
+import time
+import sqlite3
+import hashlib
+import threading
 import datetime as dt
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Iterable
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import numpy as np
+import pandas as pd
 
 # ====== Opcjonalny import transformers ======
 try:
@@ -13,33 +21,461 @@ except ImportError:
     TRANSFORMERS_AVAILABLE = False
 
 
+NEWSAPI_URL = "https://newsapi.org/v2/everything"
+
+# ====== Słowniki prostego scorera słów kluczowych ======
+POSITIVE_WORDS = ("good", "great", "bullish", "gain", "profit", "upgrade", "beat")
+NEGATIVE_WORDS = ("bad", "worse", "bearish", "loss", "downgrade", "miss")
+
+
+class KeywordScorer:
+    """
+    Leksykalny scorer sentymentu liczony wektorowo dla całej porcji tekstów.
+    Teksty łączone są w jeden bufor bajtów; początki wyrazów i dopasowania słów
+    wyznacza NumPy (kandydaci filtrowani litera po literze), bez pętli Pythona
+    po tekstach. Słowo pasuje od początku wyrazu (gain, gains, gained – ale nie
+    "again"); każde słowo liczone jest raz na tekst. Słowa leksykonu: ASCII.
+    """
+
+    def __init__(self, positive_words=POSITIVE_WORDS, negative_words=NEGATIVE_WORDS):
+        words = list(dict.fromkeys(w.lower() for w in (*positive_words, *negative_words)))
+        self._words = [np.frombuffer(w.encode("ascii"), dtype=np.uint8) for w in words]
+        self._max_len = max((len(w) for w in self._words), default=0)
+        positive = {w.lower() for w in positive_words}
+        self._positive = np.array([w in positive for w in words], dtype=bool)
+
+    def score(self, text: str) -> float:
+        return self.score_many([text])[0]
+
+    def score_many(self, texts: List[str]) -> List[float]:
+        n = len(texts)
+        if n == 0:
+            return []
+        lowered = list(map(str.lower, texts))
+        lengths = np.fromiter(map(len, lowered), dtype=np.int64, count=n)
+        text_starts = np.cumsum(lengths + 1) - lengths  # bufor zaczyna się od separatora
+        # 'replace' zamienia każdy znak spoza ASCII na jeden bajt – pozycje zgodne z tekstem
+        buf = np.frombuffer(
+            ("\n" + "\n".join(lowered)).encode("ascii", "replace") + b"\0" * self._max_len,
+            dtype=np.uint8,
+        )
+        letter = (buf >= ord("a")) & (buf <= ord("z"))
+        word_starts = np.flatnonzero(letter[1:] & ~letter[:-1]) + 1
+        first = buf[word_starts]
+
+        hits = np.zeros((n, len(self._words)), dtype=bool)
+        by_first: Dict[int, np.ndarray] = {}
+        for j, word in enumerate(self._words):
+            cand = by_first.get(word[0])
+            if cand is None:
+                cand = by_first[word[0]] = word_starts[first == word[0]]
+            for k in range(1, len(word)):
+                cand = cand[buf[cand + k] == word[k]]
+            hits[np.searchsorted(text_starts, cand, side="right") - 1, j] = True
+
+        pos = hits[:, self._positive].sum(axis=1)
+        neg = hits[:, ~self._positive].sum(axis=1)
+        total = pos + neg
+        return np.divide(pos - neg, total, out=np.zeros(n), where=total > 0).tolist()
+
+
+# ====== Współdzielone (na cały proces) pipeline'y transformers ======
+_SHARED_PIPELINES: Dict = {}
+_SHARED_PIPELINES_LOCK = threading.Lock()
+
+
+def get_shared_pipeline(model_name: Optional[str] = None, quantized: bool = False):
+    """
+    Zwraca pipeline("sentiment-analysis") współdzielony w całym procesie.
+    Model ładowany jest przy pierwszym użyciu, kolejne wywołania zwracają ten sam obiekt.
+
+    :param model_name: nazwa modelu HF (None = domyślny, destylowany model pipeline)
+    :param quantized: dynamiczna kwantyzacja warstw Linear do int8 (torch, CPU)
+    """
+    if not TRANSFORMERS_AVAILABLE:
+        return None
+
+    key = (model_name, quantized)
+    with _SHARED_PIPELINES_LOCK:
+        pipe = _SHARED_PIPELINES.get(key)
+        if pipe is None:
+            pipe = pipeline("sentiment-analysis", model=model_name) if model_name else pipeline("sentiment-analysis")
+            if quantized:
+                import torch
+                pipe.model = torch.quantization.quantize_dynamic(
+                    pipe.model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+            _SHARED_PIPELINES[key] = pipe
+    return pipe
+
+
+# ====== Zmierzony koszt silników sentymentu (ms na tekst, na cały proces) ======
+_CALIBRATION_TEXTS = (
+    "Shares rally after the company beats quarterly earnings estimates",
+    "Analyst downgrades the stock on weaker revenue guidance",
+    "Market closes flat ahead of the central bank decision",
+    "Bearish outlook as losses widen and margins shrink",
+)
+_BACKEND_LATENCY_MS: Dict = {}
+_BACKEND_LATENCY_LOCK = threading.Lock()
+
+
+def measure_backend_latency(backend: str, model_name: Optional[str] = None, batch_size: int = 32) -> float:
+    """
+    Mierzy czas oceny jednego tekstu (ms) przez dany silnik na porcji batch_size nagłówków.
+    Pomiar (po rozgrzewce, najlepszy z 3) wykonywany raz na proces; dla silników
+    transformers ładuje współdzielony pipeline.
+    """
+    key = (backend, model_name, batch_size)
+    with _BACKEND_LATENCY_LOCK:
+        if key in _BACKEND_LATENCY_MS:
+            return _BACKEND_LATENCY_MS[key]
+
+        texts = [_CALIBRATION_TEXTS[i % len(_CALIBRATION_TEXTS)] for i in range(batch_size)]
+        if backend == "lexicon":
+            run = KeywordScorer().score_many
+        else:
+            pipe = get_shared_pipeline(model_name, quantized=(backend == "quantized"))
+
+            def run(batch):
+                return pipe(batch, truncation=True, batch_size=batch_size)
+
+        run(texts)  # rozgrzewka
+        best = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            run(texts)
+            best = min(best, time.perf_counter() - start)
+        _BACKEND_LATENCY_MS[key] = best * 1000.0 / len(texts)
+        return _BACKEND_LATENCY_MS[key]
+
+
+class TokenBucket:
+    """
+    Prosty limiter zapytań (token bucket), bezpieczny dla wątków.
+    Pozwala na krótkie serie do `capacity` zapytań, a średnio `rate` na sekundę.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        :param rate: liczba tokenów (zapytań) na sekundę
+        :param capacity: maksymalna liczba zgromadzonych tokenów (domyślnie = rate)
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Pobiera jeden token, czekając tyle, ile trzeba."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class SentimentCache:
+    """
+    Dyskowy cache wyników sentymentu (SQLite), kluczowany hashem treści.
+    Ten sam nagłówek oceniony raz nie jest ponownie przepuszczany przez model,
+    dopóki wpis nie jest starszy niż TTL.
+    """
+
+    def __init__(self, db_path: str = "sentiment_cache.db", ttl_hours: float = 24.0):
+        """
+        :param db_path: ścieżka do pliku bazy cache
+        :param ttl_hours: po ilu godzinach wynik jest uznawany za nieaktualny
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_hours * 3600.0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sentiment_cache (
+                text_hash TEXT PRIMARY KEY,
+                score REAL NOT NULL,
+                created_at REAL NOT NULL
+            ) WITHOUT ROWID
+            """
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(text: str, backend: str) -> str:
+        """Klucz = hash znormalizowanej treści + nazwa silnika (różne silniki, różne wyniki)."""
+        normalized = " ".join(text.split()).lower()
+        return hashlib.sha256(f"{backend}\x00{normalized}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, float]:
+        """Zwraca {klucz: wynik} dla aktualnych (nie przeterminowanych) wpisów."""
+        keys = list(keys)
+        min_created = time.time() - self.ttl_seconds
+        found = {}
+        with self._lock:
+            # Limit parametrów SQLite – zapytania w porcjach
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.conn.execute(
+                    f"SELECT text_hash, score FROM sentiment_cache "
+                    f"WHERE text_hash IN ({placeholders}) AND created_at >= ?",
+                    (*chunk, min_created),
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def put_many(self, scores: Dict[str, float]) -> None:
+        """Zapisuje wyniki {klucz: wynik}."""
+        now = time.time()
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO sentiment_cache (text_hash, score, created_at) VALUES (?, ?, ?)",
+                [(k, float(v), now) for k, v in scores.items()],
+            )
+            self.conn.commit()
+
+    def purge_expired(self) -> int:
+        """Usuwa przeterminowane wpisy; zwraca ich liczbę."""
+        with self._lock:
+            cur = self.conn.execute(
+                "DELETE FROM sentiment_cache WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,),
+            )
+            self.conn.commit()
+        return cur.rowcount
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class SentimentStore:
+    """
+    Dzienne agregaty sentymentu per ticker (SQLite, klucz (ticker, dzień), WITHOUT ROWID).
+    Szereg czasowy do użycia jako cecha modelu bez ponownego pobierania newsów:
+    FeatureEngineer.add_sentiment_features(df, store.load(ticker)).
+
+    Agregaty liczone są z ocen pojedynczych artykułów (klucz: URL albo hash treści),
+    więc kolejne pobrania z nakładającym się oknem dokładają nowe artykuły,
+    zamiast nadpisywać dzień wynikiem z niepełnej próbki.
+    """
+
+    COLUMNS = ["date", "num_articles", "avg_sentiment", "positive_ratio", "negative_ratio"]
+
+    def __init__(self, db_path: str = "sentiment_history.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sentiment_daily (
+                ticker TEXT NOT NULL,
+                date TEXT NOT NULL,
+                num_articles INTEGER NOT NULL,
+                avg_sentiment REAL NOT NULL,
+                positive_ratio REAL NOT NULL,
+                negative_ratio REAL NOT NULL,
+                PRIMARY KEY (ticker, date)
+            ) WITHOUT ROWID
+            """
+        )
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS sentiment_articles (
+                ticker TEXT NOT NULL,
+                article_key TEXT NOT NULL,
+                date TEXT NOT NULL,
+                score REAL NOT NULL,
+                PRIMARY KEY (ticker, article_key)
+            ) WITHOUT ROWID
+            """
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def article_key(detail: Dict) -> str:
+        """Klucz artykułu: URL, a bez niego hash tytułu, opisu i daty publikacji."""
+        if detail.get("url"):
+            return detail["url"]
+        raw = "\x1f".join(str(detail.get(k) or "") for k in ("title", "description", "published_at"))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def record(self, result: Dict) -> int:
+        """
+        Zapisuje oceny artykułów z wyniku analyze_news_for_ticker (artykuł już zapisany
+        nie jest liczony drugi raz; bez daty publikacji – pomijany) i przelicza
+        agregaty dni, do których doszły artykuły.
+        Zwraca liczbę przeliczonych dni.
+        """
+        ticker = result["ticker"].upper()
+        rows = [
+            (ticker, self.article_key(d), d["published_at"][:10], float(d["score"]))
+            for d in result.get("details") or []
+            if d.get("published_at")
+        ]
+        if not rows:
+            return 0
+
+        days = sorted({r[2] for r in rows})
+        with self._lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO sentiment_articles (ticker, article_key, date, score) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self.conn.execute(
+                f"""
+                INSERT OR REPLACE INTO sentiment_daily
+                    (ticker, date, num_articles, avg_sentiment, positive_ratio, negative_ratio)
+                SELECT ticker, date, COUNT(*), AVG(score), AVG(score > 0.1), AVG(score < -0.1)
+                FROM sentiment_articles
+                WHERE ticker = ? AND date IN ({", ".join("?" * len(days))})
+                GROUP BY ticker, date
+                """,
+                (ticker, *days),
+            )
+            self.conn.commit()
+        return len(days)
+
+    def load(self, ticker: str, start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """
+        Dzienny szereg sentymentu tickera (zakres po kluczu głównym, bez skanu tabeli).
+        Zwraca DataFrame z kolumnami COLUMNS (date jako datetime64).
+        """
+        query = (
+            "SELECT date, num_articles, avg_sentiment, positive_ratio, negative_ratio "
+            "FROM sentiment_daily WHERE ticker = ? AND date >= ? AND date <= ? ORDER BY date"
+        )
+        with self._lock:
+            df = pd.read_sql_query(
+                query, self.conn, params=(ticker.upper(), str(start or ""), str(end or "9999-12-31"))
+            )
+        df["date"] = pd.to_datetime(df["date"])
+        return df
+
+    def close(self) -> None:
+        self.conn.close()
+
+
 class MarketSentimentAnalyzer:
     """
     Moduł do pobierania newsów z internetu i liczenia sentymentu
     dla danego tickera / rynku.
     """
 
+    # Silniki od najdokładniejszego
+    BACKENDS = ("transformers", "quantized", "lexicon")
+
     def __init__(
         self,
         news_api_key: Optional[str] = None,
         days_back: int = 2,
         language: str = "en",
+        cache_path: Optional[str] = "sentiment_cache.db",
+        cache_ttl_hours: float = 24.0,
+        batch_size: int = 32,
+        store: Optional["SentimentStore"] = None,
+        base_url: str = NEWSAPI_URL,
+        max_workers: int = 8,
+        requests_per_second: float = 5.0,
+        backend: str = "auto",
+        latency_budget_ms: Optional[float] = None,
+        model_name: Optional[str] = None,
     ):
         """
         :param news_api_key: klucz do NewsAPI (https://newsapi.org)
                              jeśli None -> czyta z ENV: NEWSAPI_KEY
         :param days_back: ile dni wstecz pobierać newsy
         :param language: język newsów (np. 'en', 'pl')
+        :param cache_path: plik cache wyników sentymentu (None = bez cache)
+        :param cache_ttl_hours: ważność wpisów cache w godzinach
+        :param batch_size: liczba tekstów w jednej porcji dla modelu
+        :param store: SentimentStore – zapis dziennych agregatów każdej analizy (opcjonalnie)
+        :param base_url: adres endpointu newsów (np. lokalny serwer testowy)
+        :param max_workers: liczba równoległych pobrań przy wielu tickerach
+        :param requests_per_second: limit zapytań do dostawcy newsów
+        :param backend: 'transformers', 'quantized' (model int8), 'lexicon' (słowa kluczowe)
+                        albo 'auto' – najdokładniejszy silnik mieszczący się w latency_budget_ms
+        :param latency_budget_ms: dopuszczalny czas oceny jednego tekstu (tylko dla 'auto';
+                                  koszt silników mierzony przy pierwszej analizie, raz na proces –
+                                  measure_backend_latency)
+        :param model_name: nazwa modelu HF dla silników transformers
         """
         self.news_api_key = news_api_key or os.getenv("NEWSAPI_KEY", "")
         self.days_back = days_back
         self.language = language
+        self.batch_size = batch_size
+        self.cache = SentimentCache(cache_path, cache_ttl_hours) if cache_path else None
+        self.store = store
+        self.base_url = base_url
+        self.max_workers = max_workers
+        self.rate_limiter = TokenBucket(requests_per_second)
 
-        if TRANSFORMERS_AVAILABLE:
-            # Domyślny model ogólnego sentymentu
-            self.sentiment_pipeline = pipeline("sentiment-analysis")
-        else:
-            self.sentiment_pipeline = None
+        # Wspólna sesja: połączenia keep-alive w puli, ponowienia przy 429/5xx
+        retry = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET",),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.model_name = model_name
+        self.keyword_scorer = KeywordScorer()
+        self._backend_lock = threading.Lock()
+        self._requested_backend = backend
+        self.latency_budget_ms = latency_budget_ms
+        self._backend = None
+        if backend != "auto" or latency_budget_ms is None:
+            # Wybór bez pomiarów – od razu (i od razu błąd dla nieznanej nazwy)
+            self._backend = self._select_backend(backend, latency_budget_ms)
+
+    @property
+    def backend(self) -> str:
+        """Wybrany silnik; 'auto' z budżetem czasu wybierany (z pomiarem) przy pierwszym użyciu."""
+        if self._backend is None:
+            with self._backend_lock:
+                if self._backend is None:
+                    self._backend = self._select_backend(self._requested_backend, self.latency_budget_ms)
+        return self._backend
+
+    def _select_backend(self, backend: str, latency_budget_ms: Optional[float]) -> str:
+        """Wybór silnika: jawny albo (auto) najdokładniejszy mieszczący się w budżecie."""
+        if backend != "auto":
+            if backend not in self.BACKENDS:
+                raise ValueError(f"Nieznany silnik sentymentu: {backend}")
+            if backend != "lexicon" and not TRANSFORMERS_AVAILABLE:
+                print(f"⚠️ transformers niedostępne – silnik '{backend}' zastąpiony słowami kluczowymi.")
+                return "lexicon"
+            return backend
+
+        if not TRANSFORMERS_AVAILABLE:
+            return "lexicon"
+        for name in self.BACKENDS:
+            if latency_budget_ms is None:
+                return name
+            latency_ms = measure_backend_latency(name, self.model_name, self.batch_size)
+            if latency_ms <= latency_budget_ms:
+                return name
+            print(f"⏱️ Silnik '{name}': {latency_ms:.3f} ms/tekst > budżet {latency_budget_ms} ms")
+        return "lexicon"
+
+    @property
+    def sentiment_pipeline(self):
+        """Pipeline transformers – ładowany przy pierwszym użyciu, wspólny dla procesu."""
+        if self.backend == "lexicon":
+            return None
+        return get_shared_pipeline(self.model_name, quantized=(self.backend == "quantized"))
 
     # ========= NEWSAPI =========
     def _fetch_news_from_newsapi(self, query: str) -> List[Dict]:
@@ -56,7 +492,6 @@ class MarketSentimentAnalyzer:
         end = dt.datetime.utcnow()
         start = end - dt.timedelta(days=self.days_back)
 
-        url = "https://newsapi.org/v2/everything"
         params = {
             "q": query,
             "from": start.strftime("%Y-%m-%d"),
@@ -67,7 +502,8 @@ class MarketSentimentAnalyzer:
             "apiKey": self.news_api_key,
         }
 
-        resp = requests.get(url, params=params, timeout=10)
+        self.rate_limiter.acquire()
+        resp = self.session.get(self.base_url, params=params, timeout=10)
         resp.raise_for_status()
         data = resp.json()
 
@@ -81,17 +517,44 @@ class MarketSentimentAnalyzer:
                     {
                         "title": title.strip(),
                         "description": desc.strip(),
+                        "publishedAt": a.get("publishedAt") or "",
+                        "url": a.get("url") or "",
                     }
                 )
         return cleaned
 
+    def fetch_news_for_tickers(self, tickers: List[str]) -> Dict[str, List[Dict]]:
+        """
+        Pobiera newsy dla wielu tickerów równolegle (pula wątków, wspólna sesja,
+        limit zapytań). Błąd dla jednego tickera nie przerywa pozostałych.
+        Zwraca {TICKER: lista artykułów}.
+        """
+        if not self.news_api_key:
+            raise RuntimeError(
+                "Brak klucza NEWSAPI_KEY. Ustaw zmienną środowiskową lub "
+                "przekaż news_api_key do MarketSentimentAnalyzer."
+            )
+
+        queries = list(dict.fromkeys(t.upper() for t in tickers))
+
+        def fetch(query: str) -> List[Dict]:
+            try:
+                return self._fetch_news_from_newsapi(query)
+            except Exception as e:
+                print(f"⚠️ Nie udało się pobrać newsów dla {query}: {e}")
+                return []
+
+        workers = max(1, min(self.max_workers, len(queries)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return dict(zip(queries, executor.map(fetch, queries)))
+
     # ========= SENTIMENT ANALIZA =========
     def _analyze_texts_transformers(self, texts: List[str]) -> List[float]:
         """
         Analiza sentymentu z użyciem transformers.
         Zwraca listę wyników w skali [-1, 1].
         """
-        results = self.sentiment_pipeline(texts, truncation=True)
+        results = self.sentiment_pipeline(texts, truncation=True, batch_size=self.batch_size)
         scores = []
         for r in results:
             label = r["label"].upper()
@@ -108,65 +571,56 @@ class MarketSentimentAnalyzer:
         Prosty fallback bez transformers – leksykalny licznik słów.
         Bardzo uproszczone, ale działa bez zewnętrznych modeli.
         """
-        positive_words = ["good", "great", "bullish", "gain", "profit", "upgrade", "beat"]
-        negative_words = ["bad", "worse", "bearish", "loss", "downgrade", "miss"]
+        return self.keyword_scorer.score_many(texts)
 
-        scores = []
-        for t in texts:
-            txt = t.lower()
-            pos = sum(w in txt for w in positive_words)
-            neg = sum(w in txt for w in negative_words)
-            if pos + neg == 0:
-                scores.append(0.0)
-            else:
-                score = (pos - neg) / float(pos + neg)
-                scores.append(score)
-        return scores
-
-    def analyze_news_for_ticker(self, ticker: str) -> Dict:
+    def _score_texts(self, texts: List[str]) -> List[float]:
         """
-        Główna funkcja:
-        1) pobiera newsy dla tickera,
-        2) liczy sentyment dla każdego,
-        3) zwraca agregaty.
+        Sentyment dla listy tekstów z użyciem cache:
+        model liczy tylko unikalne teksty, których nie ma w cache,
+        w porcjach po batch_size.
         """
-        query = ticker.upper()
-        articles = self._fetch_news_from_newsapi(query)
-
-        if not articles:
-            return {
-                "ticker": ticker.upper(),
-                "num_articles": 0,
-                "avg_sentiment": 0.0,
-                "positive_ratio": 0.0,
-                "negative_ratio": 0.0,
-                "neutral_ratio": 0.0,
-                "details": [],
-            }
-
-        texts = [
-            (a["title"] + " " + a["description"]).strip()
-            for a in articles
-            if (a.get("title") or a.get("description"))
-        ]
+        backend = self.backend if self.backend == "lexicon" else f"{self.backend}:{self.model_name or 'default'}"
+        keys = [SentimentCache.make_key(t, backend) for t in texts]
 
-        if not texts:
-            return {
-                "ticker": ticker.upper(),
-                "num_articles": 0,
-                "avg_sentiment": 0.0,
-                "positive_ratio": 0.0,
-                "negative_ratio": 0.0,
-                "neutral_ratio": 1.0,
-                "details": [],
-            }
-
-        # Wybór silnika sentimentu
-        if self.sentiment_pipeline is not None:
-            scores = self._analyze_texts_transformers(texts)
-        else:
-            scores = self._analyze_texts_fallback(texts)
+        known = self.cache.get_many(set(keys)) if self.cache is not None else {}
+
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in known and key not in pending:
+                pending[key] = text
 
+        if pending:
+            pending_keys = list(pending)
+            pending_texts = [pending[k] for k in pending_keys]
+            new_scores = []
+            if self.backend == "lexicon":
+                # Scorer wektorowy – cała porcja naraz, bez dzielenia na batch_size
+                new_scores = self._analyze_texts_fallback(pending_texts)
+            else:
+                for i in range(0, len(pending_texts), self.batch_size):
+                    new_scores.extend(self._analyze_texts_transformers(pending_texts[i:i + self.batch_size]))
+            fresh = dict(zip(pending_keys, new_scores))
+            if self.cache is not None:
+                self.cache.put_many(fresh)
+            known.update(fresh)
+
+        return [known[k] for k in keys]
+
+    @staticmethod
+    def _empty_result(ticker: str) -> Dict:
+        return {
+            "ticker": ticker.upper(),
+            "num_articles": 0,
+            "avg_sentiment": 0.0,
+            "positive_ratio": 0.0,
+            "negative_ratio": 0.0,
+            "neutral_ratio": 0.0,
+            "details": [],
+        }
+
+    @staticmethod
+    def _aggregate(ticker: str, articles: List[Dict], scores: List[float]) -> Dict:
+        """Agregaty sentymentu dla jednego tickera."""
         scores_arr = np.array(scores)
         avg_sent = float(scores_arr.mean())
 
@@ -186,6 +640,8 @@ class MarketSentimentAnalyzer:
                     "title": art["title"],
                     "description": art["description"],
                     "score": float(s),
+                    "published_at": art.get("publishedAt", ""),
+                    "url": art.get("url", ""),
                 }
             )
 
@@ -198,3 +654,47 @@ class MarketSentimentAnalyzer:
             "neutral_ratio": neutral_ratio,
             "details": details,
         }
+
+    def analyze_news_for_tickers(self, tickers: List[str]) -> Dict[str, Dict]:
+        """
+        Sentyment dla wielu tickerów naraz:
+        1) pobiera newsy dla wszystkich tickerów równolegle,
+        2) liczy sentyment raz dla sumy nowych (nieobecnych w cache) tekstów,
+        3) zwraca {TICKER: agregaty} jak analyze_news_for_ticker.
+        """
+        if len(tickers) == 1:
+            # Jeden ticker – błąd pobierania zgłaszany wprost
+            news = {tickers[0].upper(): self._fetch_news_from_newsapi(tickers[0].upper())}
+        else:
+            news = self.fetch_news_for_tickers(tickers)
+
+        per_ticker = {}
+        all_texts = []
+        for ticker, fetched in news.items():
+            articles = [a for a in fetched if (a.get("title") or a.get("description"))]
+            texts = [(a["title"] + " " + a["description"]).strip() for a in articles]
+            per_ticker[ticker.upper()] = (articles, len(all_texts), len(texts))
+            all_texts.extend(texts)
+
+        all_scores = self._score_texts(all_texts) if all_texts else []
+
+        results = {}
+        for ticker, (articles, offset, count) in per_ticker.items():
+            if count == 0:
+                results[ticker] = self._empty_result(ticker)
+            else:
+                results[ticker] = self._aggregate(ticker, articles, all_scores[offset:offset + count])
+
+        if self.store is not None:
+            for result in results.values():
+                self.store.record(result)
+        return results
+
+    def analyze_news_for_ticker(self, ticker: str) -> Dict:
+        """
+        Główna funkcja:
+        1) pobiera newsy dla tickera,
+        2) liczy sentyment dla każdego (wyniki z cache nie są liczone ponownie),
+        3) zwraca agregaty.
+        """
+        return self.analyze_news_for_tickers([ticker])[ticker.upper()]
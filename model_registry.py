@@ -0,0 +1,337 @@
+# model_registry.py
+
+"""
+Moduł z rejestrem modeli:
+- Manifest w SQLite (ticker, lookback, horyzont, wersja, architektura, okno treningu, metryki)
+- Pliki modelu i scalera w magazynie adresowanym treścią (SHA-256) – bez duplikatów
+- Szybkie wyszukiwanie najnowszego / najlepszego modelu i listowanie bez skanowania katalogów
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+
+import pandas as pd
+
+
+def ticker_key(ticker):
+    """Klucz tickera w rejestrze – jak w nazwach plików get_file_paths (PKN.WA -> PKN_WA)."""
+    return ticker.upper().replace(".", "_")
+
+
+class ModelRegistry:
+    """Rejestr wytrenowanych modeli z magazynem artefaktów adresowanym treścią."""
+
+    # Metryki trzymane w osobnych kolumnach (indeksowane); pozostałe w JSON
+    METRIC_COLUMNS = ("val_loss", "test_loss", "rmse", "mae", "mape")
+    _LEGACY_RE = re.compile(r"^model_(?P<ticker>.+)_L(?P<lookback>\d+)_H(?P<horizon>\d+)\.keras$")
+
+    def __init__(self, root="model_registry"):
+        """
+        Args:
+            root: katalog rejestru (registry.db + objects/)
+        """
+        self.root = root
+        self.objects_dir = os.path.join(root, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.db_path = os.path.join(root, "registry.db")
+        self._lock = threading.Lock()
+        self.conn = None
+        self.init_database()
+
+    def init_database(self):
+        """Utwórz tabelę manifestu i indeksy jeśli nie istnieją."""
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS models (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ticker TEXT NOT NULL,
+                symbol TEXT NOT NULL,
+                lookback INTEGER NOT NULL,
+                horizon INTEGER NOT NULL,
+                version INTEGER NOT NULL,
+                architecture TEXT,
+                train_start DATE,
+                train_end DATE,
+                val_loss REAL,
+                test_loss REAL,
+                rmse REAL,
+                mae REAL,
+                mape REAL,
+                metrics TEXT,
+                params TEXT,
+                model_sha256 TEXT NOT NULL,
+                model_ext TEXT NOT NULL,
+                scaler_sha256 TEXT NOT NULL,
+                scaler_ext TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE (ticker, lookback, horizon, version)
+            )
+        ''')
+        # UNIQUE daje indeks (ticker, lookback, horizon, version) dla "najnowszego";
+        # dla "najlepszego" i list po czasie osobne indeksy
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_models_ticker_test_loss ON models(ticker, test_loss)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_models_ticker_val_loss ON models(ticker, val_loss)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_models_created_at ON models(created_at)")
+        self.conn.commit()
+
+    # ========= ARTEFAKTY =========
+    def artifact_path(self, sha256, ext):
+        """Ścieżka artefaktu w magazynie: objects/ab/abcdef....ext"""
+        return os.path.join(self.objects_dir, sha256[:2], sha256 + ext)
+
+    def _store(self, path):
+        """Skopiuj plik do magazynu (hash liczony w trakcie kopiowania). Zwraca (sha256, ext)."""
+        ext = os.path.splitext(path)[1]
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.objects_dir, suffix=".tmp")
+        try:
+            with open(path, "rb") as src, os.fdopen(fd, "wb") as dst:
+                for chunk in _chunks(src):
+                    digest.update(chunk)
+                    dst.write(chunk)
+            sha256 = digest.hexdigest()
+            target = self.artifact_path(sha256, ext)
+            if os.path.exists(target):
+                os.remove(tmp_path)  # identyczna treść już jest w magazynie
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(tmp_path, target)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return sha256, ext
+
+    # ========= REJESTRACJA =========
+    def register(self, ticker, lookback, horizon, model_path, scaler_path, architecture=None,
+                 train_start=None, train_end=None, metrics=None, params=None):
+        """
+        Dodaj model do rejestru (pliki kopiowane do magazynu, kolejna wersja dla konfiguracji).
+
+        Args:
+            ticker, lookback, horizon: konfiguracja modelu
+            model_path, scaler_path: pliki wytrenowanego modelu i scalera
+            architecture: opis architektury, np. "LSTM(50)-LSTM(50)-Dense(25)"
+            train_start, train_end: okno danych treningowych (daty)
+            metrics: dict metryk (val_loss, test_loss, rmse, ... – dowolne klucze)
+            params: dict parametrów treningu (epochs, batch_size, ...)
+
+        Returns:
+            dict z rekordem modelu (id, version, model_path, scaler_path, ...)
+        """
+        model_sha, model_ext = self._store(model_path)
+        scaler_sha, scaler_ext = self._store(scaler_path)
+        metrics = dict(metrics or {})
+        key = ticker_key(ticker)
+
+        with self._lock:
+            cursor = self.conn.execute(f'''
+                INSERT INTO models (ticker, symbol, lookback, horizon, version, architecture, train_start, train_end,
+                                    {", ".join(self.METRIC_COLUMNS)}, metrics, params,
+                                    model_sha256, model_ext, scaler_sha256, scaler_ext)
+                SELECT ?, ?, ?, ?, COALESCE(MAX(version), 0) + 1, ?, ?, ?,
+                       {", ".join("?" * len(self.METRIC_COLUMNS))}, ?, ?, ?, ?, ?, ?
+                FROM models WHERE ticker = ? AND lookback = ? AND horizon = ?
+            ''', (
+                key, ticker.upper(), lookback, horizon, architecture,
+                None if train_start is None else str(train_start)[:10],
+                None if train_end is None else str(train_end)[:10],
+                *[metrics.get(m) for m in self.METRIC_COLUMNS],
+                json.dumps(metrics), json.dumps(params or {}),
+                model_sha, model_ext, scaler_sha, scaler_ext,
+                key, lookback, horizon,
+            ))
+            self.conn.commit()
+            model_id = cursor.lastrowid
+        return self.get(model_id)
+
+    def import_legacy(self, directory=".", symbols=None):
+        """
+        Jednorazowo zarejestruj stare pliki model_{TICKER}_L{lookback}_H{horizon}.keras
+        (z pasującym scalerem), których treści jeszcze nie ma w rejestrze.
+
+        Nazwa pliku nie zachowuje kropki w symbolu (PKN.WA -> PKN_WA). Symbol jest brany
+        z symbols albo z modeli tickera już w rejestrze; w pozostałych przypadkach
+        zostaje w formie z nazwy pliku.
+
+        Args:
+            directory: katalog ze starymi plikami
+            symbols: opcjonalna lista znanych tickerów (np. watchlista), np. ["PKN.WA", "AAPL"]
+
+        Returns:
+            liczba zarejestrowanych modeli
+        """
+        known_symbols = {ticker_key(s): s.upper() for s in symbols or ()}
+        count = 0
+        for name in sorted(os.listdir(directory)):
+            match = self._LEGACY_RE.match(name)
+            if not match:
+                continue
+            ticker, lookback, horizon = match["ticker"], int(match["lookback"]), int(match["horizon"])
+            model_path = os.path.join(directory, name)
+            scaler_path = os.path.join(directory, f"scaler_{ticker}_L{lookback}_H{horizon}.pkl")
+            if not os.path.exists(scaler_path):
+                continue
+            sha256 = _sha256(model_path)
+            with self._lock:
+                known = self.conn.execute("SELECT 1 FROM models WHERE model_sha256 = ? LIMIT 1",
+                                          (sha256,)).fetchone()
+                registered = self.conn.execute(
+                    "SELECT symbol FROM models WHERE ticker = ? ORDER BY id DESC LIMIT 1", (ticker,)
+                ).fetchone()
+            if known:
+                continue
+            symbol = known_symbols.get(ticker) or (registered["symbol"] if registered else ticker)
+            self.register(symbol, lookback, horizon, model_path, scaler_path,
+                          architecture="legacy", params={'source': name})
+            count += 1
+        print(f"📦 Zaimportowano {count} starych modeli z {os.path.abspath(directory)}")
+        return count
+
+    # ========= WYSZUKIWANIE =========
+    def _record(self, row):
+        if row is None:
+            return None
+        record = dict(row)
+        record['metrics'] = json.loads(record['metrics'] or "{}")
+        record['params'] = json.loads(record['params'] or "{}")
+        record['model_path'] = self.artifact_path(record['model_sha256'], record['model_ext'])
+        record['scaler_path'] = self.artifact_path(record['scaler_sha256'], record['scaler_ext'])
+        return record
+
+    def _query_one(self, query, params):
+        with self._lock:
+            return self._record(self.conn.execute(query, params).fetchone())
+
+    @staticmethod
+    def _config_filter(ticker, lookback, horizon):
+        clauses, params = ["ticker = ?"], [ticker_key(ticker)]
+        if lookback is not None:
+            clauses.append("lookback = ?")
+            params.append(lookback)
+        if horizon is not None:
+            clauses.append("horizon = ?")
+            params.append(horizon)
+        return " AND ".join(clauses), params
+
+    def get(self, model_id):
+        """Rekord modelu po ID (None gdy brak)."""
+        return self._query_one("SELECT * FROM models WHERE id = ?", (model_id,))
+
+    def latest(self, ticker, lookback=None, horizon=None):
+        """Najnowsza wersja modelu tickera (opcjonalnie dla konkretnego lookback / horyzontu)."""
+        where, params = self._config_filter(ticker, lookback, horizon)
+        return self._query_one(f"SELECT * FROM models WHERE {where} ORDER BY id DESC LIMIT 1", params)
+
+    def best(self, ticker, metric="test_loss", lookback=None, horizon=None, higher_is_better=False):
+        """
+        Najlepszy model tickera wg metryki.
+
+        Args:
+            metric: kolumna z METRIC_COLUMNS (indeksowana) albo dowolny klucz z metrics
+            higher_is_better: True dla metryk typu directional accuracy
+        """
+        where, params = self._config_filter(ticker, lookback, horizon)
+        if metric in self.METRIC_COLUMNS:
+            column = metric
+        else:
+            column = "json_extract(metrics, ?)"
+            params = [f"$.{metric}"] + params
+        order = "DESC" if higher_is_better else "ASC"
+        return self._query_one(
+            f"SELECT * FROM (SELECT *, {column} AS score FROM models WHERE {where}) "
+            f"WHERE score IS NOT NULL ORDER BY score {order}, id DESC LIMIT 1",
+            params,
+        )
+
+    def list_models(self, ticker=None, lookback=None, horizon=None, limit=1000, offset=0):
+        """
+        Lista modeli z manifestu (bez skanowania katalogów), od najnowszych.
+
+        Returns:
+            DataFrame z kolumnami manifestu
+        """
+        where, params = ("1 = 1", []) if ticker is None else self._config_filter(ticker, lookback, horizon)
+        with self._lock:
+            return pd.read_sql_query(
+                f"SELECT * FROM models WHERE {where} ORDER BY id DESC LIMIT ? OFFSET ?",
+                self.conn, params=params + [limit, offset],
+            )
+
+    def resolve(self, ticker, lookback, horizon, legacy_dir="."):
+        """
+        Pliki modelu do prognozy: najnowszy model z rejestru, a gdy go brak –
+        stare pliki z katalogu roboczego (nazwy jak w gielda_lstm_core.get_file_paths).
+
+        Returns:
+            (model_path, scaler_path, rekord albo None dla plików legacy)
+        """
+        record = self.latest(ticker, lookback, horizon)
+        if record is not None:
+            return record['model_path'], record['scaler_path'], record
+        key = ticker_key(ticker)
+        model_path = os.path.join(legacy_dir, f"model_{key}_L{lookback}_H{horizon}.keras")
+        scaler_path = os.path.join(legacy_dir, f"scaler_{key}_L{lookback}_H{horizon}.pkl")
+        return model_path, scaler_path, None
+
+    # ========= PORZĄDKI =========
+    def remove(self, model_id):
+        """Usuń wpis z manifestu (artefakty usuwa gc())."""
+        with self._lock:
+            self.conn.execute("DELETE FROM models WHERE id = ?", (model_id,))
+            self.conn.commit()
+
+    def gc(self):
+        """
+        Usuń z magazynu artefakty, do których nie odwołuje się żaden model
+        (nie uruchamiać równolegle z register – nowy plik trafia do magazynu przed wpisem).
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT model_sha256, model_ext FROM models UNION SELECT scaler_sha256, scaler_ext FROM models"
+            ).fetchall()
+        referenced = {sha + ext for sha, ext in rows}
+        removed = 0
+        for prefix in os.listdir(self.objects_dir):
+            folder = os.path.join(self.objects_dir, prefix)
+            if not os.path.isdir(folder):
+                continue
+            for name in os.listdir(folder):
+                if name not in referenced:
+                    os.remove(os.path.join(folder, name))
+                    removed += 1
+        print(f"🧹 Usunięto {removed} nieużywanych artefaktów")
+        return removed
+
+    def close(self):
+        """Zamknij połączenie z bazą."""
+        if self.conn:
+            self.conn.close()
+            self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _chunks(f, size=1 << 20):
+    """Plik czytany porcjami (bez wczytywania całego modelu do pamięci)."""
+    return iter(lambda: f.read(size), b"")
+
+
+def _sha256(path):
+    """SHA-256 pliku (hashlib.file_digest dopiero od Pythona 3.11)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in _chunks(f):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,198 @@
+# prediction_batcher.py
+
+"""
+Moduł z dynamicznym łączeniem predykcji w partie:
+- Żądania do tego samego modelu zbierane przez kilka milisekund (albo do max_batch)
+- Jedno model.predict na całej partii, wyniki rozdzielane do wywołujących
+- Osobna kolejka (i wątek) na każdą konfigurację modelu
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class BatchQueue:
+    """
+    Kolejka żądań przed funkcją predykcji jednego modelu.
+
+    Wątek roboczy zbiera żądania przez max_wait_ms (albo do max_batch),
+    wykonuje jedno predict na całej partii i rozdziela wyniki do Future.
+    """
+
+    def __init__(self, predict_func, max_batch=32, max_wait_ms=5.0, on_batch=None):
+        """
+        Args:
+            predict_func: funkcja (X o kształcie (n, ...)) -> wyniki o długości n
+            max_batch: maksymalna liczba żądań w jednej partii
+            max_wait_ms: jak długo czekać na kolejne żądania od pierwszego w partii
+            on_batch: opcjonalna funkcja (rozmiar partii, czas predict [s]) po każdej partii
+        """
+        self.predict_func = predict_func
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.on_batch = on_batch
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def submit(self, x):
+        """
+        Dodaj jedno wejście (tablica o kształcie wejścia modelu bez wymiaru partii).
+
+        Returns:
+            Future z (wiersz wyniku, rozmiar partii, czas oczekiwania w kolejce [s])
+        """
+        future = Future()
+        item = (x, future, time.perf_counter())
+        with self._lock:
+            if not self._closed:
+                self._queue.put(item)
+                return future
+        # Kolejka już zamknięta (np. model zwolniony z cache) – predict od razu w tym wątku
+        self._run([item])
+        return future
+
+    def _loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            stop = False
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._run(batch)
+            if stop:
+                return
+
+    def _run(self, batch):
+        started = time.perf_counter()
+        error = None
+        try:
+            out = self.predict_func(np.stack([x for x, _, _ in batch]))
+            if len(out) != len(batch):
+                raise ValueError(f"predict zwrócił {len(out)} wierszy dla partii {len(batch)} wejść")
+            for row, (_, future, queued_at) in zip(out, batch):
+                future.set_result((row, len(batch), started - queued_at))
+            if self.on_batch is not None:
+                self.on_batch(len(batch), time.perf_counter() - started)
+        except Exception as e:
+            error = e
+        finally:
+            # Żaden wywołujący nie może czekać w result() w nieskończoność
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(error or RuntimeError("Partia predykcji przerwana"))
+
+    def close(self):
+        """Zakończ wątek po obsłużeniu żądań już w kolejce."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join(timeout=5)
+
+
+class PredictionBatcher:
+    """
+    Wspólny punkt wejścia do predykcji dla wielu modeli.
+
+    Każda konfiguracja modelu (klucz, np. ścieżka pliku modelu albo (ticker, lookback, horizon))
+    dostaje własną BatchQueue; równoczesne żądania z tym samym kluczem trafiają do jednej partii.
+    Zgłoszenie z nową wersją modelu (version) zamyka kolejkę poprzedniej wersji tego klucza.
+    """
+
+    def __init__(self, max_batch=32, max_wait_ms=5.0):
+        """
+        Args:
+            max_batch: maksymalna liczba żądań w jednym model.predict
+            max_wait_ms: czas zbierania partii (opóźnienie samotnego żądania)
+        """
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self._queues = {}  # klucz -> (BatchQueue, model, version)
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'batches': 0, 'max_batch_seen': 0}
+
+    def _record_batch(self, size, seconds):
+        with self._lock:
+            self.stats['batches'] += 1
+            self.stats['max_batch_seen'] = max(self.stats['max_batch_seen'], size)
+
+    def model(self, key, version=None):
+        """Model obsługujący kolejkę klucza w danej wersji (None gdy brak – trzeba go wczytać)."""
+        with self._lock:
+            entry = self._queues.get(key)
+        if entry is None or entry[2] != version:
+            return None
+        return entry[1]
+
+    def submit(self, key, model, x, version=None):
+        """
+        Zgłoś wejście x do predykcji modelem przypisanym do klucza.
+
+        Args:
+            key: konfiguracja modelu (hashowalna)
+            model: obiekt z metodą predict(X, verbose=0) albo funkcja X -> wyniki;
+                   używany przy pierwszym żądaniu dla klucza i wersji (po close(key) – ponownie)
+            x: pojedyncze wejście bez wymiaru partii, np. (lookback, 1)
+            version: wersja modelu dla klucza (np. (ścieżka, mtime)); inna niż w kolejce –
+                     kolejka poprzedniej wersji jest zamykana i tworzona nowa z podanym modelem
+
+        Returns:
+            Future z (wiersz wyniku, rozmiar partii, czas w kolejce [s])
+        """
+        stale = None
+        with self._lock:
+            self.stats['requests'] += 1
+            entry = self._queues.get(key)
+            if entry is not None and entry[2] != version:
+                stale, entry = entry[0], None
+            if entry is None:
+                batch_queue = BatchQueue(_predict_func(model), max_batch=self.max_batch,
+                                         max_wait_ms=self.max_wait_ms, on_batch=self._record_batch)
+                entry = self._queues[key] = (batch_queue, model, version)
+        if stale is not None:
+            stale.close()
+        return entry[0].submit(np.asarray(x))
+
+    def predict(self, key, model, x, version=None):
+        """Jak submit, ale czeka na wynik i zwraca sam wiersz predykcji."""
+        row, _, _ = self.submit(key, model, x, version=version).result()
+        return row
+
+    def close(self, key=None):
+        """Zamknij kolejkę jednego klucza (np. po zwolnieniu modelu) albo wszystkie."""
+        with self._lock:
+            if key is None:
+                entries = list(self._queues.values())
+                self._queues.clear()
+            else:
+                entries = [e for e in [self._queues.pop(key, None)] if e is not None]
+        for batch_queue, _, _ in entries:
+            batch_queue.close()
+
+
+def _predict_func(model):
+    if hasattr(model, "predict"):
+        return lambda X: model.predict(X, verbose=0)
+    return model
@@ -163,6 +163,58 @@ class FeatureEngineer:
         
         return df_feat.dropna()
 
+    @staticmethod
+    def add_sentiment_features(df, sentiment, date_column='Date', lag_sessions=1):
+        """
+        Dołącz dzienny sentyment jako kolumny features (bez sieci).
+        
+        Newsy z dnia bez notowań (weekend, święto) trafiają na najbliższą kolejną sesję;
+        kilka dni newsów na jednej sesji jest łączonych (średnie ważone liczbą artykułów).
+        
+        Args:
+            df: DataFrame z cenami (kolumna date_column albo DatetimeIndex, także ze strefą czasową)
+            sentiment: DataFrame z SentimentStore.load(ticker)
+                       (date, num_articles, avg_sentiment, positive_ratio, negative_ratio)
+            date_column: nazwa kolumny z datą w df
+            lag_sessions: przesunięcie sentymentu w sesjach (1 = newsy przypisane do poprzedniej
+                          sesji, żeby model nie widział informacji z przyszłości)
+        
+        Returns:
+            DataFrame z kolumnami Sentiment, Sentiment_Pos, Sentiment_Neg, News_Count
+            (sesje bez newsów: 0)
+        """
+        sent_cols = ['Sentiment', 'Sentiment_Pos', 'Sentiment_Neg', 'News_Count']
+        weighted_cols = ['Sentiment', 'Sentiment_Pos', 'Sentiment_Neg']
+        
+        use_index = date_column not in df.columns
+        price_days = _naive_days(df.index if use_index else df[date_column])
+        sessions = pd.DataFrame({'_day': price_days.dropna().unique().sort_values()})
+        
+        news = sentiment.rename(columns={
+            'avg_sentiment': 'Sentiment',
+            'positive_ratio': 'Sentiment_Pos',
+            'negative_ratio': 'Sentiment_Neg',
+            'num_articles': 'News_Count',
+        })[sent_cols].assign(_news_day=_naive_days(sentiment['date']))
+        news = news.dropna(subset=['_news_day']).sort_values('_news_day')
+        
+        # Dzień newsa -> pierwsza sesja tego dnia lub później (po ostatniej sesji: pomijany)
+        news = pd.merge_asof(news, sessions, left_on='_news_day', right_on='_day', direction='forward')
+        news = news.dropna(subset=['_day'])
+        weights = news['News_Count'].clip(lower=1)
+        news[weighted_cols] = news[weighted_cols].mul(weights, axis=0)
+        per_session = news.assign(_w=weights).groupby('_day')[sent_cols + ['_w']].sum()
+        per_session[weighted_cols] = per_session[weighted_cols].div(per_session['_w'], axis=0)
+        
+        # Opóźnienie liczone w wierszach sesji, nie w dniach kalendarzowych
+        per_session = per_session[sent_cols].reindex(sessions['_day']).fillna(0.0)
+        per_session = per_session.shift(lag_sessions).fillna(0.0)
+        
+        merged = df.assign(_day=price_days).merge(per_session, left_on='_day', right_index=True, how='left')
+        merged.index = df.index
+        merged[sent_cols] = merged[sent_cols].fillna(0.0)
+        return merged.drop(columns='_day')
+
     @staticmethod
     def normalize_features(df, columns):
         """Normalizuj wybranie kolumny (0-1)."""
@@ -199,3 +251,11 @@ class FeatureEngineer:
             y.append(data[i, close_idx])     # próby Close dla tego dnia
         
         return np.array(X), np.array(y)
+
+
+def _naive_days(values):
+    """Daty jako dni bez strefy czasowej (czas lokalny giełdy), np. z yfinance history()."""
+    days = pd.DatetimeIndex(pd.to_datetime(values))
+    if days.tz is not None:
+        days = days.tz_localize(None)
+    return days.normalize().astype('datetime64[ns]')